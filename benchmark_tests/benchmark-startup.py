@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import sys
+import time
+
+# Permite importar os módulos do projeto a partir desta pasta
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Módulos que o cracker_simulator importava no topo antes da separação do worker
+MODULOS_COMPLETOS = ['tqdm', 'rarfile', 'http.server', 'subprocess', 'argparse']
+
+def medir_importacao(codigo):
+    """Mede, num interpretador novo, o tempo de execução de 'codigo' (média de várias repetições)."""
+    import subprocess
+    tempos = []
+    for _ in range(NUM_REPETICOES):
+        inicio = time.perf_counter()
+        subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, check=True, stdout=subprocess.DEVNULL)
+        tempos.append(time.perf_counter() - inicio)
+    return sum(tempos) / len(tempos)
+
+def modulos_carregados_no_help():
+    """Executa '--help' e indica que bibliotecas pesadas ficaram carregadas."""
+    import subprocess
+    codigo = (
+        "import sys, runpy\n"
+        "sys.argv = ['cracker_simulator.py', '--help']\n"
+        "try:\n"
+        "    runpy.run_path('cracker_simulator.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+        f"print(','.join(m for m in {MODULOS_COMPLETOS + ['py7zr']!r} if m in sys.modules))\n"
+    )
+    resultado = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True)
+    return resultado.stdout.strip().splitlines()[-1] if resultado.stdout.strip() else ''
+
+def _inicializar_minimo(contador):
+    """Inicializador equivalente ao atual: só o módulo mínimo dos workers."""
+    import cracker_worker
+    cracker_worker.inicializar_worker()
+    with contador.get_lock():
+        contador.value += 1
+
+def _inicializar_completo(contador):
+    """Inicializador equivalente ao anterior: cada worker importava o módulo inteiro e as suas dependências."""
+    import importlib
+    for modulo in MODULOS_COMPLETOS:
+        importlib.import_module(modulo)
+    import cracker_simulator
+    with contador.get_lock():
+        contador.value += 1
+
+def medir_arranque_pool(metodo, inicializador, num_workers):
+    """Tempo até todos os workers de um pool novo terem corrido o inicializador."""
+    contexto = multiprocessing.get_context(metodo)
+    if metodo == 'forkserver':
+        contexto.set_forkserver_preload(['cracker_worker'])
+    contador = contexto.Value('i', 0)
+    inicio = time.perf_counter()
+    pool = contexto.Pool(processes=num_workers, initializer=inicializador, initargs=(contador,))
+    while contador.value < num_workers:
+        time.sleep(0.001)
+    duracao = time.perf_counter() - inicio
+    pool.terminate()
+    pool.join()
+    return duracao
+
+# --- Início do Teste de Performance ---
+NUM_REPETICOES = 5
+NUM_WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 128
+METODOS = [m for m in ('fork', 'forkserver', 'spawn') if m in multiprocessing.get_all_start_methods()]
+
+if __name__ == '__main__':
+    print(f"--- Tempo de importação (média de {NUM_REPETICOES} interpretadores novos) ---")
+    base = medir_importacao('pass')
+    minimo = medir_importacao('import cracker_worker')
+    atual = medir_importacao('import cracker_simulator')
+    completo = medir_importacao('; '.join(f'import {m}' for m in MODULOS_COMPLETOS) + '; import cracker_simulator')
+    print(f"{'Interpretador vazio:':<44}{base * 1000:8.1f} ms")
+    print(f"{'cracker_worker:':<44}{(minimo - base) * 1000:8.1f} ms")
+    print(f"{'cracker_simulator:':<44}{(atual - base) * 1000:8.1f} ms")
+    print(f"{'cracker_simulator + dependências antigas:':<44}{(completo - base) * 1000:8.1f} ms")
+
+    carregados = modulos_carregados_no_help()
+    print(f"\nBibliotecas carregadas por '--help': {carregados or 'nenhuma'}")
+
+    print(f"\n--- Arranque de um pool com {NUM_WORKERS} workers ---")
+    for metodo in METODOS:
+        t_completo = medir_arranque_pool(metodo, _inicializar_completo, NUM_WORKERS)
+        t_minimo = medir_arranque_pool(metodo, _inicializar_minimo, NUM_WORKERS)
+        print(f"{metodo:<11} completo: {t_completo:7.3f} s | mínimo: {t_minimo:7.3f} s | ~{t_completo / t_minimo:.2f}x")
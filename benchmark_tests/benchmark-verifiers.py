@@ -0,0 +1,95 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Permite importar os módulos do projeto a partir desta pasta
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+import cracker_worker
+from cracker_fixtures import criar_fixtures
+
+# -----------------------------------------------------------------------------
+# BACKENDS: todos os do registo de verificadores que suportam o arquivo
+# -----------------------------------------------------------------------------
+def criar_testes(caminho, tipo):
+    """(nome, função caminho/senha -> aceite?) para cada backend compatível e disponível."""
+    metadados = cracker_worker.carregar_metadados(caminho, tipo)
+    testes = []
+    for backend in cracker_worker.verificadores_compativeis(tipo, metadados):
+        verificador = backend.criar(caminho, metadados)
+        testar = lambda _caminho, senha, v=verificador: v.verificar(senha.encode('utf-8')) == cracker_worker.ESTAGIO_FINAL
+        testes.append((backend.nome, testar))
+    return testes
+
+# -----------------------------------------------------------------------------
+# MEDIÇÃO
+# -----------------------------------------------------------------------------
+def percentil(valores, p):
+    """Percentil pelo método do posto mais próximo (valores já ordenados)."""
+    return valores[min(len(valores) - 1, max(0, -(-len(valores) * p // 100) - 1))]
+
+def medir(testar, caminho, senha):
+    """Mede NUM_TENTATIVAS senhas erradas e NUM_CORRETAS vezes a senha certa, uma latência por chamada."""
+    latencias = []
+    falsos_positivos = 0
+    aceites_corretas = 0
+    erros = 0
+    testar(caminho, senha)  # Aquecimento (imports, caches, metadados)
+
+    for i in range(NUM_TENTATIVAS):
+        inicio = time.perf_counter_ns()
+        try:
+            aceite = testar(caminho, f"senha_errada_{i}")
+        except Exception:
+            aceite = False
+            erros += 1
+        latencias.append(time.perf_counter_ns() - inicio)
+        falsos_positivos += bool(aceite)
+
+    for _ in range(NUM_CORRETAS):
+        try:
+            aceites_corretas += bool(testar(caminho, senha))
+        except Exception:
+            erros += 1
+
+    latencias.sort()
+    total = sum(latencias) / 1e9
+    return {
+        'p50': percentil(latencias, 50) / 1e6,
+        'p99': percentil(latencias, 99) / 1e6,
+        'taxa': NUM_TENTATIVAS / total if total else float('inf'),
+        'falsos_positivos': falsos_positivos,
+        'falsos_negativos': NUM_CORRETAS - aceites_corretas,
+        'erros': erros
+    }
+
+# --- Início do Teste de Performance ---
+NUM_TENTATIVAS = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+NUM_CORRETAS = 5
+SENHA_CORRETA = '1234'
+
+if __name__ == '__main__':
+    pasta = tempfile.mkdtemp(prefix='benchmark-verifiers-')
+    try:
+        fixtures, ignorados = criar_fixtures(pasta, SENHA_CORRETA)
+        for nome, motivo in ignorados:
+            print(f"[INFO] Fixture '{nome}' ignorada: {motivo}.")
+
+        print(f"\n--- {NUM_TENTATIVAS} senhas erradas e {NUM_CORRETAS} certas por backend ---")
+        print(f"{'Arquivo':<28}{'Backend':<12}{'p50 (ms)':>10}{'p99 (ms)':>10}{'Taxa (it/s)':>13}  Correção")
+        for nome, tipo, caminho in fixtures:
+            for backend, testar in criar_testes(caminho, tipo):
+                r = medir(testar, caminho, SENHA_CORRETA)
+                problemas = []
+                if r['falsos_positivos']:
+                    problemas.append(f"{r['falsos_positivos']} falso(s) positivo(s)")
+                if r['falsos_negativos']:
+                    problemas.append(f"{r['falsos_negativos']}/{NUM_CORRETAS} falso(s) negativo(s)")
+                if r['erros']:
+                    problemas.append(f"{r['erros']} erro(s)")
+                print(f"{nome:<28}{backend:<12}{r['p50']:>10.3f}{r['p99']:>10.3f}{r['taxa']:>13.1f}  {', '.join(problemas) or 'OK'}")
+    finally:
+        shutil.rmtree(pasta, ignore_errors=True)
@@ -0,0 +1,513 @@
+# -*- coding: utf-8 -*-
+"""
+API programática e daemon de trabalhos. A classe 'Cracker' executa ataques sem interação
+(nunca pergunta nada no terminal) e devolve resultados estruturados; mantém os pools de
+workers e o estado dos arquivos quentes entre trabalhos. O daemon aceita trabalhos por um
+socket Unix, ordena-os por prioridade e executa-os um de cada vez com o mesmo 'Cracker'.
+
+Uso:
+    python cracker_api.py serve [--socket CAMINHO] [--workers N]
+    python cracker_api.py submit ARQUIVO [--charset CARACTERES] [-min N] [-max N] [--priority N] [--wait]
+    python cracker_api.py status [ID] | wait ID | cancel ID | shutdown
+
+Na API:
+    with Cracker(workers=4) as cracker:
+        resultado = cracker.atacar('arquivo.zip', charset='0123456789', max_len=6)
+        resultado = await cracker.atacar_async('outro.7z', plan='plano.json')
+"""
+
+import argparse
+import asyncio
+import heapq
+import io
+import itertools
+import json
+import os
+import socket
+import socketserver
+import string
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import cracker_worker
+from cracker_simulator import (
+    SessionManager, CoverageLedger, carregar_plano, validar_plano, tipo_do_arquivo, nova_sessao, charset_da_sessao,
+    executar_sessao, criar_pool, usar_threads
+)
+
+SOCKET_PADRAO = os.path.join(tempfile.gettempdir(), f"cracker-{os.getuid()}.sock")
+CHARSET_PADRAO = string.ascii_letters + string.digits + string.punctuation
+
+# Linhas finais da saída de cada trabalho guardadas no resultado
+LINHAS_LOG = 50
+
+# Trabalhos terminados mantidos no daemon para consulta
+MAX_TRABALHOS_TERMINADOS = 1000
+
+# -----------------------------------------------------------------------------
+# API
+# -----------------------------------------------------------------------------
+class Cracker:
+    """
+    Executor reutilizável de ataques. Os pools (um de processos e um de threads) são criados
+    no primeiro trabalho que precisa deles e reaproveitados nos seguintes; cada worker guarda
+    o estado dos arquivos já vistos. Os trabalhos de uma instância são executados um de cada
+    vez (partilham os pools e o sinal de paragem).
+
+    O motor, a afinidade e o verificador imposto são da instância: não alteram os globais do
+    processo, pelo que várias instâncias com opções diferentes podem coexistir.
+    """
+    def __init__(self, workers: int | None = None, chunksize: int = 2, session_file: str = 'cracker_sessions.json',
+                 coverage_file: str | None = 'cracker_coverage.json', engine: str = 'auto', affinity: str = 'none',
+                 verifier: str | None = None, quiet: bool = True):
+        self.workers = workers or max(2, cracker_worker.cpus_efetivos())
+        self.chunksize = chunksize
+        self.session_file = session_file
+        self.coverage_file = coverage_file
+        self.quiet = quiet
+        self.engine = engine
+        self.affinity = affinity
+        self.verifier = verifier
+
+        self._pools = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'Cracker':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.fechar()
+
+    def fechar(self) -> None:
+        """Encerra os pools quentes."""
+        for pool in self._pools.values():
+            pool.terminate()
+            pool.join()
+        self._pools.clear()
+
+    def _pool(self, file_path: str, file_type: str, threads: bool):
+        pool = self._pools.get(threads)
+        if pool is None:
+            pool = self._pools[threads] = criar_pool(self.workers, file_path, file_type, threads, self.affinity, self.verifier)
+        return pool
+
+    def atacar(self, file_path: str, charset: str | None = None, min_len: int = 1, max_len: int = 8, step: int = 0,
+               plan: dict | str | None = None, hybrid: tuple[str, str] | None = None, hybrid_prepend: bool = False,
+               known_plaintext: dict | None = None, parallel: bool = True, on_existing: str = 'continue') -> dict:
+        """
+        Executa um ataque e devolve o resultado (ver '_resultado'). 'plan' é um plano já
+        carregado ou o caminho do JSON; 'known_plaintext' tem as chaves da sessão
+        ('plaintext_file', 'offset', 'entry', 'output_dir', 'invert'). Com uma sessão 'running'
+        para o arquivo, 'on_existing' decide: 'continue', 'overwrite' ou 'abort'.
+        """
+        with self._lock:
+            inicio = time.perf_counter()
+            log = io.StringIO()
+            try:
+                session_data, resultado = self._executar(file_path, log, charset, min_len, max_len, step, plan, hybrid,
+                                                         hybrid_prepend, known_plaintext, parallel, on_existing)
+            except (OSError, ValueError) as e:
+                session_data, resultado = None, {'erro': str(e)}
+            return _resultado(file_path, session_data, resultado, time.perf_counter() - inicio, log.getvalue())
+
+    async def atacar_async(self, file_path: str, **opcoes) -> dict:
+        """Versão asyncio de 'atacar': corre numa thread, sem bloquear o ciclo de eventos."""
+        return await asyncio.to_thread(self.atacar, file_path, **opcoes)
+
+    def _executar(self, file_path, log, charset, min_len, max_len, step, plan, hybrid, hybrid_prepend, known_plaintext, parallel, on_existing):
+        file_type = tipo_do_arquivo(file_path)
+        if not file_type:
+            raise ValueError(f"Formato de ficheiro não suportado: '{file_path}'. Use .zip, .rar ou .7z.")
+        if not os.path.exists(file_path):
+            raise OSError(f"O ficheiro '{file_path}' não foi encontrado.")
+        if min_len < 1 or max_len < min_len:
+            raise ValueError("Valores inválidos para comprimento mínimo/máximo.")
+        if on_existing not in ('continue', 'overwrite', 'abort'):
+            raise ValueError(f"Valor inválido para 'on_existing': {on_existing}")
+        if known_plaintext and file_type != 'zip':
+            raise ValueError("O ataque de texto claro conhecido só se aplica a arquivos .zip (ZipCrypto).")
+        if sum(bool(x) for x in (plan, hybrid, known_plaintext)) > 1:
+            raise ValueError("'plan', 'hybrid' e 'known_plaintext' não podem ser usados em conjunto.")
+        # Um arquivo substituído no mesmo caminho é detetado pelo próprio estado quente
+        # (tamanho e mtime), no processo principal e em cada worker: os pools mantêm-se
+        file_path = os.path.abspath(file_path)
+
+        session_manager = SessionManager(self.session_file)
+        session_data = session_manager.get_session(file_path)
+        if session_data and session_data['status'] in ('found', 'no_password_needed'):
+            return session_data, {'reutilizada': True}
+        if session_data and session_data['status'] == 'running' and on_existing == 'abort':
+            return session_data, {'abortado': True, 'erro': "Já existe uma sessão 'running' para este arquivo."}
+        if not session_data or session_data['status'] != 'running' or on_existing == 'overwrite':
+            plano = None
+            if isinstance(plan, str):
+                plano = carregar_plano(plan)
+            elif plan:
+                plano = validar_plano(plan, os.getcwd())
+            elif hybrid:
+                fase = {'type': 'hybrid', 'wordlist': hybrid[0], 'mask': hybrid[1], 'position': 'prepend' if hybrid_prepend else 'append'}
+                plano = validar_plano({'phases': [fase]}, os.getcwd())
+            if known_plaintext:
+                known_plaintext = dict({'offset': 0, 'entry': None, 'output_dir': None, 'invert': False}, **known_plaintext)
+                known_plaintext['plaintext_file'] = os.path.abspath(known_plaintext['plaintext_file'])
+            charset = "".join(sorted(set(charset or CHARSET_PADRAO)))
+            session_data = nova_sessao(file_path, file_type, {'custom': charset}, charset, min_len, max_len, step,
+                                       plano, plan if isinstance(plan, str) else None, known_plaintext)
+            session_manager.update_session(file_path, session_data)
+        else:
+            # Retoma a sessão guardada, com o charset guardado (como no '--continue')
+            session_data['charset'] = charset_da_sessao(session_data)
+
+        with cracker_worker.impor_verificador(self.verifier):
+            # O verificador é escolhido já aqui: um arquivo sem verificador compatível é um erro do trabalho
+            cracker_worker.verificador_do_arquivo(file_path, file_type)
+            threads = usar_threads(file_path, file_type, self.engine)
+
+        num_workers = self.workers if parallel else None
+        pool = None
+        if num_workers and session_data.get('mode') != 'known_plaintext':
+            pool = self._pool(file_path, file_type, threads)
+        cobertura = CoverageLedger(self.coverage_file) if self.coverage_file else None
+
+        # Em silêncio, a saída do trabalho vai só para o log do resultado e as barras de progresso
+        # são desligadas; sys.stdout/sys.stderr do processo (e das outras threads) ficam intactos
+        resultado = executar_sessao(session_manager, session_data, num_workers, self.chunksize, cobertura=cobertura, pool=pool,
+                                    motor=self.engine, afinidade=self.affinity, verificador=self.verifier,
+                                    saida=log if self.quiet else None, barras=not self.quiet)
+
+        if resultado is None and session_data['status'] == 'running':
+            # Erro dentro da execução: um pool eventualmente partido não é reutilizado
+            self.fechar()
+        return session_data, resultado
+
+def _resultado(file_path: str, session_data: dict | None, resultado: dict | None, duracao: float, log: str) -> dict:
+    """
+    Resultado estruturado de um trabalho: 'status' é 'found', 'failed', 'no_password_needed',
+    'aborted' (sessão 'running' deixada como estava) ou 'error'; 'password' e 'keys' só quando encontradas.
+    Bytes da senha que não sejam UTF-8 aparecem em 'password' como \\xNN; 'password_hex' tem os bytes exatos.
+    """
+    resultado = resultado or {}
+    senha = session_data.get('found_password') if session_data else None
+    bruto = cracker_worker.bytes_da_senha(senha) if senha is not None else None
+    linhas = log.splitlines()
+    erro = resultado.get('erro')
+    if not session_data:
+        status = 'error'
+    elif resultado.get('abortado'):
+        status = 'aborted'
+    elif session_data['status'] == 'running':
+        # A execução não terminou: as funções de ataque reportam os erros na saída
+        status = 'error'
+        erro = erro or next((l.strip() for l in reversed(linhas) if '[ERRO]' in l), "Execução interrompida.")
+    else:
+        status = session_data['status']
+    return {
+        'file': os.path.abspath(file_path),
+        'file_type': session_data['file_type'] if session_data else tipo_do_arquivo(file_path),
+        'status': status,
+        'password': bruto.decode('utf-8', 'backslashreplace') if bruto is not None else None,
+        'password_hex': bruto.hex() if bruto is not None else None,
+        'keys': session_data.get('found_keys') if session_data else None,
+        'mode': resultado.get('modo'),
+        'tentativas': resultado.get('tentativas', 0),
+        'tempo': duracao,
+        'rate': resultado.get('rate'),
+        'reused_session': bool(resultado.get('reutilizada')),
+        'error': erro,
+        'log': linhas[-LINHAS_LOG:]
+    }
+
+# -----------------------------------------------------------------------------
+# DAEMON (SOCKET UNIX, FILA COM PRIORIDADES)
+# -----------------------------------------------------------------------------
+# Protocolo: um pedido JSON por linha, uma resposta JSON por linha.
+#   {"op": "submit", "file": ..., "priority": 0, "options": {...}} -> {"ok": true, "id": ...}
+#   {"op": "status", "id": ...} (sem id: todos)                      -> {"ok": true, "job"/"jobs": ...}
+#   {"op": "wait", "id": ..., "timeout": null}                      -> {"ok": true, "job": ...}
+#   {"op": "cancel", "id": ...} (só trabalhos em fila)              -> {"ok": true}
+#   {"op": "shutdown"}                                              -> {"ok": true}
+# As opções são os argumentos de 'Cracker.atacar'. Maior prioridade sai primeiro; empates por ordem de chegada.
+class CrackerDaemon:
+    """Fila de trabalhos com prioridades, executada por uma única thread com um 'Cracker' quente."""
+    def __init__(self, cracker: Cracker, socket_path: str = SOCKET_PADRAO):
+        self.cracker = cracker
+        self.socket_path = socket_path
+        self.trabalhos = {}
+        self._fila = []
+        self._sequencia = itertools.count(1)
+        self._condicao = threading.Condition()
+        self._ativo = True
+        self._servidor = None
+
+    def submeter(self, file_path: str, opcoes: dict | None = None, prioridade: int = 0) -> str:
+        with self._condicao:
+            n = next(self._sequencia)
+            id_trabalho = f"{n:06d}"
+            self.trabalhos[id_trabalho] = {
+                'id': id_trabalho, 'file': file_path, 'options': opcoes or {}, 'priority': prioridade,
+                'state': 'queued', 'submitted': datetime.now().isoformat(), 'started': None, 'finished': None, 'result': None
+            }
+            heapq.heappush(self._fila, (-prioridade, n, id_trabalho))
+            self._condicao.notify_all()
+        return id_trabalho
+
+    def cancelar(self, id_trabalho: str) -> bool:
+        with self._condicao:
+            trabalho = self.trabalhos.get(id_trabalho)
+            if not trabalho or trabalho['state'] != 'queued':
+                return False
+            trabalho['state'] = 'cancelled'
+            trabalho['finished'] = datetime.now().isoformat()
+            self._condicao.notify_all()
+            return True
+
+    def aguardar(self, id_trabalho: str, timeout: float | None = None) -> dict | None:
+        with self._condicao:
+            self._condicao.wait_for(lambda: self.trabalhos.get(id_trabalho, {}).get('state') not in ('queued', 'running'), timeout)
+            return self.trabalhos.get(id_trabalho)
+
+    def _esquecer_antigos(self) -> None:
+        terminados = [t['id'] for t in self.trabalhos.values() if t['state'] in ('done', 'cancelled')]
+        for id_trabalho in terminados[:max(0, len(terminados) - MAX_TRABALHOS_TERMINADOS)]:
+            del self.trabalhos[id_trabalho]
+
+    def _executor(self) -> None:
+        while True:
+            with self._condicao:
+                self._condicao.wait_for(lambda: self._fila or not self._ativo)
+                if not self._ativo:
+                    return
+                _, _, id_trabalho = heapq.heappop(self._fila)
+                trabalho = self.trabalhos.get(id_trabalho)
+                if not trabalho or trabalho['state'] != 'queued':
+                    continue
+                trabalho['state'] = 'running'
+                trabalho['started'] = datetime.now().isoformat()
+
+            try:
+                resultado = self.cracker.atacar(trabalho['file'], **trabalho['options'])
+            except Exception as e:
+                # Opções desconhecidas vindas do cliente ou erro inesperado: o daemon continua
+                resultado = _resultado(trabalho['file'], None, {'erro': str(e)}, 0.0, '')
+            print(f"[INFO] Trabalho {id_trabalho} ({trabalho['file']}): {resultado['status']}" + (f" - {resultado['password']}" if resultado['password'] else ""))
+
+            with self._condicao:
+                trabalho['state'] = 'done'
+                trabalho['finished'] = datetime.now().isoformat()
+                trabalho['result'] = resultado
+                self._esquecer_antigos()
+                self._condicao.notify_all()
+
+    def tratar(self, pedido: dict) -> dict:
+        """Responde a um pedido do protocolo."""
+        op = pedido.get('op')
+        if op == 'submit':
+            if not pedido.get('file'):
+                return {'ok': False, 'error': "Falta o campo 'file'."}
+            return {'ok': True, 'id': self.submeter(pedido['file'], pedido.get('options'), int(pedido.get('priority', 0)))}
+        if op == 'status':
+            with self._condicao:
+                if pedido.get('id'):
+                    trabalho = self.trabalhos.get(pedido['id'])
+                    return {'ok': trabalho is not None, 'job': trabalho}
+                return {'ok': True, 'jobs': list(self.trabalhos.values())}
+        if op == 'wait':
+            trabalho = self.aguardar(pedido.get('id'), pedido.get('timeout'))
+            return {'ok': trabalho is not None, 'job': trabalho}
+        if op == 'cancel':
+            return {'ok': self.cancelar(pedido.get('id'))}
+        if op == 'shutdown':
+            threading.Thread(target=self.parar, daemon=True).start()
+            return {'ok': True}
+        return {'ok': False, 'error': f"Operação desconhecida: {op}"}
+
+    def servir(self) -> None:
+        """Escuta no socket Unix até 'shutdown' (ou Ctrl+C); o socket só é acessível pelo dono."""
+        if os.path.exists(self.socket_path):
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+                    s.connect(self.socket_path)
+                raise OSError(f"Já há um daemon a escutar em '{self.socket_path}'.")
+            except ConnectionRefusedError:
+                os.remove(self.socket_path) # Socket abandonado por um daemon anterior
+
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for linha in self.rfile:
+                    try:
+                        resposta = daemon.tratar(json.loads(linha))
+                    except (ValueError, TypeError) as e:
+                        resposta = {'ok': False, 'error': str(e)}
+                    self.wfile.write((json.dumps(resposta) + '\n').encode('utf-8'))
+
+        mascara = os.umask(0o177)
+        try:
+            self._servidor = socketserver.ThreadingUnixStreamServer(self.socket_path, Handler)
+        finally:
+            os.umask(mascara)
+        self._servidor.daemon_threads = True
+
+        executor = threading.Thread(target=self._executor, daemon=True)
+        executor.start()
+        print(f"[INFO] Daemon à escuta em '{self.socket_path}' ({self.cracker.workers} workers).")
+        try:
+            self._servidor.serve_forever()
+        finally:
+            self._servidor.server_close()
+            with self._condicao:
+                self._ativo = False
+                self._condicao.notify_all()
+            self.cracker.fechar()
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def parar(self) -> None:
+        """Deixa de aceitar pedidos; o trabalho em curso termina antes de os pools serem fechados."""
+        if self._servidor:
+            self._servidor.shutdown()
+
+class CrackerClient:
+    """Cliente do daemon: cada método é um pedido do protocolo."""
+    def __init__(self, socket_path: str = SOCKET_PADRAO):
+        self.socket_path = socket_path
+
+    def _pedido(self, **pedido) -> dict:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+            s.connect(self.socket_path)
+            with s.makefile('rwb') as f:
+                f.write((json.dumps(pedido) + '\n').encode('utf-8'))
+                f.flush()
+                return json.loads(f.readline())
+
+    def submeter(self, file_path: str, prioridade: int = 0, **opcoes) -> str:
+        # Os caminhos são resolvidos no cliente: o daemon pode correr noutro diretório
+        resposta = self._pedido(op='submit', file=os.path.abspath(file_path), priority=prioridade, options=opcoes)
+        if not resposta['ok']:
+            raise ValueError(resposta.get('error'))
+        return resposta['id']
+
+    def estado(self, id_trabalho: str | None = None):
+        resposta = self._pedido(op='status', id=id_trabalho)
+        return resposta.get('job') if id_trabalho else resposta.get('jobs')
+
+    def aguardar(self, id_trabalho: str, timeout: float | None = None) -> dict | None:
+        return self._pedido(op='wait', id=id_trabalho, timeout=timeout).get('job')
+
+    def cancelar(self, id_trabalho: str) -> bool:
+        return self._pedido(op='cancel', id=id_trabalho)['ok']
+
+    def encerrar(self) -> None:
+        self._pedido(op='shutdown')
+
+# -----------------------------------------------------------------------------
+# LINHA DE COMANDOS
+# -----------------------------------------------------------------------------
+def _mostrar_trabalho(trabalho: dict) -> None:
+    resultado = trabalho.get('result') or {}
+    detalhe = resultado.get('password') or resultado.get('error') or ''
+    if resultado.get('keys'):
+        detalhe = ' '.join(resultado['keys'])
+    print(f"{trabalho['id']}  {trabalho['state']:<9} p={trabalho['priority']:<3} {resultado.get('status') or '-':<18} {trabalho['file']}  {detalhe}")
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Daemon de trabalhos do cracker_simulator (socket Unix, fila com prioridades, pools quentes).")
+    parser.add_argument("--socket", default=SOCKET_PADRAO, help=f"Caminho do socket Unix (padrão: {SOCKET_PADRAO}).")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    p_servir = comandos.add_parser('serve', help="Inicia o daemon.")
+    p_servir.add_argument("--workers", type=int, default=max(2, cracker_worker.cpus_efetivos()), help="Número de workers dos pools quentes (padrão: CPUs utilizáveis).")
+    p_servir.add_argument("--chunksize", type=int, default=2, help="Candidatas por lote (padrão: 2).")
+    p_servir.add_argument("--session-file", default="cracker_sessions.json", help="Ficheiro para guardar as sessões.")
+    p_servir.add_argument("--coverage-file", default="cracker_coverage.json", help="Registo das regiões já testadas por arquivo.")
+    p_servir.add_argument("--no-coverage", action="store_true", help="Não consulta nem atualiza o registo de cobertura.")
+    p_servir.add_argument("--engine", choices=['auto', 'processos', 'threads'], default='auto', help="Motor do modo paralelo (padrão: auto).")
+    p_servir.add_argument("--affinity", choices=list(cracker_worker.MODOS_AFINIDADE), default='none', help="Fixa os workers aos CPUs (padrão: none).")
+    p_servir.add_argument("--verifier", choices=list(cracker_worker.VERIFICADORES), help="Impõe o verificador de senhas.")
+
+    p_submeter = comandos.add_parser('submit', help="Envia um trabalho para a fila.")
+    p_submeter.add_argument("arquivo", help="O caminho para o ficheiro .zip, .rar ou .7z.")
+    p_submeter.add_argument("--charset", help="Caracteres a testar (padrão: letras, dígitos e símbolos).")
+    p_submeter.add_argument("-min", "--min_len", type=int, default=1, help="Comprimento mínimo da senha.")
+    p_submeter.add_argument("-max", "--max_len", type=int, default=8, help="Comprimento máximo da senha.")
+    p_submeter.add_argument("--plan", metavar="FICHEIRO", help="Plano de ataque em JSON.")
+    p_submeter.add_argument("--hybrid", nargs=2, metavar=("WORDLIST", "MASCARA"), help="Modo híbrido: wordlist + máscara.")
+    p_submeter.add_argument("--hybrid-prepend", action="store_true", help="No modo híbrido, coloca a máscara antes da palavra.")
+    p_submeter.add_argument("--sequential", action="store_true", help="Executa no processo do daemon, sem o pool.")
+    p_submeter.add_argument("--on-existing", choices=['continue', 'overwrite', 'abort'], default='continue', help="O que fazer se já houver uma sessão 'running' para o arquivo (padrão: continue).")
+    p_submeter.add_argument("--priority", type=int, default=0, help="Prioridade do trabalho; maior sai primeiro (padrão: 0).")
+    p_submeter.add_argument("--wait", action="store_true", help="Espera pelo fim do trabalho e mostra o resultado.")
+
+    p_estado = comandos.add_parser('status', help="Mostra os trabalhos (ou um trabalho).")
+    p_estado.add_argument("id", nargs='?', help="Id do trabalho.")
+    p_estado.add_argument("--json", action="store_true", help="Mostra a resposta completa em JSON.")
+
+    p_aguardar = comandos.add_parser('wait', help="Espera pelo fim de um trabalho e mostra o resultado em JSON.")
+    p_aguardar.add_argument("id", help="Id do trabalho.")
+    p_aguardar.add_argument("--timeout", type=float, help="Tempo máximo de espera em segundos.")
+
+    p_cancelar = comandos.add_parser('cancel', help="Retira da fila um trabalho ainda não iniciado.")
+    p_cancelar.add_argument("id", help="Id do trabalho.")
+
+    comandos.add_parser('shutdown', help="Encerra o daemon (depois do trabalho em curso).")
+
+    args = parser.parse_args()
+
+    if args.comando == 'serve':
+        cracker = Cracker(args.workers, args.chunksize, args.session_file, None if args.no_coverage else args.coverage_file,
+                          args.engine, args.affinity, args.verifier)
+        try:
+            CrackerDaemon(cracker, args.socket).servir()
+        except OSError as e:
+            print(f"[ERRO] {e}")
+            return 1
+        except KeyboardInterrupt:
+            print("\n[INFO] Daemon interrompido pelo usuário.")
+        return 0
+
+    cliente = CrackerClient(args.socket)
+    try:
+        if args.comando == 'submit':
+            opcoes = {'min_len': args.min_len, 'max_len': args.max_len, 'parallel': not args.sequential, 'on_existing': args.on_existing}
+            if args.charset:
+                opcoes['charset'] = args.charset
+            if args.plan:
+                opcoes['plan'] = os.path.abspath(args.plan)
+            if args.hybrid:
+                opcoes['hybrid'] = [os.path.abspath(args.hybrid[0]), args.hybrid[1]]
+                opcoes['hybrid_prepend'] = args.hybrid_prepend
+            id_trabalho = cliente.submeter(args.arquivo, args.priority, **opcoes)
+            print(f"[INFO] Trabalho {id_trabalho} em fila.")
+            if args.wait:
+                print(json.dumps(cliente.aguardar(id_trabalho), indent=2, ensure_ascii=False))
+        elif args.comando == 'status':
+            resposta = cliente.estado(args.id)
+            if args.json:
+                print(json.dumps(resposta, indent=2, ensure_ascii=False))
+            elif args.id and not resposta:
+                print(f"[ERRO] Trabalho '{args.id}' desconhecido.")
+                return 1
+            else:
+                for trabalho in ([resposta] if args.id else resposta):
+                    _mostrar_trabalho(trabalho)
+        elif args.comando == 'wait':
+            print(json.dumps(cliente.aguardar(args.id, args.timeout), indent=2, ensure_ascii=False))
+        elif args.comando == 'cancel':
+            if not cliente.cancelar(args.id):
+                print(f"[ERRO] O trabalho '{args.id}' não está em fila.")
+                return 1
+        elif args.comando == 'shutdown':
+            cliente.encerrar()
+    except (ConnectionRefusedError, FileNotFoundError):
+        print(f"[ERRO] Nenhum daemon à escuta em '{args.socket}' (inicie com 'python cracker_api.py serve').")
+        return 2
+    except ValueError as e:
+        print(f"[ERRO] {e}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,378 @@
+# -*- coding: utf-8 -*-
+"""
+Histórico de benchmarks: cada execução do '--benchmark' (ou ficheiro importado de
+'benchmark_results/') é acrescentada a um ficheiro JSON Lines com a revisão git, a máquina
+e a configuração. O comando 'compare' deteta regressões de taxa estatisticamente
+significativas (teste t de Welch) entre uma revisão de referência e a atual.
+
+Uso:
+    python cracker_benchmarks.py list
+    python cracker_benchmarks.py import [ficheiros...]
+    python cracker_benchmarks.py compare [--baseline REV] [--candidate REV]
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import platform
+import re
+import socket
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.abspath(__file__))
+HISTORICO_PADRAO = os.path.join(RAIZ, 'benchmark_results', 'historico.jsonl')
+
+# Campos da configuração e do resultado que identificam uma medição comparável; os restantes
+# campos da configuração só geram um aviso quando diferem entre referência e candidata
+CHAVES_CONFIG = ('file_type', 'test_method')
+CHAVES_AVISO = ('charset_len', 'min_len', 'max_len', 'variant', 'start_method', 'engine', 'affinity', 'cpus')
+CHAVES_RESULTADO = ('modo', 'workers', 'chunksize')
+
+# -----------------------------------------------------------------------------
+# CONTEXTO (REVISÃO GIT E MÁQUINA)
+# -----------------------------------------------------------------------------
+def _git(*args: str) -> str | None:
+    import subprocess
+    try:
+        resultado = subprocess.run(['git', *args], cwd=RAIZ, capture_output=True, text=True, check=True)
+        return resultado.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def revisao_git() -> dict:
+    """Revisão atual e se a árvore de trabalho tem alterações por registar."""
+    return {
+        'revision': _git('rev-parse', 'HEAD'),
+        'branch': _git('rev-parse', '--abbrev-ref', 'HEAD'),
+        'dirty': bool(_git('status', '--porcelain', '--untracked-files=no'))
+    }
+
+def _modelo_cpu() -> str | None:
+    try:
+        with open('/proc/cpuinfo') as f:
+            for linha in f:
+                if linha.startswith('model name'):
+                    return linha.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or None
+
+def descrever_maquina() -> dict:
+    return {
+        'hostname': socket.gethostname(),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'cpu_count': multiprocessing.cpu_count(),
+        'cpu_model': _modelo_cpu()
+    }
+
+# -----------------------------------------------------------------------------
+# CLASSE DEDICADA AO HISTÓRICO
+# -----------------------------------------------------------------------------
+class BenchmarkHistory:
+    """
+    Histórico de execuções de benchmark em JSON Lines (uma execução por linha, só acrescentado).
+    Cada execução: {'id', 'timestamp', 'git', 'host', 'config', 'source', 'results': [...]}.
+    """
+    def __init__(self, filepath: str = HISTORICO_PADRAO):
+        self.filepath = filepath
+
+    def carregar(self) -> list[dict]:
+        execucoes = []
+        try:
+            with open(self.filepath, 'r') as f:
+                for linha in f:
+                    if linha.strip():
+                        execucoes.append(json.loads(linha))
+        except FileNotFoundError:
+            pass
+        return execucoes
+
+    def registar(self, resultados: list[dict], config: dict, source: str = 'benchmark', git: dict | None = None, host: dict | None = None, timestamp: str | None = None) -> dict:
+        """Acrescenta uma execução ao histórico e retorna-a."""
+        git = git or revisao_git()
+        timestamp = timestamp or datetime.now().isoformat()
+        execucao = {
+            'id': f"{timestamp[:19].replace(':', '').replace('-', '')}-{(git.get('revision') or 'sem-git')[:8]}-{hashlib.sha1(source.encode()).hexdigest()[:4]}",
+            'timestamp': timestamp,
+            'git': git,
+            'host': host or descrever_maquina(),
+            'config': config,
+            'source': source,
+            'results': [{k: r.get(k) for k in ('modo', 'workers', 'chunksize', 'tempo', 'rate', 'founded')} for r in resultados if r]
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(self.filepath)), exist_ok=True)
+        # Uma única escrita por execução: o ficheiro nunca fica com uma linha a meio
+        with open(self.filepath, 'a') as f:
+            f.write(json.dumps(execucao, ensure_ascii=False) + '\n')
+        return execucao
+
+    def selecionar(self, seletor: str | None) -> list[dict]:
+        """Execuções cujo id, revisão git ou origem começam pelo seletor."""
+        execucoes = self.carregar()
+        if not seletor:
+            return execucoes
+        return [e for e in execucoes
+                if e['id'].startswith(seletor)
+                or (e['git'].get('revision') or '').startswith(seletor)
+                or e['source'].startswith(seletor)]
+
+# -----------------------------------------------------------------------------
+# IMPORTAÇÃO DOS RESULTADOS ANTIGOS (MARKDOWN / TABELAS)
+# -----------------------------------------------------------------------------
+_LINHA_TABELA = re.compile(r'^\|\s*\d+º\s*\|\s*([^|]+?)\s*\|\s*([^|]+?)\s*\|\s*([^|]+?)\s*\|\s*([\d.]+)\s*\|\s*([\d.]+)\s*\|')
+
+def _inteiro_ou_na(valor: str):
+    return int(valor) if valor.isdigit() else valor
+
+def ler_resultados_antigos(caminho: str) -> tuple[list[dict], dict, dict]:
+    """
+    Lê um ficheiro de 'benchmark_results' (saída do '--benchmark' guardada à mão): a tabela
+    de desempenho e, quando existe, o cabeçalho (CPU Count, Tipo, Charset, Comprimento).
+    A variante (método de teste, 'no-sleep', ...) vem do nome do ficheiro.
+    """
+    resultados = []
+    config = {'file_type': None, 'test_method': None, 'charset_len': None, 'min_len': None, 'max_len': None, 'variant': None}
+    host = {'hostname': None, 'cpu_count': None}
+    with open(caminho, 'r', encoding='utf-8') as f:
+        for linha in f:
+            m = _LINHA_TABELA.match(linha)
+            if m:
+                resultados.append({
+                    'modo': m.group(1),
+                    'workers': _inteiro_ou_na(m.group(2)),
+                    'chunksize': _inteiro_ou_na(m.group(3)),
+                    'tempo': float(m.group(4)),
+                    'rate': float(m.group(5)),
+                    'founded': True
+                })
+            elif linha.startswith('CPU Count:'):
+                host['cpu_count'] = int(linha.split(':')[1])
+            elif m := re.match(r"Alvo: .*\(Tipo: (\w+)\)", linha):
+                config['file_type'] = m.group(1)
+            elif m := re.match(r"Charset: .*\((\d+) caracteres\)", linha):
+                config['charset_len'] = int(m.group(1))
+            elif m := re.match(r"Comprimento: de (\d+) a (\d+)", linha):
+                config['min_len'], config['max_len'] = int(m.group(1)), int(m.group(2))
+
+    # Ex.: 'test-rar_rarfile_no-sleep.md' -> tipo 'rar', método 'rarfile', variante 'no-sleep'
+    partes = os.path.splitext(os.path.basename(caminho))[0].split('_')
+    config['file_type'] = config['file_type'] or partes[0].split('-')[-1]
+    for parte in partes[1:]:
+        if parte in ('rarfile', 'subprocess', 'zipfile', 'unzip'):
+            config['test_method'] = parte
+        else:
+            config['variant'] = parte.replace('nosleep', 'no-sleep')
+    return resultados, config, host
+
+def importar(history: BenchmarkHistory, caminhos: list[str]) -> int:
+    """Importa ficheiros antigos; cada um uma única vez (identificado pelo hash do conteúdo)."""
+    ja_importados = {e['source'] for e in history.carregar()}
+    importados = 0
+    for caminho in caminhos:
+        with open(caminho, 'rb') as f:
+            source = f"import:{os.path.basename(caminho)}:{hashlib.sha256(f.read()).hexdigest()[:12]}"
+        if source in ja_importados:
+            print(f"[INFO] '{caminho}' já foi importado.")
+            continue
+        resultados, config, host = ler_resultados_antigos(caminho)
+        if not resultados:
+            print(f"[INFO] '{caminho}' não tem tabela de desempenho, ignorado.")
+            continue
+        # A revisão e a data são as do commit que acrescentou o ficheiro
+        relativo = os.path.relpath(os.path.abspath(caminho), RAIZ)
+        revisao = _git('log', '--diff-filter=A', '--format=%H', '-1', '--', relativo)
+        data = _git('log', '--diff-filter=A', '--format=%cI', '-1', '--', relativo)
+        history.registar(resultados, config, source, {'revision': revisao or None, 'branch': None, 'dirty': False}, host, data or None)
+        print(f"[SUCESSO] '{caminho}': {len(resultados)} resultado(s) importado(s).")
+        importados += 1
+    return importados
+
+# -----------------------------------------------------------------------------
+# DETEÇÃO DE REGRESSÕES
+# -----------------------------------------------------------------------------
+def _beta_incompleta(x: float, a: float, b: float) -> float:
+    """Função beta incompleta regularizada I_x(a, b) (fração contínua de Lentz)."""
+    if x <= 0.0:
+        return 0.0
+    if x >= 1.0:
+        return 1.0
+    if x > (a + 1) / (a + b + 2):
+        return 1.0 - _beta_incompleta(1.0 - x, b, a)
+    frente = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x)) / a
+    TINY = 1e-300
+    f, c, d = 1.0, 1.0, 0.0
+    for i in range(400):
+        m = i // 2
+        if i == 0:
+            numerador = 1.0
+        elif i % 2 == 0:
+            numerador = (m * (b - m) * x) / ((a + 2 * m - 1) * (a + 2 * m))
+        else:
+            numerador = -((a + m) * (a + b + m) * x) / ((a + 2 * m) * (a + 2 * m + 1))
+        d = 1.0 + numerador * d
+        d = 1.0 / (d if abs(d) > TINY else TINY)
+        c = 1.0 + numerador / c
+        c = c if abs(c) > TINY else TINY
+        f *= c * d
+        if abs(1.0 - c * d) < 1e-12:
+            break
+    return frente * (f - 1.0)
+
+def _p_bilateral(t: float, gl: float) -> float:
+    return _beta_incompleta(gl / (gl + t * t), gl / 2, 0.5)
+
+def teste_welch(a: list[float], b: list[float]) -> float | None:
+    """
+    Valor-p bilateral do teste t de Welch. Se um dos lados tiver uma única medição (uma execução
+    normal do benchmark), testa-a contra o intervalo de predição do outro lado; None se nenhum
+    dos lados tiver pelo menos 2 valores.
+    """
+    if len(a) < 2 and len(b) < 2:
+        return None
+    if len(a) < 2 or len(b) < 2:
+        amostra, valor = (a, b[0]) if len(b) < 2 else (b, a[0])
+        m = sum(amostra) / len(amostra)
+        v = sum((x - m) ** 2 for x in amostra) / (len(amostra) - 1)
+        if v == 0:
+            return 1.0 if valor == m else 0.0
+        return _p_bilateral((valor - m) / math.sqrt(v * (1 + 1 / len(amostra))), len(amostra) - 1)
+    ma, mb = sum(a) / len(a), sum(b) / len(b)
+    va = sum((x - ma) ** 2 for x in a) / (len(a) - 1)
+    vb = sum((x - mb) ** 2 for x in b) / (len(b) - 1)
+    erro = va / len(a) + vb / len(b)
+    if erro == 0:
+        return 1.0 if ma == mb else 0.0
+    t = (ma - mb) / math.sqrt(erro)
+    gl = erro ** 2 / ((va / len(a)) ** 2 / (len(a) - 1) + (vb / len(b)) ** 2 / (len(b) - 1))
+    return _p_bilateral(t, gl)
+
+def agrupar_amostras(execucoes: list[dict]) -> dict:
+    """Taxas agrupadas por configuração + (modo, workers, chunksize)."""
+    grupos = {}
+    for execucao in execucoes:
+        config = tuple(execucao['config'].get(k) for k in CHAVES_CONFIG)
+        for r in execucao['results']:
+            if r.get('rate') is None:
+                continue
+            grupos.setdefault(config + tuple(r.get(k) for k in CHAVES_RESULTADO), []).append(r['rate'])
+    return grupos
+
+def comparar(referencia: list[dict], candidata: list[dict], alfa: float = 0.05, limiar: float = 5.0) -> list[dict]:
+    """
+    Compara as taxas de cada configuração presente nos dois conjuntos. Uma regressão exige uma
+    queda da média acima de 'limiar' % e, havendo amostras suficientes, p < 'alfa'.
+    """
+    base, cand = agrupar_amostras(referencia), agrupar_amostras(candidata)
+    linhas = []
+    for chave in sorted(set(base) & set(cand), key=str):
+        a, b = base[chave], cand[chave]
+        ma, mb = sum(a) / len(a), sum(b) / len(b)
+        variacao = (mb - ma) / ma * 100 if ma else 0.0
+        p = teste_welch(a, b)
+        if abs(variacao) < limiar:
+            veredito = 'ok'
+        elif p is None:
+            veredito = 'inconclusivo'
+        elif p >= alfa:
+            veredito = 'ok'
+        else:
+            veredito = 'REGRESSÃO' if variacao < 0 else 'melhoria'
+        linhas.append({'chave': chave, 'base': ma, 'n_base': len(a), 'candidata': mb, 'n_candidata': len(b), 'variacao': variacao, 'p': p, 'veredito': veredito})
+    return linhas
+
+def _ultimas_revisoes(execucoes: list[dict]) -> list[str]:
+    """Revisões distintas pela ordem em que aparecem no histórico."""
+    revisoes = []
+    for e in execucoes:
+        rev = e['git'].get('revision')
+        if rev and rev not in revisoes:
+            revisoes.append(rev)
+        elif rev:
+            revisoes.append(revisoes.pop(revisoes.index(rev)))
+    return revisoes
+
+# -----------------------------------------------------------------------------
+# LINHA DE COMANDOS
+# -----------------------------------------------------------------------------
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Histórico de benchmarks do cracker_simulator e deteção de regressões.")
+    parser.add_argument("--history-file", default=HISTORICO_PADRAO, help="Ficheiro JSON Lines do histórico.")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    comandos.add_parser('list', help="Lista as execuções registadas.")
+
+    p_importar = comandos.add_parser('import', help="Importa os resultados antigos de 'benchmark_results'.")
+    p_importar.add_argument("ficheiros", nargs='*', help="Ficheiros a importar (padrão: todos os .md/.csv de 'benchmark_results').")
+
+    p_comparar = comandos.add_parser('compare', help="Compara as taxas de duas revisões e assinala regressões.")
+    p_comparar.add_argument("--baseline", help="Id, prefixo da revisão git ou origem das execuções de referência (padrão: a penúltima revisão).")
+    p_comparar.add_argument("--candidate", help="Id, prefixo da revisão git ou origem das execuções a avaliar (padrão: a última revisão).")
+    p_comparar.add_argument("--alpha", type=float, default=0.05, help="Nível de significância do teste t de Welch (padrão: 0.05).")
+    p_comparar.add_argument("--threshold", type=float, default=5.0, help="Variação mínima da taxa média, em %%, para assinalar (padrão: 5).")
+
+    args = parser.parse_args()
+    history = BenchmarkHistory(args.history_file)
+
+    if args.comando == 'list':
+        execucoes = history.carregar()
+        if not execucoes:
+            print("Nenhuma execução registada.")
+        for e in execucoes:
+            rev = (e['git'].get('revision') or '-')[:8] + ('+' if e['git'].get('dirty') else '')
+            print(f"{e['id']:<31} {e['timestamp'][:19]:<20} {rev:<10} {e['host'].get('hostname') or '-':<16} "
+                  f"{e['config'].get('file_type') or '-':<4} {len(e['results']):>4} resultado(s)  {e['source']}")
+        return 0
+
+    if args.comando == 'import':
+        pasta = os.path.join(RAIZ, 'benchmark_results')
+        ficheiros = args.ficheiros or sorted(os.path.join(pasta, f) for f in os.listdir(pasta) if f.endswith(('.md', '.csv')))
+        importar(history, ficheiros)
+        return 0
+
+    execucoes = history.carregar()
+    revisoes = _ultimas_revisoes(execucoes)
+    if not args.candidate and not revisoes:
+        print("[ERRO] O histórico não tem execuções com revisão git.")
+        return 2
+    candidata = history.selecionar(args.candidate or revisoes[-1])
+    if args.baseline:
+        referencia = history.selecionar(args.baseline)
+    else:
+        anteriores = [r for r in revisoes if not any((e['git'].get('revision') == r) for e in candidata)]
+        referencia = history.selecionar(anteriores[-1]) if anteriores else []
+    if not referencia or not candidata:
+        print("[ERRO] Não há execuções suficientes para comparar (indique --baseline/--candidate).")
+        return 2
+
+    hosts = {e['host'].get('hostname') for e in referencia + candidata}
+    if len(hosts) > 1:
+        print(f"[INFO] As execuções vêm de máquinas diferentes ({', '.join(str(h) for h in hosts)}): a comparação pode não ser justa.")
+
+    for campo in CHAVES_AVISO:
+        valores_base = {e['config'].get(campo) for e in referencia}
+        valores_cand = {e['config'].get(campo) for e in candidata}
+        if valores_base != valores_cand:
+            print(f"[INFO] '{campo}' difere entre referência {sorted(map(str, valores_base))} e candidata {sorted(map(str, valores_cand))}.")
+
+    linhas = comparar(referencia, candidata, args.alpha, args.threshold)
+    if not linhas:
+        print("[INFO] Nenhuma configuração em comum entre as execuções comparadas.")
+        return 2
+
+    print(f"{'Configuração':<44} {'Referência':>14} {'Candidata':>14} {'Variação':>9} {'p':>7}  Veredito")
+    for l in linhas:
+        config = dict(zip(CHAVES_CONFIG + CHAVES_RESULTADO, l['chave']))
+        nome = f"{config['file_type']}/{config['test_method'] or '-'} {config['modo']} w={config['workers']} c={config['chunksize']}"
+        p = f"{l['p']:.3f}" if l['p'] is not None else '-'
+        print(f"{nome:<44} {l['base']:>9.1f} (n={l['n_base']}) {l['candidata']:>9.1f} (n={l['n_candidata']}) {l['variacao']:>+8.1f}% {p:>7}  {l['veredito']}")
+
+    regressoes = [l for l in linhas if l['veredito'] == 'REGRESSÃO']
+    print(f"\n{len(regressoes)} regressão(ões) significativa(s) em {len(linhas)} configuração(ões).")
+    return 1 if regressoes else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
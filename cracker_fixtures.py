@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+"""
+Fábrica de arquivos de teste para os benchmarks: gera, no próprio processo e de forma
+determinística (mesma semente, mesmos bytes), zips ZipCrypto e AES, RAR5 e 7z com o número
+de entradas, o tamanho, o conteúdo e o método de compressão pedidos. Não depende dos
+comandos 'zip', 'rar' ou '7z': os benchmarks correm offline em qualquer Linux.
+
+Dependências opcionais: pycryptodomex (zips AES e RAR5) e py7zr (7z). Os 7z só têm conteúdo
+determinístico: o salt e o IV são escolhidos pelo py7zr.
+
+Uso:
+    python cracker_fixtures.py PASTA [--password SENHA] [--entries N] [--size BYTES]
+"""
+
+import argparse
+import hashlib
+import hmac
+import os
+import random
+import struct
+import unicodedata
+import zlib
+
+from cracker_worker import CRC32_TABELA, ZIPCRYPTO_CHAVES_INICIAIS, zipcrypto_atualizar
+
+SEMENTE_PADRAO = 890
+SENHA_PADRAO = '1234'
+
+# Data DOS fixa (1980-01-01 00:00) para que os zips não dependam do relógio
+DATA_DOS = (0, 0x21)
+
+METODOS_ZIP = {'store': 0, 'deflate': 8, 'bzip2': 12, 'lzma': 14}
+CONTEUDOS = ('texto', 'aleatorio')
+
+PALAVRAS = (b'este', b'teste', b'conteudo', b'benchmark', b'senha', b'arquivo', b'dados', b'chave',
+            b'bloco', b'entrada', b'de', b'para', b'com', b'o', b'a', b'um', b'uma')
+
+# -----------------------------------------------------------------------------
+# CONTEÚDO DAS ENTRADAS
+# -----------------------------------------------------------------------------
+def gerar_conteudo(rng: random.Random, tamanho: int, conteudo: str = 'texto') -> bytes:
+    """'texto' gera frases compressíveis; 'aleatorio' gera bytes incompressíveis."""
+    if conteudo == 'aleatorio':
+        return rng.randbytes(tamanho)
+    partes = []
+    total = 0
+    while total < tamanho:
+        palavra = rng.choice(PALAVRAS) + (b'.\n' if rng.random() < 0.1 else b' ')
+        partes.append(palavra)
+        total += len(palavra)
+    return b''.join(partes)[:tamanho]
+
+def gerar_entradas(rng: random.Random, num_entradas: int, tamanho: int, conteudo: str) -> list[tuple[str, bytes]]:
+    """(nome, dados) de cada entrada; os nomes seguem a ordem (documento_000.txt, ...)."""
+    extensao = 'bin' if conteudo == 'aleatorio' else 'txt'
+    return [(f'documento_{i:03d}.{extensao}', gerar_conteudo(rng, tamanho, conteudo)) for i in range(num_entradas)]
+
+# -----------------------------------------------------------------------------
+# ZIP (ZIPCRYPTO E WINZIP AES)
+# -----------------------------------------------------------------------------
+def _comprimir_zip(dados: bytes, metodo: str) -> bytes:
+    if metodo == 'store':
+        return dados
+    if metodo == 'bzip2':
+        import bz2
+        return bz2.compress(dados)
+    if metodo == 'lzma':
+        # Versão do SDK (2 bytes), tamanho das propriedades (2 bytes) e propriedades LZMA1
+        # (lc=3, lp=0, pb=2, dicionário de 1 MiB), seguidos do fluxo em bruto
+        import lzma
+        props = bytes([(2 * 5 + 0) * 9 + 3]) + struct.pack('<I', 1 << 20)
+        filtros = [{'id': lzma.FILTER_LZMA1, 'lc': 3, 'lp': 0, 'pb': 2, 'dict_size': 1 << 20}]
+        return struct.pack('<BBH', 9, 20, len(props)) + props + lzma.compress(dados, lzma.FORMAT_RAW, filters=filtros)
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15)
+    return compressor.compress(dados) + compressor.flush()
+
+def _escrever_zip(caminho: str, entradas: list[dict]) -> None:
+    """
+    Escreve o zip a partir de entradas já cifradas: {'nome', 'versao', 'flags', 'metodo', 'crc',
+    'corpo', 'tamanho', 'extra'}. Sem descritores de dados nem campos dependentes do relógio.
+    """
+    locais = bytearray()
+    central = bytearray()
+    hora, data = DATA_DOS
+    for e in entradas:
+        nome = e['nome'].encode('utf-8')
+        offset = len(locais)
+        locais += struct.pack('<IHHHHHIIIHH', 0x04034b50, e['versao'], e['flags'], e['metodo'], hora, data,
+                              e['crc'], len(e['corpo']), e['tamanho'], len(nome), len(e['extra']))
+        locais += nome + e['extra'] + e['corpo']
+        central += struct.pack('<IHHHHHHIIIHHHHHII', 0x02014b50, e['versao'], e['versao'], e['flags'], e['metodo'], hora, data,
+                               e['crc'], len(e['corpo']), e['tamanho'], len(nome), len(e['extra']), 0, 0, 0, 0, offset)
+        central += nome + e['extra']
+    fim = struct.pack('<IHHHHIIH', 0x06054b50, 0, 0, len(entradas), len(entradas), len(central), len(locais), 0)
+    with open(caminho, 'wb') as f:
+        f.write(locais + central + fim)
+
+def zipcrypto_cifrar(senha: bytes, dados: bytes) -> bytes:
+    """Cifra 'dados' (cabeçalho de 12 bytes + dados comprimidos) com as chaves da senha."""
+    chaves = ZIPCRYPTO_CHAVES_INICIAIS
+    for c in senha:
+        chaves = zipcrypto_atualizar(chaves, c)
+    crc = CRC32_TABELA
+    k0, k1, k2 = chaves
+    cifrado = bytearray(len(dados))
+    for i, p in enumerate(dados):
+        t = (k2 | 2) & 0xffff
+        cifrado[i] = p ^ (((t * (t ^ 1)) >> 8) & 0xff)
+        k0 = (k0 >> 8) ^ crc[(k0 ^ p) & 0xff]
+        k1 = ((k1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        k2 = (k2 >> 8) ^ crc[(k2 ^ (k1 >> 24)) & 0xff]
+    return bytes(cifrado)
+
+def criar_zip_zipcrypto(caminho: str, senha: str, num_entradas: int = 1, tamanho: int = 1024, metodo: str = 'deflate',
+                        conteudo: str = 'texto', semente: int = SEMENTE_PADRAO) -> None:
+    """Zip com encriptação tradicional (ZipCrypto); o check byte é o byte alto do CRC."""
+    rng = random.Random(semente)
+    senha = senha.encode('utf-8', 'surrogateescape') # Aceita senhas com bytes não UTF-8
+    entradas = []
+    for nome, dados in gerar_entradas(rng, num_entradas, tamanho, conteudo):
+        crc = zlib.crc32(dados)
+        cabecalho = rng.randbytes(11) + bytes([crc >> 24])
+        entradas.append({
+            'nome': nome, 'versao': 20, 'flags': 0x01, 'metodo': METODOS_ZIP[metodo], 'crc': crc, 'tamanho': len(dados), 'extra': b'',
+            'corpo': zipcrypto_cifrar(senha, cabecalho + _comprimir_zip(dados, metodo))
+        })
+    _escrever_zip(caminho, entradas)
+
+def criar_zip_aes(caminho: str, senha: str, num_entradas: int = 1, tamanho: int = 1024, metodo: str = 'deflate',
+                  conteudo: str = 'texto', semente: int = SEMENTE_PADRAO, forca: int = 3, versao_ae: int = 2) -> None:
+    """
+    Zip WinZip AES (AE-1 guarda o CRC, AE-2 não): PBKDF2-HMAC-SHA1 com 1000 iterações,
+    AES-CTR com contador little-endian a começar em 1 e HMAC-SHA1 truncado a 10 bytes.
+    """
+    from Cryptodome.Cipher import AES
+    from Cryptodome.Util import Counter
+
+    rng = random.Random(semente)
+    senha = senha.encode('utf-8')
+    tam_chave = {1: 16, 2: 24, 3: 32}[forca]
+    entradas = []
+    for nome, dados in gerar_entradas(rng, num_entradas, tamanho, conteudo):
+        salt = rng.randbytes(4 + 4 * forca)
+        chave = hashlib.pbkdf2_hmac('sha1', senha, salt, 1000, 2 * tam_chave + 2)
+        contador = Counter.new(128, initial_value=1, little_endian=True)
+        cifrado = AES.new(chave[:tam_chave], AES.MODE_CTR, counter=contador).encrypt(_comprimir_zip(dados, metodo))
+        mac = hmac.new(chave[tam_chave:2 * tam_chave], cifrado, 'sha1').digest()[:10]
+        entradas.append({
+            'nome': nome, 'versao': 51, 'flags': 0x01, 'metodo': 99, 'tamanho': len(dados),
+            'crc': zlib.crc32(dados) if versao_ae == 1 else 0,
+            'extra': struct.pack('<HHH2sBH', 0x9901, 7, versao_ae, b'AE', forca, METODOS_ZIP[metodo]),
+            'corpo': salt + chave[-2:] + cifrado + mac
+        })
+    _escrever_zip(caminho, entradas)
+
+# -----------------------------------------------------------------------------
+# RAR5 (ENTRADAS ARMAZENADAS, AES-256)
+# -----------------------------------------------------------------------------
+# Sem o comando 'rar' não há compressão RAR; as entradas são guardadas sem compressão
+# (método 0), o que chega para os verificadores, que só usam o cabeçalho de encriptação.
+RAR5_ASSINATURA = b'Rar!\x1a\x07\x01\x00'
+
+def _vint(n: int) -> bytes:
+    saida = bytearray()
+    while True:
+        b = n & 0x7f
+        n >>= 7
+        if n:
+            saida.append(b | 0x80)
+        else:
+            saida.append(b)
+            return bytes(saida)
+
+def _bloco_rar5(tipo: int, corpo: bytes, extra: bytes = b'', tam_dados: int = 0) -> bytes:
+    """Cabeçalho RAR5: CRC32, tamanho, tipo, flags (área extra / área de dados) e corpo."""
+    flags = (0x01 if extra else 0) | (0x02 if tam_dados else 0)
+    cabecalho = _vint(tipo) + _vint(flags)
+    if extra:
+        cabecalho += _vint(len(extra))
+    if tam_dados:
+        cabecalho += _vint(tam_dados)
+    cabecalho += corpo + extra
+    tamanho = _vint(len(cabecalho))
+    return struct.pack('<I', zlib.crc32(tamanho + cabecalho)) + tamanho + cabecalho
+
+def _chaves_rar5(senha: bytes, salt: bytes, contagem: int) -> tuple[bytes, bytes]:
+    """Chave AES (2^contagem iterações) e valor de verificação (+32 iterações, dobrado em 8 bytes)."""
+    iteracoes = 1 << contagem
+    chave = hashlib.pbkdf2_hmac('sha256', senha, salt, iteracoes)
+    dobrada = bytearray(8)
+    for i, b in enumerate(hashlib.pbkdf2_hmac('sha256', senha, salt, iteracoes + 32)):
+        dobrada[i % 8] ^= b
+    return chave, bytes(dobrada) + hashlib.sha256(dobrada).digest()[:4]
+
+def criar_rar5(caminho: str, senha: str, num_entradas: int = 1, tamanho: int = 1024, conteudo: str = 'texto',
+               semente: int = SEMENTE_PADRAO, cabecalho_cifrado: bool = True, contagem: int = 15) -> None:
+    """RAR5 com as entradas cifradas (AES-256-CBC) e, opcionalmente, os cabeçalhos (-hp)."""
+    from Cryptodome.Cipher import AES
+
+    rng = random.Random(semente)
+    salt = rng.randbytes(16)
+    chave, check = _chaves_rar5(senha.encode('utf-8'), salt, contagem)
+
+    def cifrar(dados, iv):
+        return AES.new(chave, AES.MODE_CBC, iv).encrypt(dados + bytes(-len(dados) % 16))
+
+    def cabecalho(bloco):
+        if not cabecalho_cifrado:
+            return bloco
+        iv = rng.randbytes(16)
+        return iv + cifrar(bloco, iv)
+
+    saida = bytearray(RAR5_ASSINATURA)
+    if cabecalho_cifrado:
+        saida += _bloco_rar5(4, _vint(0) + _vint(0x01) + bytes([contagem]) + salt + check)
+    saida += cabecalho(_bloco_rar5(1, _vint(0)))
+
+    for nome, dados in gerar_entradas(rng, num_entradas, tamanho, conteudo):
+        iv = rng.randbytes(16)
+        cifrado = cifrar(dados, iv)
+        registo = _vint(0x01) + _vint(0) + _vint(0x01) + bytes([contagem]) + salt + iv + check
+        extra = _vint(len(registo)) + registo
+        nome = nome.encode('utf-8')
+        # Flags: CRC presente; atributos 0o644; método 0 (armazenado); sistema Unix
+        corpo = _vint(0x04) + _vint(len(dados)) + _vint(0o100644) + struct.pack('<I', zlib.crc32(dados))
+        corpo += _vint(0) + _vint(1) + _vint(len(nome)) + nome
+        saida += cabecalho(_bloco_rar5(2, corpo, extra, len(cifrado))) + cifrado
+
+    saida += cabecalho(_bloco_rar5(5, _vint(0)))
+    with open(caminho, 'wb') as f:
+        f.write(saida)
+
+# -----------------------------------------------------------------------------
+# 7Z (PY7ZR)
+# -----------------------------------------------------------------------------
+def criar_7z(caminho: str, senha: str, num_entradas: int = 1, tamanho: int = 1024, metodo: str = 'lzma2',
+             conteudo: str = 'texto', semente: int = SEMENTE_PADRAO, cabecalho_cifrado: bool = True) -> None:
+    """7z com 7zAES; 'metodo' é 'lzma2' ou 'store' (coder Copy seguido do AES)."""
+    import py7zr
+
+    rng = random.Random(semente)
+    filtros = None
+    if metodo == 'store':
+        filtros = [{'id': py7zr.FILTER_COPY}, {'id': py7zr.FILTER_CRYPTO_AES256_SHA256}]
+    with py7zr.SevenZipFile(caminho, 'w', password=senha, filters=filtros) as archive:
+        archive.set_encrypted_header(cabecalho_cifrado)
+        for nome, dados in gerar_entradas(rng, num_entradas, tamanho, conteudo):
+            archive.writestr(dados, nome)
+
+# -----------------------------------------------------------------------------
+# CATÁLOGO DE FIXTURES
+# -----------------------------------------------------------------------------
+# Formato -> (tipo de arquivo, função de criação, extensão)
+FORMATOS = {
+    'zipcrypto': ('zip', criar_zip_zipcrypto, 'zip'),
+    'aes-zip': ('zip', criar_zip_aes, 'zip'),
+    'rar5': ('rar', criar_rar5, 'rar'),
+    '7z': ('7z', criar_7z, '7z')
+}
+
+# Métodos de compressão aceites por cada formato (o RAR5 só armazena)
+METODOS_FORMATO = {'zipcrypto': tuple(METODOS_ZIP), 'aes-zip': tuple(METODOS_ZIP), 'rar5': (), '7z': ('store', 'lzma2')}
+
+# Dependência opcional de cada formato (módulo a importar, nome a mostrar)
+DEPENDENCIAS = {
+    'aes-zip': ('Cryptodome', 'pycryptodomex'),
+    'rar5': ('Cryptodome', 'pycryptodomex'),
+    '7z': ('py7zr', 'py7zr')
+}
+
+# Conjunto usado pelos benchmarks: cada formato e variante, mais entradas grandes e múltiplas
+FIXTURES_PADRAO = [
+    {'nome': 'zip ZipCrypto', 'formato': 'zipcrypto'},
+    {'nome': 'zip ZipCrypto store', 'formato': 'zipcrypto', 'metodo': 'store'},
+    {'nome': 'zip ZipCrypto 1 MiB', 'formato': 'zipcrypto', 'tamanho': 1 << 20, 'conteudo': 'aleatorio', 'metodo': 'store'},
+    {'nome': 'zip ZipCrypto 100 entradas', 'formato': 'zipcrypto', 'num_entradas': 100},
+    {'nome': 'zip AES-256', 'formato': 'aes-zip'},
+    {'nome': 'zip AES-128 store', 'formato': 'aes-zip', 'forca': 1, 'metodo': 'store'},
+    {'nome': 'zip AES-256 1 MiB', 'formato': 'aes-zip', 'tamanho': 1 << 20, 'conteudo': 'aleatorio', 'metodo': 'store'},
+    {'nome': 'rar cabeçalho cifrado', 'formato': 'rar5', 'cabecalho_cifrado': True},
+    {'nome': 'rar cabeçalho simples', 'formato': 'rar5', 'cabecalho_cifrado': False},
+    {'nome': '7z cabeçalho cifrado', 'formato': '7z', 'cabecalho_cifrado': True},
+    {'nome': '7z cabeçalho simples', 'formato': '7z', 'cabecalho_cifrado': False}
+]
+
+def nome_ficheiro(especificacao: dict) -> str:
+    """Nome do ficheiro derivado da especificação (ex.: 'zip-aes-256-1-mib.zip')."""
+    base = unicodedata.normalize('NFKD', especificacao['nome'].lower()).encode('ascii', 'ignore').decode('ascii')
+    base = ''.join(c if c.isalnum() else '-' for c in base)
+    base = '-'.join(p for p in base.split('-') if p)
+    return f"{base}.{FORMATOS[especificacao['formato']][2]}"
+
+def criar_fixture(pasta: str, especificacao: dict, senha: str = SENHA_PADRAO) -> tuple[str, str, str]:
+    """Cria a fixture descrita por 'especificacao' em 'pasta'. Retorna (nome, tipo, caminho)."""
+    tipo, criar, _ = FORMATOS[especificacao['formato']]
+    parametros = {k: v for k, v in especificacao.items() if k not in ('nome', 'formato')}
+    caminho = os.path.join(pasta, nome_ficheiro(especificacao))
+    criar(caminho, senha, **parametros)
+    return (especificacao['nome'], tipo, caminho)
+
+def criar_fixtures(pasta: str, senha: str = SENHA_PADRAO, especificacoes: list[dict] | None = None) -> tuple[list, list]:
+    """Cria as fixtures possíveis neste sistema; retorna (nome, tipo, caminho) e os ignorados (nome, motivo)."""
+    fixtures = []
+    ignorados = []
+    for especificacao in especificacoes or FIXTURES_PADRAO:
+        modulo, pacote = DEPENDENCIAS.get(especificacao['formato'], (None, None))
+        try:
+            if modulo:
+                __import__(modulo)
+        except ImportError:
+            ignorados.append((especificacao['nome'], f"requer a biblioteca '{pacote}'"))
+            continue
+        fixtures.append(criar_fixture(pasta, especificacao, senha))
+    return fixtures, ignorados
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Gera os arquivos de teste dos benchmarks (determinísticos, sem ferramentas externas).")
+    parser.add_argument("pasta", help="Diretório onde os arquivos são criados.")
+    parser.add_argument("--password", default=SENHA_PADRAO, help=f"Senha dos arquivos (padrão: {SENHA_PADRAO}).")
+    parser.add_argument("--format", choices=list(FORMATOS), action='append', help="Gera só os formatos indicados (padrão: o conjunto dos benchmarks).")
+    parser.add_argument("--entries", type=int, help="Número de entradas de cada arquivo.")
+    parser.add_argument("--size", type=int, help="Tamanho de cada entrada, em bytes.")
+    parser.add_argument("--method", choices=['store', 'deflate', 'bzip2', 'lzma', 'lzma2'], help="Método de compressão (deflate, bzip2 e lzma só em zip, lzma2 só em 7z).")
+    parser.add_argument("--content", choices=CONTEUDOS, help="Conteúdo das entradas: texto compressível ou bytes aleatórios.")
+    parser.add_argument("--seed", type=int, default=SEMENTE_PADRAO, help=f"Semente do gerador (padrão: {SEMENTE_PADRAO}).")
+    args = parser.parse_args()
+
+    os.makedirs(args.pasta, exist_ok=True)
+    especificacoes = FIXTURES_PADRAO
+    if args.format or args.entries or args.size or args.method or args.content:
+        especificacoes = []
+        for formato in args.format or list(FORMATOS):
+            especificacao = {'nome': formato, 'formato': formato, 'semente': args.seed}
+            for chave, valor in (('num_entradas', args.entries), ('tamanho', args.size), ('metodo', args.method), ('conteudo', args.content)):
+                if valor is not None:
+                    especificacao[chave] = valor
+            if especificacao.get('metodo') not in METODOS_FORMATO[formato]:
+                especificacao.pop('metodo', None)
+            especificacoes.append(especificacao)
+    else:
+        especificacoes = [dict(e, semente=args.seed) for e in especificacoes]
+
+    fixtures, ignorados = criar_fixtures(args.pasta, args.password, especificacoes)
+    for nome, motivo in ignorados:
+        print(f"[INFO] Fixture '{nome}' ignorada: {motivo}.")
+    for nome, tipo, caminho in fixtures:
+        print(f"{nome:<28} {tipo:<4} {os.path.getsize(caminho):>10} bytes  {caminho}")
+    return 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -2,19 +2,29 @@
 
 import zipfile
 import time
-import itertools
 import string
 import argparse
-from tqdm import tqdm
 import os
 import multiprocessing
+import multiprocessing.pool
 import math
-import subprocess
 import json
 from datetime import datetime
 import copy
 import operator
-import rarfile
+import zlib
+import threading
+import itertools
+
+# O caminho crítico dos workers vive num módulo mínimo; tqdm, rarfile, subprocess e
+# http.server só são importados quando são realmente usados (ex.: '--help' não os carrega)
+import cracker_worker
+from cracker_worker import (
+    PasswordNotNeeded,
+    codificar_charset, ZIPCRYPTO_CHAVES_INICIAIS, zipcrypto_atualizar, zipcrypto_recuar,
+    ler_dados_entrada, zipcrypto_decifrar, descompressor_zip, VerificadorZipCrypto, carregar_metadados, KP_TAMANHO_MINIMO, KP_CONTIGUOS, KP_CABECALHO,
+    reduzir_chaves_z, AtaqueTextoClaro, texto_da_senha, exibir_senha, inicializar_worker, testar_intervalo, worker, worker_candidatas, worker_hibrido, worker_texto_claro,
+)
 
 # -----------------------------------------------------------------------------
 # CLASSE DEDICADA PARA GERIR SESSÕES
@@ -69,266 +79,744 @@ class SessionManager:
         except FileNotFoundError:
             pass
 
-# RAR_METHOD_TEST pode ser 'rarfile' ou 'subprocess'
-# 'subprocess' é mais robusto, mas depende do comando 'unrar' estar instalado
-# 'rarfile' é mais direto, mas pode ter problemas de concorrência em alguns sistemas
-RAR_METHOD_TEST = 'rarfile'
+# -----------------------------------------------------------------------------
+# CLASSE DEDICADA AO REGISTO DE COBERTURA DO ESPAÇO DE SENHAS
+# -----------------------------------------------------------------------------
+def impressao_digital(file_path: str, file_type: str) -> str:
+    """
+    Impressão digital do conteúdo cifrado do arquivo alvo, independente do caminho: a entrada
+    verificada no ZIP, ou o início do ficheiro no RAR. Vem da cache de metadados.
+    """
+    return carregar_metadados(file_path, file_type)['impressao']
+
+def _unir_intervalos(intervalos: list) -> list[list[int]]:
+    """Ordena e junta intervalos [a, b) sobrepostos ou contíguos."""
+    unidos = []
+    for a, b in sorted(intervalos):
+        if unidos and a <= unidos[-1][1]:
+            unidos[-1][1] = max(unidos[-1][1], b)
+        else:
+            unidos.append([a, b])
+    return unidos
+
+def _subtrair_intervalos(intervalos: list, cobertos: list) -> list[list[int]]:
+    """Remove de 'intervalos' (ordenados e disjuntos) os intervalos 'cobertos' (idem)."""
+    resultado = []
+    for a, b in intervalos:
+        for c, d in cobertos:
+            if d <= a or c >= b:
+                continue
+            if c > a:
+                resultado.append([a, c])
+            a = max(a, d)
+            if a >= b:
+                break
+        if a < b:
+            resultado.append([a, b])
+    return resultado
+
+class ProgressTracker:
+    """
+    Progresso exato de um espaço de índices testado por lotes que terminam fora de ordem:
+    a marca baixa (todos os índices abaixo dela estão testados) e os intervalos concluídos
+    acima dela, unidos. Na sessão fica em 'last_step' (a marca) e 'done_ranges'; ao retomar,
+    os lotes que estavam em curso são testados de novo e os concluídos nunca.
+    """
+    def __init__(self, marca: int = 0, concluidos: list | None = None):
+        self.marca = marca
+        self.concluidos = _unir_intervalos(concluidos or [])
+        self._avancar()
+
+    @classmethod
+    def da_sessao(cls, session_data: dict) -> 'ProgressTracker':
+        return cls(session_data.get('last_step', 0), session_data.get('done_ranges'))
+
+    def guardar(self, session_data: dict) -> None:
+        session_data['last_step'] = self.marca
+        session_data['done_ranges'] = [list(i) for i in self.concluidos]
+
+    def _avancar(self) -> None:
+        while self.concluidos and self.concluidos[0][0] <= self.marca:
+            self.marca = max(self.marca, self.concluidos.pop(0)[1])
+
+    def registar(self, inicio: int, fim: int) -> None:
+        """Marca [inicio, fim) como testado. Só há tantos intervalos soltos quantos lotes em curso."""
+        if fim > inicio:
+            self.concluidos = _unir_intervalos(self.concluidos + [[inicio, fim]])
+            self._avancar()
+
+    def testadas(self) -> int:
+        return self.marca + sum(b - a for a, b in self.concluidos)
+
+    def pendentes(self, inicio: int, fim: int) -> list[list[int]]:
+        """Intervalos de [inicio, fim) ainda por testar."""
+        inicio = max(inicio, self.marca)
+        return _subtrair_intervalos([[inicio, fim]], self.concluidos) if inicio < fim else []
+
+class CoverageLedger:
+    """
+    Regista as regiões do espaço de senhas já esgotadas (máscara + intervalos de índices),
+    indexadas pela impressão digital do arquivo. Ao contrário das sessões, vale para cópias
+    movidas do arquivo e para novas execuções com outros charsets ou comprimentos.
+    """
+    def __init__(self, filepath='cracker_coverage.json'):
+        self.filepath = filepath
+        self.entradas = self._load()
+        # Intervalos ainda não gravados: {(impressao, mascara): [[a, b], ...]}
+        self._novos = {}
+
+    def _load(self) -> dict:
+        """Carrega o registo do ficheiro JSON. Retorna um dict vazio se não existir."""
+        try:
+            with open(self.filepath, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
 
-# ZIP_METHOD_TEST pode ser 'zipfile' ou 'subprocess'
-# 'zipfile' é a biblioteca padrão do Python, mas pode ter problemas com alguns arquivos
-# 'subprocess' usa o comando 'unzip' do sistema, que pode ser mais robusto
-ZIP_METHOD_TEST = 'zipfile'
+    @staticmethod
+    def _chave(alfabetos: list[bytes]) -> tuple[str, ...]:
+        """Representação da máscara em JSON (um alfabeto por posição)."""
+        return tuple(a.decode('latin-1') for a in alfabetos)
+
+    def _regioes(self, impressao: str) -> list[dict]:
+        """Regiões conhecidas do arquivo, incluindo os intervalos ainda não gravados."""
+        regioes = {tuple(r['mascara']): list(r['intervalos']) for r in self.entradas.get(impressao, {}).get('regioes', [])}
+        for (imp, mascara), intervalos in self._novos.items():
+            if imp == impressao:
+                regioes[mascara] = regioes.get(mascara, []) + intervalos
+        return [{'mascara': list(m), 'intervalos': _unir_intervalos(i)} for m, i in regioes.items()]
+
+    def registar(self, impressao: str, alfabetos: list[bytes], inicio: int, fim: int) -> None:
+        """Marca o intervalo [inicio, fim) da máscara como esgotado (gravado no próximo 'salvar')."""
+        if fim > inicio:
+            self._novos.setdefault((impressao, self._chave(alfabetos)), []).append([inicio, fim])
+
+    def salvar(self, file_path: str | None = None) -> None:
+        """Junta os novos intervalos ao ficheiro (relido, para não perder outras execuções) e grava-o de forma atómica."""
+        if not self._novos:
+            return
+        atual = self._load()
+        for impressao in {imp for imp, _ in self._novos}:
+            regioes = {tuple(r['mascara']): r['intervalos'] for r in atual.get(impressao, {}).get('regioes', [])}
+            for (imp, mascara), intervalos in self._novos.items():
+                if imp == impressao:
+                    regioes[mascara] = _unir_intervalos(regioes.get(mascara, []) + intervalos)
+            entrada = atual.setdefault(impressao, {})
+            if file_path:
+                entrada['arquivo'] = os.path.abspath(file_path)
+            entrada['regioes'] = [{'mascara': list(m), 'intervalos': i} for m, i in regioes.items()]
+            entrada['last_update'] = datetime.now().isoformat()
 
-class PasswordNotNeeded(Exception):
-    """Exceção personalizada para indicar que o arquivo não precisa de senha."""
-    pass
+        temp_filepath = self.filepath + '.tmp'
+        with open(temp_filepath, 'w') as f:
+            json.dump(atual, f, indent=4)
+        os.replace(temp_filepath, self.filepath) # Operação atómica
+        self.entradas = atual
+        self._novos = {}
+
+    def pendentes(self, impressao: str, alfabetos: list[bytes]) -> list[tuple[list[bytes], int, int]]:
+        """
+        Divide o espaço da máscara em segmentos (máscara, inicio, fim) ainda por testar.
+        Intervalos da mesma máscara são subtraídos diretamente; regiões esgotadas de outras
+        máscaras do mesmo comprimento (ex.: um charset mais pequeno) são retiradas por
+        diferença de caixas: a caixa B menos a região R dá, para cada posição i, a caixa com
+        as posições anteriores em B∩R, a posição i em B\\R e as seguintes em B.
+        """
+        caixas = [(list(alfabetos), [[0, math.prod(len(a) for a in alfabetos)]])]
+        for regiao in self._regioes(impressao):
+            mascara = [m.encode('latin-1') for m in regiao['mascara']]
+            if len(mascara) != len(alfabetos):
+                continue
+            esgotada = regiao['intervalos'] == [[0, math.prod(len(m) for m in mascara)]]
+
+            novas = []
+            for caixa, intervalos in caixas:
+                if caixa == mascara:
+                    intervalos = _subtrair_intervalos(intervalos, regiao['intervalos'])
+                elif esgotada and intervalos == [[0, math.prod(len(a) for a in caixa)]]:
+                    comuns = [bytes(c for c in a if c in m) for a, m in zip(caixa, mascara)]
+                    if all(comuns):
+                        for i in range(len(caixa)):
+                            resto = bytes(c for c in caixa[i] if c not in mascara[i])
+                            if resto:
+                                sub = comuns[:i] + [resto] + caixa[i + 1:]
+                                novas.append((sub, [[0, math.prod(len(a) for a in sub)]]))
+                        continue
+                if intervalos:
+                    novas.append((caixa, intervalos))
+            caixas = novas
+
+        return [(caixa, a, b) for caixa, intervalos in caixas for a, b in intervalos]
+
+# -----------------------------------------------------------------------------
+# CLASSE DEDICADA PARA EXPORTAR MÉTRICAS
+# -----------------------------------------------------------------------------
+class MetricsExporter:
+    """
+    Expõe as métricas do ataque em curso num ficheiro JSON escrito periodicamente
+    e/ou num endpoint HTTP local no formato de texto do Prometheus.
+    """
+    def __init__(self, json_path: str | None = None, port: int | None = None, interval: float = 5.0):
+        self.json_path = json_path
+        self.port = port
+        self.interval = interval
+        self.session_data = None
+        self.inicio = time.perf_counter()
+        self.tentativas = 0
+        self.tentativas_por_worker = {}
+        self.estagios = {'header': 0, 'final': 0}
+        self.checkpoints = 0
+        self.checkpoint_ultimo = 0.0
+        self.checkpoint_total = 0.0
+        self.checkpoint_max = 0.0
+        self.comprimento = None
+        self.indice = 0
+        self.fase = None
+        self.total_fase = None
+        self.taxa_recente = 0.0
+        self._amostra = (self.inicio, 0)  # (instante, tentativas) da última amostra
+        self._parar = threading.Event()
+        self._thread = None
+        self._servidor = None
+
+    def iniciar(self, session_data: dict) -> None:
+        """Associa a sessão e arranca o escritor JSON e/ou o servidor HTTP."""
+        self.session_data = session_data
+        self.inicio = time.perf_counter()
+        self._amostra = (self.inicio, self.tentativas)
+
+        if self.port is not None:
+            import http.server
+            exporter = self
+
+            class _Handler(http.server.BaseHTTPRequestHandler):
+                def do_GET(self):
+                    if self.path.split('?')[0] not in ('/', '/metrics'):
+                        self.send_error(404)
+                        return
+                    corpo = exporter.prometheus().encode('utf-8')
+                    self.send_response(200)
+                    self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                    self.send_header('Content-Length', str(len(corpo)))
+                    self.end_headers()
+                    self.wfile.write(corpo)
+
+                def log_message(self, *args):
+                    pass # Não polui a saída do tqdm
+
+            self._servidor = http.server.ThreadingHTTPServer(('127.0.0.1', self.port), _Handler)
+            self._servidor.daemon_threads = True
+            threading.Thread(target=self._servidor.serve_forever, daemon=True).start()
+            print(f"[INFO] Métricas Prometheus disponíveis em http://127.0.0.1:{self.port}/metrics")
+
+        self._thread = threading.Thread(target=self._ciclo, daemon=True)
+        self._thread.start()
+
+    def parar(self) -> None:
+        """Escreve o estado final e encerra as threads auxiliares."""
+        self._parar.set()
+        if self._thread:
+            self._thread.join()
+        self._atualizar_taxa()
+        self._escrever_json()
+        if self._servidor:
+            self._servidor.shutdown()
+            self._servidor.server_close()
+
+    def iniciar_comprimento(self, comprimento: int, indice: int = 0) -> None:
+        """Indica o comprimento em teste e a posição inicial dentro dele."""
+        self.comprimento = comprimento
+        self.indice = indice
+
+    def iniciar_fase(self, fase: int, total: int, indice: int = 0) -> None:
+        """Modo de plano: o espaço de chaves passa a ser o da fase em curso."""
+        self.fase = fase
+        self.total_fase = total
+        self.indice = indice
+
+    def registar_lote(self, n: int, cabecalho: int, final: int, worker=None) -> None:
+        """Regista um lote de 'n' senhas testadas por um worker e os estágios atingidos."""
+        self.tentativas += n
+        self.indice += n
+        if worker is not None:
+            self.tentativas_por_worker[worker] = self.tentativas_por_worker.get(worker, 0) + n
+        self.estagios['header'] += cabecalho
+        self.estagios['final'] += final
+
+    def registar_checkpoint(self, duracao: float) -> None:
+        """Regista a latência (em segundos) de um salvamento da sessão."""
+        self.checkpoints += 1
+        self.checkpoint_ultimo = duracao
+        self.checkpoint_total += duracao
+        self.checkpoint_max = max(self.checkpoint_max, duracao)
+
+    def _atualizar_taxa(self) -> None:
+        agora = time.perf_counter()
+        instante, tentativas = self._amostra
+        if agora > instante:
+            self.taxa_recente = (self.tentativas - tentativas) / (agora - instante)
+        self._amostra = (agora, self.tentativas)
+
+    def _ciclo(self) -> None:
+        while not self._parar.wait(self.interval):
+            self._atualizar_taxa()
+            self._escrever_json()
+
+    def snapshot(self) -> dict:
+        """Calcula as métricas atuais a partir da sessão e dos contadores."""
+        session_data = self.session_data or {}
+        decorrido = time.perf_counter() - self.inicio
+        taxa_media = self.tentativas / decorrido if decorrido > 0 else 0.0
+
+        # Posição no espaço de chaves, contada desde o comprimento mínimo da sessão
+        total = posicao = 0
+        charset = session_data.get('charset')
+        if self.total_fase is not None:
+            total = self.total_fase
+            posicao = min(total, self.indice)
+        elif charset:
+            n = len(charset)
+            min_len = session_data['min_len']
+            comprimento = self.comprimento or session_data['current_len']
+            total = sum(n ** i for i in range(min_len, session_data['max_len'] + 1))
+            posicao = min(total, sum(n ** i for i in range(min_len, comprimento)) + self.indice)
+
+        taxa = self.taxa_recente or taxa_media
+        eta = (total - posicao) / taxa if taxa > 0 else None
+
+        return {
+            'target_file': session_data.get('target_file'),
+            'status': session_data.get('status'),
+            'elapsed_seconds': decorrido,
+            'attempts_total': self.tentativas,
+            'rate_total': taxa_media,
+            'rate_recent': self.taxa_recente,
+            'rate_per_worker': {str(w): c / decorrido if decorrido > 0 else 0.0 for w, c in self.tentativas_por_worker.items()},
+            'attempts_per_worker': {str(w): c for w, c in self.tentativas_por_worker.items()},
+            'current_len': self.comprimento or session_data.get('current_len'),
+            'plan_phase': self.fase,
+            'keyspace_position': posicao,
+            'keyspace_total': total,
+            'eta_seconds': eta,
+            'stage_passes': dict(self.estagios),
+            'checkpoints_total': self.checkpoints,
+            'checkpoint_last_seconds': self.checkpoint_ultimo,
+            'checkpoint_max_seconds': self.checkpoint_max,
+            'checkpoint_avg_seconds': self.checkpoint_total / self.checkpoints if self.checkpoints else 0.0,
+            'last_update': datetime.now().isoformat()
+        }
+
+    def prometheus(self) -> str:
+        """Formata o snapshot atual no formato de texto do Prometheus."""
+        m = self.snapshot()
+        alvo = (m['target_file'] or '').replace('\\', '\\\\').replace('"', '\\"')
+        rotulo = f'target="{alvo}"'
+        linhas = []
+
+        def metrica(nome, tipo, ajuda, valores):
+            linhas.append(f"# HELP {nome} {ajuda}")
+            linhas.append(f"# TYPE {nome} {tipo}")
+            for extra, valor in valores:
+                rotulos = rotulo + (',' + extra if extra else '')
+                linhas.append(f"{nome}{{{rotulos}}} {valor}")
+
+        metrica('cracker_attempts_total', 'counter', 'Senhas testadas nesta execução.', [('', m['attempts_total'])])
+        metrica('cracker_rate', 'gauge', 'Taxa média de senhas por segundo.', [('', f"{m['rate_total']:.3f}")])
+        metrica('cracker_rate_recent', 'gauge', 'Taxa de senhas por segundo no último intervalo.', [('', f"{m['rate_recent']:.3f}")])
+        metrica('cracker_worker_attempts_total', 'counter', 'Senhas testadas por worker.',
+                [(f'worker="{w}"', c) for w, c in m['attempts_per_worker'].items()])
+        metrica('cracker_worker_rate', 'gauge', 'Taxa média de senhas por segundo por worker.',
+                [(f'worker="{w}"', f"{r:.3f}") for w, r in m['rate_per_worker'].items()])
+        metrica('cracker_current_length', 'gauge', 'Comprimento de senha em teste.', [('', m['current_len'] or 0)])
+        metrica('cracker_plan_phase', 'gauge', 'Fase do plano de ataque em curso (0 fora do modo de plano).', [('', m['plan_phase'] or 0)])
+        metrica('cracker_keyspace_position', 'gauge', 'Posição atual no espaço de chaves.', [('', m['keyspace_position'])])
+        metrica('cracker_keyspace_total', 'gauge', 'Tamanho total do espaço de chaves.', [('', m['keyspace_total'])])
+        metrica('cracker_eta_seconds', 'gauge', 'Tempo estimado até esgotar o espaço de chaves.',
+                [('', f"{m['eta_seconds']:.1f}" if m['eta_seconds'] is not None else 'NaN')])
+        metrica('cracker_stage_passes_total', 'counter', 'Candidatas que passaram cada estágio do verificador.',
+                [(f'stage="{e}"', c) for e, c in m['stage_passes'].items()])
+        metrica('cracker_checkpoints_total', 'counter', 'Salvamentos de sessão efetuados.', [('', m['checkpoints_total'])])
+        metrica('cracker_checkpoint_seconds', 'gauge', 'Latência dos salvamentos de sessão.',
+                [('stat="last"', f"{m['checkpoint_last_seconds']:.6f}"),
+                 ('stat="avg"', f"{m['checkpoint_avg_seconds']:.6f}"),
+                 ('stat="max"', f"{m['checkpoint_max_seconds']:.6f}")])
+        metrica('cracker_found', 'gauge', 'Indica se a senha já foi encontrada.', [('', int(m['status'] == 'found'))])
+
+        return "\n".join(linhas) + "\n"
+
+    def _escrever_json(self) -> None:
+        """Escreve o snapshot no ficheiro JSON de forma atómica."""
+        if not self.json_path:
+            return
+        temp_filepath = self.json_path + '.tmp'
+        with open(temp_filepath, 'w') as f:
+            json.dump(self.snapshot(), f, indent=4)
+        os.replace(temp_filepath, self.json_path) # Operação atómica
+
+def salvar_checkpoint(session_manager: SessionManager, file_path: str, session_data: dict, metrics: MetricsExporter | None = None, cobertura: CoverageLedger | None = None) -> None:
+    """Salva a sessão (e o registo de cobertura) e regista a latência do salvamento nas métricas."""
+    inicio = time.perf_counter()
+    session_manager.update_session(file_path, session_data)
+    if cobertura:
+        cobertura.salvar(file_path)
+    if metrics:
+        metrics.registar_checkpoint(time.perf_counter() - inicio)
 
 # Função para criar um arquivo de teste ZIP/RAR com senha
 def criar_arquivo_teste(file_path, senha, type='zip'):
-    """Cria um arquivo rar de teste com senha."""
+    """Cria um arquivo zip (ZipCrypto) ou rar (RAR5, cabeçalhos cifrados) de teste com senha, sem ferramentas externas."""
     if os.path.exists(file_path):
         return
 
     print(f"Criando arquivo de teste '{file_path}' com senha {senha}...")
 
-    text_file = 'documento.txt'
-
-    with open(text_file, "w") as f:
-        f.write("Este é um teste de conteúdo para o benchmark.")
-
+    from cracker_fixtures import criar_zip_zipcrypto, criar_rar5
     try:
-        # Usa processo para criar o arquivo com senha
         if type == 'zip':
-            command = ['zip', '-P', senha, '-j', file_path, text_file]
+            criar_zip_zipcrypto(file_path, senha)
         else:
-            command = ['rar', 'a', f'-hp{senha}', '-y', file_path, text_file]
-
-        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            criar_rar5(file_path, senha, cabecalho_cifrado=True)
 
         print("Arquivo de teste criado.\n")
     except Exception as e:
         print(f"Erro ao criar arquivo de teste: {e}")
-    finally:
-        if os.path.exists(text_file):
-            os.remove(text_file)
 
-# Testar senha RAR usando subprocess para evitar problemas de concorrência
-def testar_senha_rar_subprocess(file_path: str, senha: str) -> bool:
-    """Usa o método 'subprocess' para testar arquivos RAR. Certifique-se de que o comando 'unrar' está instalado."""
-    command = ['unrar', 't', f'-p{senha}', '-y', file_path]
-    try:
-        # Caso seja a primeira execução, verifica se o arquivo precisa de senha
-        # Não funciona como esperado, cada nova chamada ao método o atribituo é resetado
-        if (not getattr(testar_senha_rar_subprocess, 'first_run_done', False)):
-            command =  ['unrar', 't', '-y', file_path]
-            resultado = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-            if resultado.returncode == 0:
-                raise PasswordNotNeeded
-            testar_senha_rar_subprocess.first_run_done = True
-        resultado = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-        return resultado.returncode == 0
-    except PasswordNotNeeded:
-        raise PasswordNotNeeded(f'[INFO] O arquivo {file_path} não precisa de senha.')
-    except Exception as e:
-        if not getattr(testar_senha_rar_subprocess, 'has_printed_error', False):
-            testar_senha_rar_subprocess.has_printed_error = True
-            print(f"\n[ERRO] Ocorreu um erro ao testar o arquivo {file_path}! ({type(e).__name__}:  {str(e)}).")
-            exit(1)
-        return False
-
-# Testar senha RAR usando a biblioteca rarfile
-def testar_senha_rar_rarfile(file_path: str, senha: str) -> bool:
-    try:
-        # print(f"Testando senha RAR com rarfile: {senha}")
-        with rarfile.RarFile(file_path, 'r') as rf:
-            needs_password = rf.needs_password()
-            if not needs_password:
-                raise PasswordNotNeeded
-            rf.setpassword(senha)
-            rf.testrar()
-        return True
-    except rarfile.NoCrypto:
-        return needs_password
-    except rarfile.RarWrongPassword:
-        # print(f"Senha incorreta: {senha}")
-        return False
-    except PasswordNotNeeded:
-        raise PasswordNotNeeded(f'[INFO] O arquivo {file_path} não precisa de senha.')
-    except Exception as e:
-        # if not getattr(testar_senha_rar_rarfile, 'has_printed_error', False):
-            # testar_senha_rar_rarfile.has_printed_error = True
-        print(f"\n[ERRO] Ocorreu um erro ao testar o arquivo {file_path}! ({type(e).__name__}:  {str(e)}).")
-        return False
-
-# Função wrapper para escolher o método de teste RAR
-def testar_senha_rar(file_path: str, senha: str) -> bool:
-    if RAR_METHOD_TEST == 'subprocess':
-        return testar_senha_rar_subprocess(file_path, senha)
-    else:
-        return testar_senha_rar_rarfile(file_path, senha)
+def preparar_texto_claro(file_path: str, texto_claro: bytes, offset: int = 0, entrada: str | None = None) -> dict:
+    """
+    Prepara os dados do ataque: escolhe a entrada ZipCrypto (por omissão a primeira),
+    lê os bytes cifrados e calcula o keystream na zona do texto claro conhecido.
+    O 'offset' é relativo aos dados da entrada tal como estão no arquivo (comprimidos).
+    """
+    with zipfile.ZipFile(file_path, 'r') as zf:
+        if entrada:
+            info = zf.getinfo(entrada)
+        else:
+            info = next((i for i in zf.infolist() if VerificadorZipCrypto.suporta(i)), None)
 
-# Testar senha ZIP usando subprocess para evitar problemas de concorrência
-def testar_senha_zip_subprocess(file_path: str, senha: str) -> bool:
-    command = ['unzip', '-t', '-P', senha, file_path]
-    try:
-        resultado = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
-        return resultado.returncode == 0
-    except Exception as e:
-        if not getattr(testar_senha_zip_subprocess, 'has_printed_error', False):
-            testar_senha_zip_subprocess.has_printed_error = True
-            print(f"\n[ERRO] Ocorreu um erro ao testar o arquivo {file_path}! ({type(e).__name__}:  {str(e)}).")
-            exit(1)
-        return False
-
-# Testar senha ZIP usando a biblioteca zipfile
-def testar_senha_zip_zipfile(file_path: str, senha: str) -> bool:
+    if info is None or not VerificadorZipCrypto.suporta(info):
+        raise ValueError("Nenhuma entrada cifrada com ZipCrypto encontrada no arquivo.")
+    if len(texto_claro) < KP_TAMANHO_MINIMO:
+        raise ValueError(f"São necessários pelo menos {KP_TAMANHO_MINIMO} bytes contíguos de texto claro.")
+    if offset < 0 or offset + len(texto_claro) > info.compress_size - KP_CABECALHO:
+        raise ValueError(f"O texto claro (offset {offset}, {len(texto_claro)} bytes) excede os dados da entrada '{info.filename}'.")
+
+    offset += KP_CABECALHO
+    cifrado = ler_dados_entrada(file_path, info, offset + len(texto_claro))
+    keystream = bytes(p ^ cifrado[offset + i] for i, p in enumerate(texto_claro))
+    return {'entrada': info.filename, 'cifrado': cifrado, 'texto_claro': texto_claro, 'offset': offset, 'keystream': keystream}
+
+def decifrar_arquivo_com_chaves(file_path: str, chaves: tuple[int, int, int], destino: str, saida=None) -> list[str]:
+    """
+    Decifra com as chaves internas (estado derivado da senha) todas as entradas ZipCrypto
+    que as partilham e extrai-as para 'destino'. Retorna os nomes extraídos.
+    """
+    extraidos = []
+    with zipfile.ZipFile(file_path, 'r') as zf:
+        for info in zf.infolist():
+            if info.is_dir():
+                continue
+
+            dados = ler_dados_entrada(file_path, info)
+            if VerificadorZipCrypto.suporta(info):
+                dados = zipcrypto_decifrar(chaves, dados)[0][KP_CABECALHO:]
+            elif info.flag_bits & 0x01:
+                print(f"[INFO] Entrada '{info.filename}' ignorada (encriptação não suportada).", file=saida)
+                continue
+
+            try:
+                descompressor = descompressor_zip(info.compress_type)
+            except ValueError as e:
+                print(f"[ERRO] Entrada '{info.filename}' não extraída: {e}", file=saida)
+                continue
+
+            try:
+                if descompressor:
+                    dados = descompressor.decompress(dados)
+                    if hasattr(descompressor, 'flush'):
+                        dados += descompressor.flush()
+                if zlib.crc32(dados) != info.CRC:
+                    raise zipfile.BadZipFile("CRC incorreto")
+            except Exception as e:
+                # Entrada cifrada com outra senha (ou corrompida)
+                print(f"[INFO] Entrada '{info.filename}' não pôde ser decifrada com estas chaves ({type(e).__name__}: {e}).", file=saida)
+                continue
+
+            # Evita caminhos fora do destino
+            nome = os.path.normpath(info.filename).lstrip(os.sep)
+            if nome.startswith('..'):
+                continue
+            caminho = os.path.join(destino, nome)
+            os.makedirs(os.path.dirname(caminho) or destino, exist_ok=True)
+            with open(caminho, 'wb') as f:
+                f.write(dados)
+            extraidos.append(info.filename)
+
+    return extraidos
+
+def _percorrer_estados(estado: tuple[int, int, int], alfabeto: bytes, profundidade: int, passo):
+    """Gera (caracteres, estado) para todas as sequências de 'profundidade' caracteres."""
+    if profundidade == 0:
+        yield b'', estado
+        return
+    for c in alfabeto:
+        for resto, final in _percorrer_estados(passo(estado, c), alfabeto, profundidade - 1, passo):
+            yield bytes((c,)) + resto, final
+
+def inverter_chaves(chaves: tuple[int, int, int], charset: str, min_len: int, max_len: int, limite_tabela: int = 1 << 21) -> str | None:
+    """
+    Procura uma senha do charset cujas chaves internas sejam 'chaves', por encontro a
+    meio caminho: os prefixos são calculados para a frente a partir das chaves iniciais
+    e os sufixos para trás a partir das chaves recuperadas. Adequado para senhas curtas.
+    """
+    alfabeto = codificar_charset(charset)
+    chaves = tuple(chaves)
+    for comprimento in range(min_len, max_len + 1):
+        metade = comprimento // 2
+        while metade > 0 and len(alfabeto) ** metade > limite_tabela:
+            metade -= 1
+
+        tabela = {estado: prefixo for prefixo, estado in _percorrer_estados(ZIPCRYPTO_CHAVES_INICIAIS, alfabeto, metade, zipcrypto_atualizar)}
+        for sufixo, estado in _percorrer_estados(chaves, alfabeto, comprimento - metade, zipcrypto_recuar):
+            prefixo = tabela.get(estado)
+            if prefixo is not None:
+                # Os sufixos são gerados do último caractere para o primeiro
+                return texto_da_senha(prefixo + sufixo[::-1])
+    return None
+
+# Método de arranque dos processos do pool: None usa o padrão da plataforma
+# ('fork' no Linux); 'forkserver' e 'spawn' são mais seguros, mas arrancam mais devagar
+POOL_START_METHOD = None
+
+# Motor do modo paralelo: 'auto' usa threads quando o verificador do arquivo passa o tempo
+# na derivação de chave (AES-zip, RAR5, 7z), que o hashlib executa sem o GIL
+MOTOR_PARALELO = 'auto'
+
+# Colocação dos workers nos CPUs (ver 'cracker_worker.planear_afinidade'): 'none' deixa
+# o escalonador decidir; 'cores' e 'threads' fixam cada worker a um CPU
+AFINIDADE = 'none'
+
+def usar_threads(file_path: str, file_type: str, motor: str | None = None) -> bool:
+    """Decide entre o pool de threads e o de processos para o arquivo alvo ('motor' substitui MOTOR_PARALELO)."""
+    motor = motor or MOTOR_PARALELO
+    if motor != 'auto':
+        return motor == 'threads'
     try:
-        with zipfile.ZipFile(file_path, 'r') as zf:
-            zf.read(zf.infolist()[0].filename, pwd=senha.encode('utf-8'))
-            return True
+        return cracker_worker.liberta_gil(file_path, file_type)
     except Exception:
-        return False
+        return False # O erro será reportado na primeira tarefa
 
-# Função wrapper para escolher o método de teste ZIP
-def testar_senha_zip(file_path: str, senha: str) -> bool:
-    if ZIP_METHOD_TEST == 'subprocess':
-        return testar_senha_zip_subprocess(file_path, senha)
-    else:
-        return testar_senha_zip_zipfile(file_path, senha)
-
-# O worker agora é muito mais simples.
-# Ele recebe UMA tarefa e retorna o resultado.
-def worker(task_args) -> tuple[bool, str | None]:
-    # time.sleep(0.01)
+def criar_pool(num_workers: int, file_path: str | None = None, file_type: str | None = None, threads: bool = False,
+               afinidade: str | None = None, verificador: str | None = None) -> multiprocessing.pool.Pool:
     """
-    Worker que testa UMA senha e retorna se foi bem-sucedido.
+    Cria o pool de workers persistente, reutilizado entre comprimentos e configurações.
+    O sinal de paragem partilhado fica acessível em 'pool.sinal_parada'. Com 'threads' o pool
+    é de threads do processo principal, que partilham o estado já carregado do arquivo.
+    Com 'afinidade' (por omissão AFINIDADE) cada worker fixa-se, ao arrancar, ao CPU seguinte
+    do plano; 'verificador' (por omissão o imposto à thread atual) é imposto aos workers.
     """
-    file_path, file_type, senha = task_args
-    senha_correta = False
+    contexto = multiprocessing.get_context(POOL_START_METHOD)
+    if contexto.get_start_method() == 'forkserver' and not threads:
+        # O servidor importa só o módulo mínimo dos workers, uma única vez
+        contexto.set_forkserver_preload(['cracker_worker'])
 
-    if file_type == 'zip':
+    # Valor em memória partilhada sem lock: a leitura nos workers é praticamente gratuita
+    sinal_parada = contexto.RawValue('b', 0)
+
+    # Os workers recebem os metadados já carregados: nenhum volta a ler o diretório central
+    metadados = None
+    if file_path:
         try:
-            # Reabre o ficheiro aqui para segurança entre processos
-            with zipfile.ZipFile(file_path, 'r') as zf:
-                zf.read(zf.infolist()[0].filename, pwd=senha.encode('utf-8'))
-                senha_correta = True
+            metadados = carregar_metadados(file_path, file_type)
         except Exception:
-            pass
-    elif file_type == 'rar':
-        senha_correta = testar_senha_rar(file_path, senha)
+            pass # O erro será reportado na primeira tarefa
+
+    # Plano de CPUs e contador partilhado com que cada worker obtém a sua posição no plano
+    plano = cracker_worker.planear_afinidade(num_workers, afinidade or AFINIDADE)
+    afinidade = (plano, contexto.Value('i', 0)) if plano else None
 
-    return (True, senha) if senha_correta else (False, senha)
+    initargs = (file_path, file_type, sinal_parada, verificador or cracker_worker.verificador_imposto(), metadados, afinidade)
+    if threads:
+        pool = multiprocessing.pool.ThreadPool(processes=num_workers, initializer=inicializar_worker, initargs=initargs)
+    else:
+        pool = contexto.Pool(processes=num_workers, initializer=inicializar_worker, initargs=initargs)
+    pool.sinal_parada = sinal_parada
+    pool.threads = threads
+    return pool
+
+# Divide o intervalo de índices em lotes; deixa de produzir assim que o sinal de paragem é ativado
+def gerar_lotes(inicio: int, fim: int, tamanho: int, sinal_parada):
+    for a in range(inicio, fim, tamanho):
+        if sinal_parada.value:
+            return
+        yield (a, min(a + tamanho, fim))
+
+def planear_segmentos(cobertura: CoverageLedger | None, impressao: str | None, alfabetos: list[bytes], progresso: ProgressTracker, session_data: dict) -> list[tuple[list[bytes], int, int, int]]:
+    """
+    Segmentos (máscara, inicio, fim, deslocamento) a testar num comprimento: o espaço completo
+    menos o que o registo de cobertura já dá como esgotado e menos o progresso da sessão.
+    Quando o registo divide a máscara em caixas de outras máscaras, as caixas ficam na sessão
+    ('coverage_boxes') e o progresso conta-se nelas postas em sequência: o índice de cada caixa
+    mais o 'deslocamento'. A retoma usa as caixas guardadas, com ou sem o registo.
+    """
+    total = math.prod(len(a) for a in alfabetos)
+    caixas = session_data.get('coverage_boxes')
+    if caixas is not None:
+        segmentos = [([m.encode('latin-1') for m in c['mascara']], c['inicio'], c['fim']) for c in caixas]
+    else:
+        segmentos = cobertura.pendentes(impressao, alfabetos) if cobertura else [(alfabetos, 0, total)]
+        if any(m != alfabetos for m, _, _ in segmentos):
+            if progresso.marca or progresso.concluidos:
+                # O progresso guardado conta na máscara original: não é reinterpretado nas caixas
+                segmentos = [(alfabetos, 0, total)]
+            else:
+                caixas = session_data['coverage_boxes'] = [{'mascara': list(CoverageLedger._chave(m)), 'inicio': a, 'fim': b} for m, a, b in segmentos]
+
+    if caixas is None:
+        return [(m, x, y, 0) for m, a, b in segmentos for x, y in progresso.pendentes(a, b)]
+    planeados = []
+    base = 0
+    for m, a, b in segmentos:
+        deslocamento = base - a
+        planeados.extend((m, x - deslocamento, y - deslocamento, deslocamento) for x, y in progresso.pendentes(base, base + b - a))
+        base += b - a
+    return planeados
 
 # Testa senhas de forma sequencial
 # A função agora aceita 'session_manager' e 'session_data'
-def testar_senha_sequencial(session_manager: SessionManager, session_data: dict, testing: bool = False) -> None:
+def testar_senha_sequencial(session_manager: SessionManager, session_data: dict, testing: bool = False, metrics: MetricsExporter | None = None, cobertura: CoverageLedger | None = None,
+                            saida=None, barras: bool = True) -> None:
+    from tqdm import tqdm
     file_path = session_data['target_file']
     file_type = session_data['file_type']
     min_len = session_data['current_len']
     max_len = session_data['max_len']
     charset = session_data['charset']
-    start_step = session_data['last_step']
 
-    print("Modo de execução: Sequencial (single-thread)")
+    print("Modo de execução: Sequencial (single-thread)", file=saida)
     inicio = time.perf_counter()
     tentativas_totais = 0
     senha_correta = False
+    senha = None
     SAVE_INTERVAL = 1000 # Salva o progresso a cada 1000 tentativas no modo sequencial
+    BLOCO = 100 # Senhas testadas entre atualizações da barra de progresso
 
     try:
-        archive_zip = None
-        first_file_zip = None
         if file_type == 'zip':
-            archive_zip = zipfile.ZipFile(file_path, 'r')
-            if not archive_zip.infolist():
-                print("\n[ERRO] O arquivo ZIP está vazio.")
+            # Usa a cache de metadados em vez de reler o diretório central
+            if not carregar_metadados(file_path, file_type)['total_entradas']:
+                print("\n[ERRO] O arquivo ZIP está vazio.", file=saida)
                 return
-            first_file_zip = archive_zip.infolist()[0]
+
+        alfabeto = codificar_charset(charset)
+        impressao = impressao_digital(file_path, file_type) if cobertura else None
+        progresso = ProgressTracker.da_sessao(session_data)
 
         for comprimento in range(min_len, max_len + 1):
             if senha_correta: break
 
             session_data['current_len'] = comprimento
+            alfabetos = [alfabeto] * comprimento
             total_combinacoes = len(charset) ** comprimento
-            combinacoes = itertools.product(charset, repeat=comprimento)
-
-            # Lógica para saltar para o 'step' inicial
-            initial_step = 0
-            if start_step > 0 and comprimento == min_len:
-                print(f"Saltando para o laço inicial {start_step}...\n")
-                combinacoes = itertools.islice(combinacoes, start_step, None)
-                initial_step = start_step
 
-            print(f"\nIniciando testes para senhas de {comprimento} caractere(s)...\n")
+            # Lógica para saltar para o 'step' inicial (o odómetro posiciona-se diretamente no índice)
+            if comprimento != min_len:
+                progresso = ProgressTracker()
+                session_data['coverage_boxes'] = None
+            elif progresso.marca > 0 or progresso.concluidos:
+                print(f"Saltando para o laço inicial {progresso.marca}" + (f" ({len(progresso.concluidos)} intervalo(s) já concluído(s) acima dele)...\n" if progresso.concluidos else "...\n"), file=saida)
+            progresso.guardar(session_data)
 
-            # A barra de progresso agora usa o parâmetro 'initial'
-            for combinacao in tqdm(combinacoes, total=total_combinacoes, desc=f"Testando {comprimento} caracteres(s)", unit="pwd", initial=initial_step, dynamic_ncols=True):
-                senha = "".join(combinacao)
-                tentativas_totais += 1
-                senha_correta = False
-
-                session_data['last_password'] = senha
-
-                # Salvamento periódico
-                if not testing and (tentativas_totais > 0 and tentativas_totais % SAVE_INTERVAL == 0):
-                    session_data['last_step'] = tentativas_totais
-                    session_data['last_update'] = datetime.now().isoformat()
-                    session_manager.update_session(file_path, session_data)
+            segmentos = planear_segmentos(cobertura, impressao, alfabetos, progresso, session_data)
+            ja_testadas = total_combinacoes - sum(b - a for _, a, b, _ in segmentos)
+            if cobertura and ja_testadas > progresso.testadas():
+                print(f"[INFO] Registo de cobertura: {ja_testadas} de {total_combinacoes} senhas de {comprimento} caractere(s) já testadas, serão saltadas.", file=saida)
+            proximo_salvamento = ja_testadas + SAVE_INTERVAL
 
-                if file_type == 'zip':
-                    try:
-                        archive_zip.read(first_file_zip.filename, pwd=senha.encode('utf-8'))
-                        senha_correta = True
-                    except Exception:
-                        pass
-                elif file_type == 'rar':
-                    senha_correta = testar_senha_rar(file_path, senha)
+            if metrics:
+                metrics.iniciar_comprimento(comprimento, ja_testadas)
 
-                if senha_correta:
-                    break
+            print(f"\nIniciando testes para senhas de {comprimento} caractere(s)...\n", file=saida)
 
-            # Reseta o start_step para o próximo comprimento de senha
-            start_step = 0
+            # A barra de progresso agora usa o parâmetro 'initial'
+            # Testa cada segmento em blocos de índices, com o mesmo verificador usado pelos workers
+            with tqdm(total=total_combinacoes, desc=f"Testando {comprimento} caracteres(s)", unit="pwd", initial=ja_testadas, dynamic_ncols=True, disable=not barras) as pbar:
+                for mascara, inicio_segmento, fim_segmento, deslocamento in segmentos:
+                    indice = registado = inicio_segmento
+                    while indice < fim_segmento:
+                        encontrada, testadas, passaram, ultima = testar_intervalo(file_path, file_type, mascara, indice, min(indice + BLOCO, fim_segmento))
+                        tentativas_totais += testadas
+                        pbar.update(testadas)
+
+                        if metrics:
+                            metrics.registar_lote(testadas, passaram, int(encontrada is not None), os.getpid())
+
+                        if encontrada:
+                            senha_correta = True
+                            senha = encontrada
+                            break
+
+                        indice += testadas
+                        session_data['last_password'] = ultima
+
+                        # Salvamento periódico ('last_step' é o índice da próxima senha a testar)
+                        if not testing and pbar.n >= proximo_salvamento:
+                            proximo_salvamento = pbar.n + SAVE_INTERVAL
+                            progresso.registar(registado + deslocamento, indice + deslocamento)
+                            progresso.guardar(session_data)
+                            if cobertura:
+                                cobertura.registar(impressao, mascara, registado, indice)
+                            registado = indice
+                            session_data['last_update'] = datetime.now().isoformat()
+                            salvar_checkpoint(session_manager, file_path, session_data, metrics, cobertura)
+
+                    progresso.registar(registado + deslocamento, indice + deslocamento)
+                    if cobertura:
+                        cobertura.registar(impressao, mascara, registado, indice)
+                    if senha_correta:
+                        break
 
         fim = time.perf_counter()
         total_time = fim - inicio
         rate = tentativas_totais / total_time if total_time > 0 else 0
 
         # Atualiza o estado final da sessão
-        session_data['last_step'] = tentativas_totais
+        progresso.guardar(session_data)
         session_data['last_update'] = datetime.now().isoformat()
 
-        print("\n" + "-" * 50)
+        print("\n" + "-" * 50, file=saida)
 
         if senha_correta:
             session_data['status'] = 'found'
             session_data['found_password'] = senha
 
-            print(f"\n[SUCESSO] Senha encontrada: {senha}")
-            print(f"\nTotal de tentativas: {tentativas_totais}")
+            print(f"\n[SUCESSO] Senha encontrada: {exibir_senha(senha)}", file=saida)
+            print(f"\nTotal de tentativas: {tentativas_totais}", file=saida)
         else:
             session_data['status'] = 'failed'
-            print(f"\n[FALHA] Senha não encontrada após {tentativas_totais} tentativas.")
+            print(f"\n[FALHA] Senha não encontrada após {tentativas_totais} tentativas.", file=saida)
 
-        print(f"\nTempo total: {total_time:.4f} segundos\n")
-        print("-" * 50)
+        print(f"\nTempo total: {total_time:.4f} segundos\n", file=saida)
+        print("-" * 50, file=saida)
 
         if not testing:
-            session_manager.update_session(file_path, session_data)
+            salvar_checkpoint(session_manager, file_path, session_data, metrics, cobertura)
 
-        return {'modo': 'Sequencial', 'workers': 'N/A', 'chunksize': 'N/A', 'tempo': (total_time), 'rate': rate, 'founded': senha is not None}
+        return {'modo': 'Sequencial', 'workers': 'N/A', 'chunksize': 'N/A', 'tempo': (total_time), 'rate': rate, 'founded': senha_correta, 'tentativas': tentativas_totais}
 
     except PasswordNotNeeded as pn:
-        print(f"\n{pn}")
+        print(f"\n{pn}", file=saida)
         session_data['status'] = 'no_password_needed'
         if not testing:
             session_manager.update_session(file_path, session_data)
     except Exception as e:
-        print(f"\n[ERRO] Ocorreu um erro inesperado: {e}")
+        print(f"\n[ERRO] Ocorreu um erro inesperado: {e}", file=saida)
 
 # A função paralela agora usa 'imap_unordered' para latência mínima.
 # A função agora aceita 'start_step'
-def testar_senha_paralelo(session_manager: SessionManager, session_data: dict, num_workers: int, chunksize: int, testing: bool = False) -> None:
+# O pool é criado uma única vez por execução; pode ser recebido já criado (ex.: benchmark)
+def testar_senha_paralelo(session_manager: SessionManager, session_data: dict, num_workers: int, chunksize: int, testing: bool = False, metrics: MetricsExporter | None = None, pool: multiprocessing.pool.Pool | None = None, cobertura: CoverageLedger | None = None,
+                          motor: str | None = None, afinidade: str | None = None, saida=None, barras: bool = True) -> None:
+    from tqdm import tqdm
     # Extrai parâmetros da sessão
     file_path = session_data['target_file']
     file_type = session_data['file_type']
@@ -336,63 +824,109 @@ def testar_senha_paralelo(session_manager: SessionManager, session_data: dict, n
     min_len = session_data['current_len']
     max_len = session_data['max_len']
     charset = session_data['charset']
-    start_step = session_data['last_step']
 
-    print(f"Modo de execução: Paralelo (usando {num_workers} processo(s))")
+    # Só encerra o pool no fim se foi criado aqui
+    pool_proprio = pool is None
+    threads = usar_threads(file_path, file_type, motor) if pool_proprio else pool.threads
+    if threads:
+        print(f"Modo de execução: Threads (usando {num_workers} thread(s); a derivação de chave corre sem o GIL)", file=saida)
+    else:
+        print(f"Modo de execução: Paralelo (usando {num_workers} processo(s))", file=saida)
     inicio = time.perf_counter()
     senha_encontrada = None
+    tentativas_totais = 0
+    instante_descoberta = None
+    latencia_parada = None
     # Salva o progresso a cada 1000 tentativas
     SAVE_INTERVAL = 1000
 
+    if pool_proprio:
+        pool = criar_pool(num_workers, file_path, file_type, threads, afinidade)
+    sinal_parada = pool.sinal_parada
+    sinal_parada.value = 0
+
     try:
+        alfabeto = codificar_charset(charset)
+        impressao = impressao_digital(file_path, file_type) if cobertura else None
+        progresso = ProgressTracker.da_sessao(session_data)
+
         for comprimento in range(min_len, max_len + 1):
             if senha_encontrada: break
 
             session_data['current_len'] = comprimento
+            alfabetos = [alfabeto] * comprimento
             total_combinacoes = len(charset) ** comprimento
-            # Cria um gerador de senhas (eficiente em memória)
-            senhas_generator = ("".join(p) for p in itertools.product(charset, repeat=comprimento))
 
-            # Lógica para saltar para o 'step' inicial
-            initial_step = 0
-            if start_step > 0 and comprimento == min_len:
-                print(f"Saltando para o laço inicial {start_step}...")
-                senhas_generator = itertools.islice(senhas_generator, start_step, None)
-                initial_step = start_step
+            # Retoma no progresso guardado: marca baixa e lotes já concluídos acima dela
+            if comprimento != min_len:
+                progresso = ProgressTracker()
+                session_data['coverage_boxes'] = None
+            elif progresso.marca > 0 or progresso.concluidos:
+                print(f"Saltando para o laço inicial {progresso.marca}" + (f" ({len(progresso.concluidos)} intervalo(s) já concluído(s) acima dele)..." if progresso.concluidos else "..."), file=saida)
+            progresso.guardar(session_data)
+
+            segmentos = planear_segmentos(cobertura, impressao, alfabetos, progresso, session_data)
+            ja_testadas = total_combinacoes - sum(b - a for _, a, b, _ in segmentos)
+            if cobertura and ja_testadas > progresso.marca + sum(b - a for a, b in progresso.concluidos):
+                print(f"[INFO] Registo de cobertura: {ja_testadas} de {total_combinacoes} senhas de {comprimento} caractere(s) já testadas, serão saltadas.", file=saida)
+
+            if metrics:
+                metrics.iniciar_comprimento(comprimento, ja_testadas)
 
-            # Cria um gerador de tarefas para os workers
-            tasks_generator = ((file_path, file_type, s) for s in senhas_generator)
+            # Cria um gerador de tarefas (intervalos de 'chunksize' senhas de cada segmento) para os workers
+            tasks_generator = ((file_path, file_type, mascara, a, b, n) for n, (mascara, inicio_segmento, fim_segmento, _) in enumerate(segmentos) for a, b in gerar_lotes(inicio_segmento, fim_segmento, chunksize, sinal_parada))
+            proximo_salvamento = ja_testadas + SAVE_INTERVAL
 
-            print(f"\nIniciando testes para senhas de {comprimento} caracteres(s)...\n")
+            print(f"\nIniciando testes para senhas de {comprimento} caracteres(s)...\n", file=saida)
 
             # A barra de progresso agora usa o parâmetro 'initial'
-            with multiprocessing.Pool(processes=num_workers) as pool, \
-            tqdm(total=total_combinacoes, desc=f"Testando {comprimento} caracteres(s)", unit="pwd", initial=initial_step, dynamic_ncols=True, mininterval=0.01) as pbar:
-                # imap_unordered distribui as tarefas e retorna os resultados assim que ficam prontos
-                for sucesso, senha in pool.imap_unordered(worker, tasks_generator, chunksize):
-                    pbar.update(1)
-                    session_data['last_password'] = senha
+            with tqdm(total=total_combinacoes, desc=f"Testando {comprimento} caracteres(s)", unit="pwd", initial=ja_testadas, dynamic_ncols=True, mininterval=0.01, disable=not barras) as pbar:
+                # imap_unordered distribui os lotes e retorna os resultados assim que ficam prontos
+                for encontrada, testadas, cabecalho, instante, pid, ultima, segmento, inicio_lote in pool.imap_unordered(worker, tasks_generator, 1):
+                    # Conta apenas as senhas realmente testadas, mesmo nos lotes interrompidos
+                    pbar.update(testadas)
+                    tentativas_totais += testadas
+                    if ultima is not None:
+                        session_data['last_password'] = ultima
+                    # O lote foi testado por ordem: as primeiras 'testadas' senhas estão esgotadas
+                    # (exceto a encontrada, que é sempre a última)
+                    fim_lote = inicio_lote + testadas - (1 if encontrada else 0)
+                    deslocamento = segmentos[segmento][3]
+                    progresso.registar(inicio_lote + deslocamento, fim_lote + deslocamento)
+                    if cobertura:
+                        cobertura.registar(impressao, segmentos[segmento][0], inicio_lote, fim_lote)
+
+                    if metrics:
+                        metrics.registar_lote(testadas, cabecalho, int(encontrada is not None), pid)
+
+                    if encontrada and not senha_encontrada:
+                        senha_encontrada = encontrada
+                        instante_descoberta = instante
+                        # O processo principal também ativa o sinal: 'gerar_lotes' deixa de distribuir
+                        # lotes seja qual for o sinal que o worker viu
+                        sinal_parada.value = 1
+                        # Grava a descoberta imediatamente, sem esperar pelo fim do escoamento
+                        session_data['status'] = 'found'
+                        session_data['found_password'] = senha_encontrada
+                        session_data['last_update'] = datetime.now().isoformat()
+                        if not testing:
+                            salvar_checkpoint(session_manager, file_path, session_data, metrics)
 
                     # Salvamento periódico
-                    if not testing and (pbar.n > 0 and pbar.n % SAVE_INTERVAL == 0):
-                        session_data['last_step'] = pbar.n
+                    if not testing and not senha_encontrada and pbar.n >= proximo_salvamento:
+                        proximo_salvamento = pbar.n + SAVE_INTERVAL
+                        progresso.guardar(session_data)
                         session_data['last_update'] = datetime.now().isoformat()
-                        session_manager.update_session(file_path, session_data)
-
-                    if sucesso:
-                        senha_encontrada = senha
-                        pool.terminate()
-                        # pbar.update(total_combinacoes - pbar.n)
-                        break
+                        salvar_checkpoint(session_manager, file_path, session_data, metrics, cobertura)
 
-            # Reseta o start_step para o próximo comprimento de senha
-            start_step = 0
+            if senha_encontrada:
+                # Todos os lotes em curso já foram escoados: os workers estão parados
+                latencia_parada = time.time() - instante_descoberta
 
         fim = time.perf_counter()
         total_time = fim - inicio
 
-        # Captura a taxa de processamento manual
-        tentativas_totais = sum(len(charset) ** i for i in range(min_len, (comprimento if comprimento > min_len else min_len))) + pbar.n
+        # Taxa de processamento sobre as senhas realmente testadas (sem as saltadas pelo registo de cobertura)
         rate = tentativas_totais / total_time if total_time > 0 else 0
 
         # print(f"\nTaxa de processamento (manual): {rate:.2f} senhas/segundo")
@@ -400,37 +934,690 @@ def testar_senha_paralelo(session_manager: SessionManager, session_data: dict, n
         # print(f"Tempo total: {total_time:.2f} segundos")
 
         # Atualiza o estado final da sessão
-        session_data['last_step'] = pbar.n
+        progresso.guardar(session_data)
         session_data['last_update'] = datetime.now().isoformat()
 
-        print("\n" + "-" * 50)
+        print("\n" + "-" * 50, file=saida)
 
         if senha_encontrada:
             # A mensagem de sucesso é movida para aqui para garantir que aparece depois da barra de progresso
             session_data['status'] = 'found'
-            session_data['found_password'] = senha
+            session_data['found_password'] = senha_encontrada
 
-            print(f"\n[SUCESSO] Senha encontrada: {senha_encontrada}")
-            print(f"\nTotal de tentativas: {tentativas_totais}")
+            print(f"\n[SUCESSO] Senha encontrada: {exibir_senha(senha_encontrada)}", file=saida)
+            print(f"\nTotal de tentativas: {tentativas_totais}", file=saida)
+            print(f"\nWorkers parados {latencia_parada * 1000:.2f} ms após a descoberta", file=saida)
         else:
             session_data['status'] = 'failed'
-            print(f"\n[FALHA] Senha não encontrada após {tentativas_totais} tentativas.")
+            print(f"\n[FALHA] Senha não encontrada após {tentativas_totais} tentativas.", file=saida)
 
-        print(f"\nTempo total: {total_time:.4f} segundos\n")
-        print("-" * 50)
+        print(f"\nTempo total: {total_time:.4f} segundos\n", file=saida)
+        print("-" * 50, file=saida)
 
+        if not testing:
+            salvar_checkpoint(session_manager, file_path, session_data, metrics, cobertura)
+
+        return {'modo': 'Threads' if threads else 'Paralelo', 'workers': num_workers, 'chunksize': chunksize, 'tempo': (total_time), 'rate': rate, 'founded': senha_encontrada is not None, 'latencia_parada': latencia_parada, 'tentativas': tentativas_totais}
+
+    except PasswordNotNeeded as pn:
+        print(f"\n{pn}", file=saida)
+        session_data['status'] = 'no_password_needed'
         if not testing:
             session_manager.update_session(file_path, session_data)
+    except Exception as e:
+        print(f"\n[ERRO] Ocorreu um erro inesperado: {e}", file=saida)
+    finally:
+        if pool_proprio:
+            pool.terminate()
+            pool.join()
+
+# Ataque de texto claro conhecido: recupera as chaves internas, decifra o arquivo e,
+# opcionalmente, inverte as chaves para uma senha curta do charset.
+def atacar_texto_claro(session_manager: SessionManager, session_data: dict, num_workers: int | None = None, testing: bool = False, metrics: MetricsExporter | None = None,
+                       afinidade: str | None = None, saida=None, barras: bool = True) -> dict | None:
+    from tqdm import tqdm
+    file_path = session_data['target_file']
+    kp = session_data['known_plaintext']
+    progresso = ProgressTracker.da_sessao(session_data)
+    # Candidatos Z são caros (segundos cada, em Python puro): salva com mais frequência
+    SAVE_INTERVAL = 20
+    LOTE = 4
 
-        return {'modo': 'Paralelo', 'workers': num_workers, 'chunksize': chunksize, 'tempo': (total_time), 'rate': rate, 'founded': senha_encontrada is not None}
+    print("Modo de execução: Texto claro conhecido (ZipCrypto, Biham–Kocher)" + (f" com {num_workers} processo(s)" if num_workers else ""), file=saida)
+    inicio = time.perf_counter()
+
+    try:
+        with open(kp['plaintext_file'], 'rb') as f:
+            texto_claro = f.read()
+        dados = preparar_texto_claro(file_path, texto_claro, kp['offset'], kp['entry'])
+    except (OSError, KeyError, ValueError) as e:
+        print(f"\n[ERRO] {e}", file=saida)
+        return None
+
+    print(f"\nEntrada alvo: '{dados['entrada']}' ({len(texto_claro)} bytes de texto claro no offset {kp['offset']})\n", file=saida)
+
+    with tqdm(total=len(dados['keystream']) - KP_CONTIGUOS, desc="Redução das chaves Z", unit="byte", dynamic_ncols=True, disable=not barras) as pbar:
+        def avancar_reducao(passo, tamanho):
+            pbar.update(1)
+            pbar.set_postfix(candidatos=tamanho)
+        indice_z, zs = reduzir_chaves_z(dados['keystream'], avancar_reducao)
+
+    # A redução é determinística: só retoma se a sessão corresponder à mesma redução
+    if session_data.get('kp_index') != indice_z or session_data.get('kp_candidates') != len(zs):
+        progresso = ProgressTracker()
+    session_data['kp_index'] = indice_z
+    session_data['kp_candidates'] = len(zs)
+
+    print(f"\n{len(zs)} candidatos Z na posição {indice_z}.", file=saida)
+    if progresso.marca or progresso.concluidos:
+        print(f"Saltando para o candidato {progresso.marca}...", file=saida)
+    print(file=saida)
+
+    chaves = None
+    testados = 0
+    pendentes = progresso.pendentes(0, len(zs))
+    ja_testados = len(zs) - sum(b - a for a, b in pendentes)
+    proximo_salvamento = ja_testados + SAVE_INTERVAL
+    pool = None
+
+    # Estimativa antecipada: mede o primeiro candidato pendente (o resultado não se perde)
+    amostra = []
+    if pendentes:
+        ataque = AtaqueTextoClaro(dados, indice_z)
+        primeiro = pendentes[0][0]
+        t_amostra = time.perf_counter()
+        chaves_amostra = (ataque.executar(zs[primeiro])[:1] or [None])[0]
+        por_z = time.perf_counter() - t_amostra
+        amostra = [(chaves_amostra, 1, os.getpid(), primeiro)]
+        restantes = len(zs) - ja_testados
+        print(f"Estimativa: {restantes} candidatos Z x {por_z:.2f} s / {num_workers or 1} processo(s) = até {formatar_duracao(restantes * por_z / (num_workers or 1))}\n", file=saida)
+        pendentes = [] if chaves_amostra else _subtrair_intervalos(pendentes, [[primeiro, primeiro + 1]])
+
+    try:
+        with tqdm(total=len(zs), initial=ja_testados, desc="Ataque às listas Z/Y/X", unit="z", dynamic_ncols=True, disable=not barras) as pbar:
+            if num_workers and pendentes:
+                pool = criar_pool(num_workers, afinidade=afinidade)
+                sinal_parada = pool.sinal_parada
+                tasks_generator = ((dados, indice_z, zs[a:b], a) for x, y in pendentes for a, b in gerar_lotes(x, y, LOTE, sinal_parada))
+                resultados = pool.imap_unordered(worker_texto_claro, tasks_generator, 1)
+            else:
+                resultados = (((ataque.executar(zs[i])[:1] or [None])[0], 1, os.getpid(), i) for x, y in pendentes for i in range(x, y))
+
+            for encontradas, n, pid, inicio_lote in itertools.chain(amostra, resultados):
+                testados += n
+                pbar.update(n)
+                progresso.registar(inicio_lote, inicio_lote + n - (1 if encontradas else 0))
+                if metrics:
+                    metrics.registar_lote(n, 0, int(encontradas is not None), pid)
+
+                if encontradas and not chaves:
+                    chaves = encontradas
+                    # Grava a descoberta imediatamente
+                    session_data['status'] = 'found'
+                    session_data['found_keys'] = [f"{k:08x}" for k in chaves]
+                    session_data['last_update'] = datetime.now().isoformat()
+                    if not testing:
+                        salvar_checkpoint(session_manager, file_path, session_data, metrics)
+                    if not pool:
+                        break
+
+                if not testing and not chaves and pbar.n >= proximo_salvamento:
+                    proximo_salvamento = pbar.n + SAVE_INTERVAL
+                    progresso.guardar(session_data)
+                    session_data['last_update'] = datetime.now().isoformat()
+                    salvar_checkpoint(session_manager, file_path, session_data, metrics)
+
+            progresso.guardar(session_data)
+    finally:
+        if pool:
+            pool.terminate()
+            pool.join()
+
+    total_time = time.perf_counter() - inicio
+    rate = testados / total_time if total_time > 0 else 0
+    print("\n" + "-" * 50, file=saida)
+
+    if chaves:
+        print(f"\n[SUCESSO] Chaves internas encontradas: {' '.join(session_data['found_keys'])}", file=saida)
+
+        destino = kp.get('output_dir') or os.path.splitext(file_path)[0] + '_decifrado'
+        extraidos = decifrar_arquivo_com_chaves(file_path, chaves, destino, saida)
+        print(f"\n{len(extraidos)} entrada(s) decifrada(s) em '{destino}'.", file=saida)
+
+        if kp.get('invert'):
+            print(f"\nInvertendo as chaves (comprimento de {session_data['min_len']} a {session_data['max_len']})...", file=saida)
+            senha = inverter_chaves(chaves, session_data['charset'], session_data['min_len'], session_data['max_len'])
+            if senha is not None:
+                session_data['found_password'] = senha
+                print(f"\n[SUCESSO] Senha encontrada: {exibir_senha(senha)}", file=saida)
+            else:
+                print("\n[INFO] Nenhuma senha do charset/comprimento indicado produz estas chaves.", file=saida)
+    else:
+        session_data['status'] = 'failed'
+        print(f"\n[FALHA] Chaves não encontradas após {testados} candidatos Z.", file=saida)
+
+    print(f"\nTempo total: {total_time:.4f} segundos\n", file=saida)
+    print("-" * 50, file=saida)
+
+    session_data['last_update'] = datetime.now().isoformat()
+    if not testing:
+        salvar_checkpoint(session_manager, file_path, session_data, metrics)
+
+    return {'modo': 'Texto claro', 'workers': num_workers or 'N/A', 'chunksize': LOTE if num_workers else 'N/A', 'tempo': total_time, 'rate': rate, 'founded': chaves is not None, 'tentativas': testados}
+
+# -----------------------------------------------------------------------------
+# PLANO DE ATAQUE (FASES ORDENADAS COM ORÇAMENTOS)
+# -----------------------------------------------------------------------------
+# Classes de caracteres das máscaras (sintaxe do hashcat: '?l?l?d?d', '??' é um '?' literal)
+CLASSES_MASCARA = {
+    'l': string.ascii_lowercase,
+    'u': string.ascii_uppercase,
+    'd': string.digits,
+    's': ' ' + string.punctuation,
+    'a': string.ascii_letters + string.digits + ' ' + string.punctuation,
+    'h': '0123456789abcdef',
+    'H': '0123456789ABCDEF'
+}
+
+def expandir_mascara(mascara: str) -> list[bytes]:
+    """Converte uma máscara ('?u?l?l?d', literais permitidos) na lista de alfabetos por posição."""
+    alfabetos = []
+    i = 0
+    while i < len(mascara):
+        if mascara[i] == '?' and i + 1 < len(mascara):
+            classe = mascara[i + 1]
+            if classe == '?':
+                alfabetos.append(b'?')
+            elif classe in CLASSES_MASCARA:
+                alfabetos.append(codificar_charset(CLASSES_MASCARA[classe]))
+            else:
+                raise ValueError(f"Classe de máscara desconhecida: '?{classe}'.")
+            i += 2
+        else:
+            alfabetos.extend(bytes([b]) for b in mascara[i].encode('utf-8'))
+            i += 1
+    return alfabetos
+
+def expandir_charset(charset: str) -> str:
+    """Charset literal ('abc123') ou união de classes de máscara ('?l?d')."""
+    if len(charset) % 2 == 0 and all(charset[i] == '?' and charset[i + 1] in CLASSES_MASCARA for i in range(0, len(charset), 2)):
+        return "".join(sorted(set("".join(CLASSES_MASCARA[charset[i + 1]] for i in range(0, len(charset), 2)))))
+    return "".join(sorted(set(charset)))
+
+# Funções de regra suportadas (subconjunto da sintaxe do hashcat); as posições usam 0-9A-Z
+def _posicao_regra(arg: bytes) -> int:
+    return int(arg.decode(), 36)
+
+FUNCOES_REGRAS = {
+    ':': (0, lambda p, a: p),
+    'l': (0, lambda p, a: p.lower()),
+    'u': (0, lambda p, a: p.upper()),
+    'c': (0, lambda p, a: p[:1].upper() + p[1:].lower()),
+    'C': (0, lambda p, a: p[:1].lower() + p[1:].upper()),
+    't': (0, lambda p, a: p.swapcase()),
+    'T': (1, lambda p, a: p[:_posicao_regra(a)] + p[_posicao_regra(a):_posicao_regra(a) + 1].swapcase() + p[_posicao_regra(a) + 1:]),
+    'r': (0, lambda p, a: p[::-1]),
+    'd': (0, lambda p, a: p + p),
+    'p': (1, lambda p, a: p * (_posicao_regra(a) + 1)),
+    'f': (0, lambda p, a: p + p[::-1]),
+    '{': (0, lambda p, a: p[1:] + p[:1]),
+    '}': (0, lambda p, a: p[-1:] + p[:-1]),
+    '$': (1, lambda p, a: p + a),
+    '^': (1, lambda p, a: a + p),
+    '[': (0, lambda p, a: p[1:]),
+    ']': (0, lambda p, a: p[:-1]),
+    'D': (1, lambda p, a: p[:_posicao_regra(a)] + p[_posicao_regra(a) + 1:]),
+    '\'': (1, lambda p, a: p[:_posicao_regra(a)]),
+    's': (2, lambda p, a: p.replace(a[:1], a[1:])),
+    '@': (1, lambda p, a: p.replace(a, b''))
+}
+
+def compilar_regra(regra: str) -> list[tuple]:
+    """Converte uma regra ('c $1 $!') na lista de operações (função, argumento)."""
+    operacoes = []
+    i = 0
+    while i < len(regra):
+        f = regra[i]
+        if f == ' ':
+            i += 1
+            continue
+        if f not in FUNCOES_REGRAS:
+            raise ValueError(f"Função de regra desconhecida: '{f}' em '{regra}'.")
+        n, funcao = FUNCOES_REGRAS[f]
+        arg = regra[i + 1:i + 1 + n].encode('latin-1')
+        if len(arg) < n:
+            raise ValueError(f"Argumento em falta para '{f}' em '{regra}'.")
+        operacoes.append((funcao, arg))
+        i += 1 + n
+    return operacoes
+
+def aplicar_regra(palavra: bytes, operacoes: list[tuple]) -> bytes:
+    for funcao, arg in operacoes:
+        palavra = funcao(palavra, arg)
+    return palavra
+
+def carregar_regras(caminho: str) -> list[str]:
+    """Lê um ficheiro de regras (uma por linha; linhas vazias e comentários '#' ignorados)."""
+    with open(caminho, 'r', encoding='latin-1') as f:
+        return [linha.rstrip('\r\n') for linha in f if linha.strip() and not linha.startswith('#')]
+
+# Listas de palavras já lidas, partilhadas pelas fases que usam o mesmo ficheiro
+_WORDLISTS = {}
+
+def carregar_wordlist(caminho: str) -> list[bytes]:
+    palavras = _WORDLISTS.get(caminho)
+    if palavras is None:
+        with open(caminho, 'rb') as f:
+            palavras = [linha.rstrip(b'\r\n') for linha in f]
+        palavras = [p for p in palavras if p]
+        _WORDLISTS[caminho] = palavras
+    return palavras
+
+class FonteMascara:
+    """Fonte de candidatas de uma máscara: intervalos do odómetro, testados pelo 'worker'."""
+    def __init__(self, alfabetos: list[bytes]):
+        self.alfabetos = alfabetos
+        self.tamanho = math.prod(len(a) for a in alfabetos)
+        self.worker = worker
+
+    def tarefa(self, file_path: str, file_type: str, inicio: int, fim: int, segmento: int) -> tuple:
+        return (file_path, file_type, self.alfabetos, inicio, fim, segmento)
+
+class FonteLista:
+    """
+    Fonte de candidatas de uma lista de palavras com regras. A ordem é regra a regra (todas as
+    palavras com a primeira regra, depois com a segunda, ...), para que as regras mais prováveis,
+    listadas primeiro, sejam esgotadas antes das restantes.
+    """
+    def __init__(self, palavras: list[bytes], regras: list[str] | None = None):
+        self.palavras = palavras
+        self.regras = [compilar_regra(r) for r in (regras or [':'])]
+        self.tamanho = len(palavras) * len(self.regras)
+        self.worker = worker_candidatas
+
+    def candidatas(self, inicio: int, fim: int) -> list[bytes]:
+        n = len(self.palavras)
+        return [aplicar_regra(self.palavras[i % n], self.regras[i // n]) for i in range(inicio, fim)]
+
+    def tarefa(self, file_path: str, file_type: str, inicio: int, fim: int, segmento: int) -> tuple:
+        return (file_path, file_type, self.candidatas(inicio, fim), inicio, segmento)
+
+class FonteHibrida:
+    """
+    Fonte híbrida: cada palavra com a máscara anexada (ou prefixada). O espaço é indexável:
+    o índice i é a palavra i // M com o índice i % M da máscara (M candidatas por palavra),
+    pelo que os lotes são intervalos deste espaço, como nas máscaras.
+    """
+    def __init__(self, palavras: list[bytes], alfabetos: list[bytes], anexar: bool = True):
+        self.palavras = palavras
+        self.alfabetos = alfabetos
+        self.anexar = anexar
+        self.tamanho_mascara = math.prod(len(a) for a in alfabetos)
+        self.tamanho = len(palavras) * self.tamanho_mascara
+        self.worker = worker_hibrido
+
+    def tarefa(self, file_path: str, file_type: str, inicio: int, fim: int, segmento: int) -> tuple:
+        # Só seguem as palavras do lote
+        primeira, ultima = inicio // self.tamanho_mascara, (fim - 1) // self.tamanho_mascara
+        return (file_path, file_type, self.palavras[primeira:ultima + 1], primeira, self.alfabetos, self.anexar, inicio, fim, segmento)
+
+TIPOS_FASE = ('wordlist', 'rules', 'mask', 'hybrid', 'bruteforce')
+POSICOES_HIBRIDO = ('append', 'prepend')
+
+def carregar_plano(caminho: str) -> dict:
+    """
+    Lê e valida um plano de ataque em JSON. Os caminhos relativos são resolvidos a partir da
+    pasta do plano. Exemplo:
+
+        {"phases": [
+            {"type": "wordlist", "wordlist": "comuns.txt"},
+            {"type": "rules", "wordlist": "comuns.txt", "rules": [":", "c", "$1", "c $1 $!"], "time_budget": 600},
+            {"type": "hybrid", "wordlist": "comuns.txt", "mask": "?d?d?s", "position": "append"},
+            {"type": "mask", "mask": "?u?l?l?l?d?d", "keyspace_budget": 50000000},
+            {"type": "bruteforce", "charset": "?l?d", "min_len": 1, "max_len": 6}
+        ]}
+
+    'rules_file' pode substituir 'rules'; 'position' do híbrido é 'append' (padrão) ou 'prepend';
+    sem 'charset'/'min_len'/'max_len' a força bruta usa os argumentos da linha de comandos.
+    'time_budget' é em segundos.
+    """
+    with open(caminho, 'r') as f:
+        plano = json.load(f)
+    return validar_plano(plano, os.path.dirname(os.path.abspath(caminho)))
+
+def validar_plano(plano: dict, pasta: str) -> dict:
+    """Valida um plano (ver 'carregar_plano'), resolvendo os caminhos relativos a partir de 'pasta'."""
+    fases = plano.get('phases') if isinstance(plano, dict) else None
+    if not fases:
+        raise ValueError("O plano não tem fases ('phases').")
+    for n, fase in enumerate(fases, 1):
+        tipo = fase.get('type')
+        if tipo not in TIPOS_FASE:
+            raise ValueError(f"Fase {n}: tipo desconhecido '{tipo}' (use {', '.join(TIPOS_FASE)}).")
+        for chave in ('wordlist', 'rules_file'):
+            if chave in fase:
+                fase[chave] = os.path.join(pasta, fase[chave])
+        if tipo in ('wordlist', 'rules', 'hybrid') and not os.path.exists(fase.get('wordlist') or ''):
+            raise ValueError(f"Fase {n}: lista de palavras não encontrada: '{fase.get('wordlist')}'.")
+        if tipo == 'rules':
+            if 'rules_file' in fase:
+                fase['rules'] = carregar_regras(fase.pop('rules_file'))
+            if not fase.get('rules'):
+                raise ValueError(f"Fase {n}: a fase 'rules' precisa de 'rules' ou 'rules_file'.")
+            for regra in fase['rules']:
+                compilar_regra(regra)
+        if tipo in ('mask', 'hybrid'):
+            expandir_mascara(fase.get('mask') or '')
+            if not fase.get('mask'):
+                raise ValueError(f"Fase {n}: a fase '{tipo}' precisa de 'mask'.")
+        if tipo == 'hybrid' and fase.setdefault('position', 'append') not in POSICOES_HIBRIDO:
+            raise ValueError(f"Fase {n}: posição desconhecida '{fase['position']}' (use {', '.join(POSICOES_HIBRIDO)}).")
+    return plano
+
+def fontes_da_fase(fase: dict, session_data: dict) -> list:
+    """Fontes de candidatas de uma fase, pela ordem em que são testadas."""
+    tipo = fase['type']
+    if tipo == 'wordlist':
+        return [FonteLista(carregar_wordlist(fase['wordlist']))]
+    if tipo == 'rules':
+        return [FonteLista(carregar_wordlist(fase['wordlist']), fase['rules'])]
+    if tipo == 'mask':
+        return [FonteMascara(expandir_mascara(fase['mask']))]
+    if tipo == 'hybrid':
+        return [FonteHibrida(carregar_wordlist(fase['wordlist']), expandir_mascara(fase['mask']), fase['position'] == 'append')]
+    alfabeto = codificar_charset(expandir_charset(fase['charset']) if fase.get('charset') else session_data['charset'])
+    min_len = fase.get('min_len', session_data['min_len'])
+    max_len = fase.get('max_len', session_data['max_len'])
+    return [FonteMascara([alfabeto] * comprimento) for comprimento in range(min_len, max_len + 1)]
+
+def descrever_fase(fase: dict, session_data: dict) -> str:
+    tipo = fase['type']
+    if tipo == 'wordlist':
+        return f"wordlist {os.path.basename(fase['wordlist'])}"
+    if tipo == 'rules':
+        return f"wordlist {os.path.basename(fase['wordlist'])} + {len(fase['rules'])} regra(s)"
+    if tipo == 'mask':
+        return f"máscara {fase['mask']}"
+    if tipo == 'hybrid':
+        if fase['position'] == 'append':
+            return f"wordlist {os.path.basename(fase['wordlist'])} + máscara {fase['mask']}"
+        return f"máscara {fase['mask']} + wordlist {os.path.basename(fase['wordlist'])}"
+    charset = expandir_charset(fase['charset']) if fase.get('charset') else session_data['charset']
+    return f"força bruta {fase.get('min_len', session_data['min_len'])}-{fase.get('max_len', session_data['max_len'])} ({len(charset)} caracteres)"
+
+def formatar_duracao(segundos: float | None) -> str:
+    if segundos is None:
+        return '?'
+    segundos = int(segundos)
+    if segundos >= 86400:
+        return f"{segundos // 86400}d{segundos % 86400 // 3600:02d}h"
+    return f"{segundos // 3600}h{segundos % 3600 // 60:02d}m{segundos % 60:02d}s" if segundos >= 3600 else f"{segundos // 60}m{segundos % 60:02d}s"
+
+def estimar_fase(fase: dict, keyspace: int, posicao: int, decorrido: float, taxa: float | None) -> float | None:
+    """ETA de uma fase com a taxa medida, limitada pelo orçamento de tempo que lhe resta."""
+    eta = (keyspace - posicao) / taxa if taxa else None
+    if fase.get('time_budget'):
+        restante = max(fase['time_budget'] - decorrido, 0)
+        eta = restante if eta is None else min(eta, restante)
+    return eta
+
+def executar_plano(session_manager: SessionManager, session_data: dict, num_workers: int | None = None, chunksize: int = 2, testing: bool = False, metrics: MetricsExporter | None = None, cobertura: CoverageLedger | None = None, pool: multiprocessing.pool.Pool | None = None,
+                   motor: str | None = None, afinidade: str | None = None, saida=None, barras: bool = True) -> dict | None:
+    """
+    Executa as fases do plano por ordem, com um único pool quente (criado aqui ou recebido já
+    criado). A sessão guarda a fase ('plan_phase'), o progresso dentro dela ('last_step' e
+    'done_ranges'), o tempo já gasto nela ('plan_elapsed') e a última taxa medida ('plan_rate'),
+    pelo que '--continue' retoma a meio do plano.
+    """
+    from tqdm import tqdm
+    file_path = session_data['target_file']
+    file_type = session_data['file_type']
+    fases = session_data['plan']['phases']
+    SAVE_INTERVAL = 1000
+    TAXA_DURACAO_MINIMA = 1.0 # Segundos de medição para a taxa usada nos ETA
+
+    # Só encerra o pool no fim se foi criado aqui
+    pool_proprio = pool is None
+    try:
+        fontes = [fontes_da_fase(fase, session_data) for fase in fases]
+    except (OSError, ValueError) as e:
+        print(f"\n[ERRO] {e}", file=saida)
+        return None
+    keyspaces = [min(sum(f.tamanho for f in fs), int(fase.get('keyspace_budget') or sum(f.tamanho for f in fs))) for fase, fs in zip(fases, fontes)]
+
+    threads = bool(num_workers) and (usar_threads(file_path, file_type, motor) if pool_proprio else pool.threads)
+    if not num_workers:
+        print(f"Modo de execução: Plano de ataque com {len(fases)} fase(s), sequencial (single-thread)", file=saida)
+    else:
+        print(f"Modo de execução: Plano de ataque com {len(fases)} fase(s), usando {num_workers} {'thread(s)' if threads else 'processo(s)'}", file=saida)
+
+    fase_inicial = session_data.get('plan_phase', 0)
+    taxa = session_data.get('plan_rate')
+    print(file=saida)
+    for n, fase in enumerate(fases):
+        posicao = ProgressTracker.da_sessao(session_data).testadas() if n == fase_inicial else 0
+        decorrido = session_data.get('plan_elapsed', 0.0) if n == fase_inicial else 0.0
+        orcamento = f", máx. {formatar_duracao(fase['time_budget'])}" if fase.get('time_budget') else ''
+        estado = 'concluída' if n < fase_inicial else f"ETA {formatar_duracao(estimar_fase(fase, keyspaces[n], posicao, decorrido, taxa))}"
+        print(f"  Fase {n + 1}: {descrever_fase(fase, session_data)} — {keyspaces[n]} candidatas{orcamento} ({estado})", file=saida)
+
+    inicio = time.perf_counter()
+    tentativas_totais = 0
+    senha_encontrada = None
+
+    try:
+        # As fases de máscara também ficam no registo de cobertura (as listas de palavras não)
+        impressao = impressao_digital(file_path, file_type) if cobertura else None
+        if num_workers:
+            if pool_proprio:
+                pool = criar_pool(num_workers, file_path, file_type, threads, afinidade)
+            sinal_parada = pool.sinal_parada
+            sinal_parada.value = 0
+        else:
+            sinal_parada = multiprocessing.RawValue('b', 0)
+
+        for n in range(fase_inicial, len(fases)):
+            fase = fases[n]
+            keyspace = keyspaces[n]
+            # Progresso exato na fase: o índice é contínuo ao longo das fontes da fase
+            progresso = ProgressTracker.da_sessao(session_data) if n == fase_inicial else ProgressTracker()
+            posicao = progresso.testadas()
+            decorrido_anterior = session_data.get('plan_elapsed', 0.0) if n == fase_inicial else 0.0
+            session_data['plan_phase'] = n
+            progresso.guardar(session_data)
+            session_data['plan_elapsed'] = decorrido_anterior
+            sinal_parada.value = 0
+            orcamento_esgotado = False
+
+            print(f"\nFase {n + 1}/{len(fases)}: {descrever_fase(fase, session_data)} (ETA {formatar_duracao(estimar_fase(fase, keyspace, posicao, decorrido_anterior, taxa))})\n", file=saida)
+            if metrics:
+                metrics.iniciar_fase(n + 1, keyspace, posicao)
+
+            inicio_fase = time.perf_counter()
+            testadas_fase = 0
+            proximo_salvamento = posicao + SAVE_INTERVAL
+            with tqdm(total=keyspace, initial=posicao, desc=f"Fase {n + 1}/{len(fases)}", unit="pwd", dynamic_ncols=True, mininterval=0.01, disable=not barras) as pbar:
+                base = 0
+                for segmento, fonte in enumerate(fontes[n]):
+                    inicio_fonte = base
+                    pendentes = progresso.pendentes(base, base + min(fonte.tamanho, keyspace - base))
+                    base += fonte.tamanho
+                    if not pendentes:
+                        continue
+
+                    tarefas = (fonte.tarefa(file_path, file_type, x, y, segmento) for a, b in pendentes for x, y in gerar_lotes(a - inicio_fonte, b - inicio_fonte, chunksize, sinal_parada))
+                    resultados = pool.imap_unordered(fonte.worker, tarefas, 1) if pool else map(fonte.worker, tarefas)
+                    for encontrada, testadas, cabecalho, instante, ident, ultima, _, inicio_lote in resultados:
+                        pbar.update(testadas)
+                        testadas_fase += testadas
+                        tentativas_totais += testadas
+                        if ultima is not None:
+                            session_data['last_password'] = ultima
+                        fim_lote = inicio_lote + testadas - (1 if encontrada else 0)
+                        progresso.registar(inicio_fonte + inicio_lote, inicio_fonte + fim_lote)
+                        if cobertura and isinstance(fonte, FonteMascara):
+                            cobertura.registar(impressao, fonte.alfabetos, inicio_lote, fim_lote)
+                        if metrics:
+                            metrics.registar_lote(testadas, cabecalho, int(encontrada is not None), ident)
+
+                        if encontrada and not senha_encontrada:
+                            senha_encontrada = encontrada
+                            # Deixa de distribuir lotes já aqui, como no orçamento de tempo
+                            sinal_parada.value = 1
+                            session_data['status'] = 'found'
+                            session_data['found_password'] = senha_encontrada
+                            session_data['last_update'] = datetime.now().isoformat()
+                            if not testing:
+                                salvar_checkpoint(session_manager, file_path, session_data, metrics)
+                            if not pool:
+                                break
+
+                        # Orçamento de tempo (somado entre execuções): deixa de distribuir lotes
+                        decorrido = decorrido_anterior + time.perf_counter() - inicio_fase
+                        if fase.get('time_budget') and decorrido >= fase['time_budget'] and not orcamento_esgotado:
+                            orcamento_esgotado = True
+                            sinal_parada.value = 1
+                            if not pool:
+                                break
+
+                        if not testing and not senha_encontrada and pbar.n >= proximo_salvamento:
+                            proximo_salvamento = pbar.n + SAVE_INTERVAL
+                            progresso.guardar(session_data)
+                            session_data['plan_elapsed'] = decorrido
+                            if time.perf_counter() - inicio_fase >= TAXA_DURACAO_MINIMA:
+                                session_data['plan_rate'] = testadas_fase / (time.perf_counter() - inicio_fase)
+                            session_data['last_update'] = datetime.now().isoformat()
+                            salvar_checkpoint(session_manager, file_path, session_data, metrics, cobertura)
+
+                    if senha_encontrada or orcamento_esgotado:
+                        break
+
+            # Fases muito curtas medem sobretudo a latência do pool: só contam se não houver melhor medida
+            duracao_fase = time.perf_counter() - inicio_fase
+            if testadas_fase and duracao_fase > 0 and (duracao_fase >= TAXA_DURACAO_MINIMA or not session_data.get('plan_rate')):
+                session_data['plan_rate'] = testadas_fase / duracao_fase
+            taxa = session_data.get('plan_rate')
+            if senha_encontrada:
+                break
+
+            if orcamento_esgotado:
+                print(f"\n[INFO] Orçamento de tempo da fase {n + 1} esgotado após {pbar.n} de {keyspace} candidatas.", file=saida)
+            else:
+                print(f"\n[INFO] Fase {n + 1} concluída sem encontrar a senha.", file=saida)
+            # A fase seguinte começa do início
+            session_data['plan_phase'] = n + 1
+            ProgressTracker().guardar(session_data)
+            session_data['plan_elapsed'] = 0.0
+            session_data['last_update'] = datetime.now().isoformat()
+            if not testing:
+                salvar_checkpoint(session_manager, file_path, session_data, metrics, cobertura)
+
+        total_time = time.perf_counter() - inicio
+        rate = tentativas_totais / total_time if total_time > 0 else 0
+        print("\n" + "-" * 50, file=saida)
+        if senha_encontrada:
+            print(f"\n[SUCESSO] Senha encontrada na fase {session_data['plan_phase'] + 1}: {exibir_senha(senha_encontrada)}", file=saida)
+            print(f"\nTotal de tentativas: {tentativas_totais}", file=saida)
+        else:
+            session_data['status'] = 'failed'
+            print(f"\n[FALHA] Senha não encontrada após {tentativas_totais} tentativas em {len(fases)} fase(s).", file=saida)
+        print(f"\nTempo total: {total_time:.4f} segundos\n", file=saida)
+        print("-" * 50, file=saida)
+
+        session_data['last_update'] = datetime.now().isoformat()
+        if not testing:
+            salvar_checkpoint(session_manager, file_path, session_data, metrics, cobertura)
+
+        return {'modo': 'Plano', 'workers': num_workers or 'N/A', 'chunksize': chunksize if num_workers else 'N/A', 'tempo': total_time, 'rate': rate, 'founded': senha_encontrada is not None, 'tentativas': tentativas_totais}
 
     except PasswordNotNeeded as pn:
-        print(f"\n{pn}")
+        print(f"\n{pn}", file=saida)
         session_data['status'] = 'no_password_needed'
         if not testing:
             session_manager.update_session(file_path, session_data)
     except Exception as e:
-        print(f"\n[ERRO] Ocorreu um erro inesperado: {e}")
+        print(f"\n[ERRO] Ocorreu um erro inesperado: {e}", file=saida)
+    finally:
+        if pool and pool_proprio:
+            pool.terminate()
+            pool.join()
+
+# -----------------------------------------------------------------------------
+# SESSÕES E EXECUÇÃO (PARTILHADO PELA LINHA DE COMANDOS E PELA API)
+# -----------------------------------------------------------------------------
+TIPOS_ARQUIVO = {'.zip': 'zip', '.rar': 'rar', '.7z': '7z'}
+
+def tipo_do_arquivo(file_path: str) -> str | None:
+    """Tipo do arquivo ('zip', 'rar' ou '7z') pela extensão, ou None se não for suportado."""
+    return TIPOS_ARQUIVO.get(os.path.splitext(file_path)[1].lower())
+
+def construir_charset(charset_args: dict) -> str:
+    """Charset ordenado a partir das opções da sessão ('digits', 'letters', ...); vazio se nenhuma estiver ativa."""
+    char_set = set()
+    if charset_args.get('alphanum'): char_set.update(list(string.ascii_letters + string.digits))
+    if charset_args.get('digits'): char_set.update(list(string.digits))
+    if charset_args.get('lowercase'): char_set.update(list(string.ascii_lowercase))
+    if charset_args.get('uppercase'): char_set.update(list(string.ascii_uppercase))
+    if charset_args.get('letters'): char_set.update(list(string.ascii_letters))
+    if charset_args.get('symbols'): char_set.update(list(string.punctuation))
+    # Charset explícito (sessões criadas pela API, ver 'cracker_api')
+    if charset_args.get('custom'): char_set.update(list(charset_args['custom']))
+    return "".join(sorted(list(char_set)))
+
+def charset_da_sessao(session_data: dict) -> str:
+    """Charset de uma sessão retomada: o guardado (inclui o padrão) ou, em sessões antigas, o reconstruído."""
+    return session_data.get('charset') or construir_charset(session_data['charset_args'])
+
+def nova_sessao(target_file: str, file_type: str, charset_args: dict, charset: str, min_len: int, max_len: int, step: int = 0,
+                plano: dict | None = None, plan_file: str | None = None, known_plaintext: dict | None = None) -> dict:
+    """Estrutura de dados de uma nova sessão (força bruta, plano de ataque ou texto claro conhecido)."""
+    session_data = {
+        "target_file": os.path.abspath(target_file),
+        "file_type": file_type,
+        "charset_args": charset_args,
+        "charset": charset,
+        "min_len": min_len,
+        "max_len": max_len,
+        "current_len": min_len,
+        "last_step": step,
+        "status": "running",
+        "found_password": None,
+        "last_password": None,
+        "last_update": datetime.now().isoformat()
+    }
+    if plano:
+        # O plano fica guardado na sessão: '--continue' não depende do ficheiro original
+        session_data['mode'] = 'plan'
+        session_data['plan_file'] = os.path.abspath(plan_file) if plan_file else None
+        session_data['plan'] = plano
+        session_data['plan_phase'] = 0
+        session_data['plan_elapsed'] = 0.0
+        session_data['plan_rate'] = None
+        session_data['last_step'] = 0
+    if known_plaintext:
+        session_data['mode'] = 'known_plaintext'
+        session_data['last_step'] = 0
+        session_data['known_plaintext'] = known_plaintext
+    return session_data
+
+def executar_sessao(session_manager: SessionManager, session_data: dict, num_workers: int | None = None, chunksize: int = 2, metrics: MetricsExporter | None = None,
+                    cobertura: CoverageLedger | None = None, pool: multiprocessing.pool.Pool | None = None,
+                    motor: str | None = None, afinidade: str | None = None, verificador: str | None = None,
+                    saida=None, barras: bool = True) -> dict | None:
+    """
+    Executa a sessão no modo que ela indica (texto claro conhecido, plano, paralelo ou sequencial).
+    Sem 'num_workers' corre no processo principal; com 'pool' reutiliza um pool já quente.
+    'motor', 'afinidade' e 'verificador' valem só para esta execução (por omissão, os globais).
+    As mensagens vão para 'saida' (por omissão sys.stdout) e 'barras' ativa as barras de progresso.
+    """
+    with cracker_worker.impor_verificador(verificador):
+        if session_data.get('mode') == 'known_plaintext':
+            return atacar_texto_claro(session_manager, session_data, num_workers, metrics=metrics, afinidade=afinidade, saida=saida, barras=barras)
+        if session_data.get('mode') == 'plan':
+            return executar_plano(session_manager, session_data, num_workers, chunksize, metrics=metrics, cobertura=cobertura, pool=pool, motor=motor, afinidade=afinidade, saida=saida, barras=barras)
+        if num_workers:
+            return testar_senha_paralelo(session_manager, session_data, num_workers, chunksize, metrics=metrics, pool=pool, cobertura=cobertura, motor=motor, afinidade=afinidade, saida=saida, barras=barras)
+        return testar_senha_sequencial(session_manager, session_data, metrics=metrics, cobertura=cobertura, saida=saida, barras=barras)
 
 # Testes de desempenho com diferentes números de workers e chunksizes
 def benchmark(args, file_path) -> None:
@@ -493,31 +1680,42 @@ def benchmark(args, file_path) -> None:
     print("# Testes de desempenho\n" )
 
     print("-" * 50)
-    print(f"CPU Count: {multiprocessing.cpu_count()}\n")
+    print(f"CPU Count: {multiprocessing.cpu_count()} (utilizáveis: {cracker_worker.cpus_efetivos()})\n")
     print(f"Alvo: {file_path} (Tipo: {file_type})\n")
     print(f"Charset: '{charset[:40]}...' ({len(charset)} caracteres)\n")
     print(f"Comprimento: de {args.min_len} a {args.max_len}\n")
     print("-" * 50)
 
+    # Cada configuração é medida 'repeticoes' vezes: são as amostras usadas pelo 'compare'
+    repeticoes = max(1, args.benchmark_repeat)
+
     print("\n" + ("-" * 50))
     print("#  Sequencial\n" )
-    result = testar_senha_sequencial(session_manager, copy.deepcopy(session_data), True)
-    session_manager.update_session(file_path, copy.deepcopy(session_data))
-    resultados_testes.append(result)
+    for _ in range(repeticoes):
+        result = testar_senha_sequencial(session_manager, copy.deepcopy(session_data), True)
+        session_manager.update_session(file_path, copy.deepcopy(session_data))
+        resultados_testes.append(result)
 
     print("\n" + ("-" * 50))
     print("# Paralelos" )
 
-    for workers in [4, 8, 16, 32, 64, 128]:
+    # Inclui sempre o número de CPUs utilizáveis (afinidade e quota do cgroup) na varredura
+    for workers in sorted({4, 8, 16, 32, 64, 128, max(2, cracker_worker.cpus_efetivos())}):
         args.workers = workers
-
-        for chunksize in [1, 2, 5, 10, 20, 50]:
-            print("\n" + ("-" * 50))
-            print(f"Workers: {args.workers}, Chunksize: {chunksize}")
-            print("-" * 50)
-            result = testar_senha_paralelo(session_manager, copy.deepcopy(session_data), args.workers, chunksize, True)
-            session_manager.update_session(file_path, copy.deepcopy(session_data))
-            resultados_testes.append(result)
+        colocacao = cracker_worker.descrever_afinidade(args.workers, AFINIDADE)
+
+        # Um único pool por número de workers, reutilizado em todos os chunksizes
+        with criar_pool(args.workers, session_data['target_file'], file_type) as pool:
+            for chunksize in [1, 2, 5, 10, 20, 50]:
+                for _ in range(repeticoes):
+                    print("\n" + ("-" * 50))
+                    print(f"Workers: {args.workers}, Chunksize: {chunksize}")
+                    print(f"Afinidade: {colocacao}")
+                    print("-" * 50)
+                    result = testar_senha_paralelo(session_manager, copy.deepcopy(session_data), args.workers, chunksize, True, pool=pool)
+                    result['afinidade'] = colocacao
+                    session_manager.update_session(file_path, copy.deepcopy(session_data))
+                    resultados_testes.append(result)
 
     session_manager.delete_file()
 
@@ -526,6 +1724,30 @@ def benchmark(args, file_path) -> None:
         resultados_testes.sort(key=operator.itemgetter('tempo'))
         print("\n--- Tabela de Desempenho ---")
         formatar_tabela(resultados_testes)
+
+        # Colocação usada em cada número de workers, para comparar layouts entre execuções
+        print("\nColocação dos workers:")
+        for colocacao in dict.fromkeys(r['afinidade'] for r in sorted(resultados_testes, key=operator.itemgetter('workers')) if r.get('afinidade')):
+            print(f"  {colocacao}")
+
+        # Guarda a execução no histórico, com a revisão git, a máquina e a configuração
+        if not args.no_history:
+            from cracker_benchmarks import BenchmarkHistory
+            config = {
+                'file_type': file_type,
+                'test_method': cracker_worker.verificador_do_arquivo(session_data['target_file'], file_type).nome,
+                'charset_len': len(charset),
+                'min_len': args.min_len,
+                'max_len': args.max_len,
+                'variant': None,
+                'start_method': POOL_START_METHOD or multiprocessing.get_start_method(),
+                'engine': MOTOR_PARALELO,
+                'affinity': AFINIDADE,
+                'cpus': cracker_worker.cpus_efetivos(),
+                'repeat': repeticoes
+            }
+            execucao = BenchmarkHistory(args.history_file).registar(resultados_testes, config)
+            print(f"\n[INFO] Resultados guardados no histórico '{args.history_file}' (execução {execucao['id']}).")
     else:
         print("Nenhum resultado de teste disponível.")
 
@@ -533,6 +1755,27 @@ def benchmark(args, file_path) -> None:
     if file_path in ['benchmark.zip', 'benchmark.rar'] and os.path.exists(file_path):
         os.remove(file_path)
 
+def listar_verificadores(file_path: str | None = None, file_type: str | None = None) -> None:
+    """Mostra o registo de verificadores; com um arquivo, indica os compatíveis e o escolhido."""
+    metadados = carregar_metadados(file_path, file_type) if file_path else None
+    if metadados:
+        compativeis = cracker_worker.verificadores_compativeis(file_type, metadados)
+        variante = cracker_worker.variante_arquivo(file_type, metadados) or 'sem encriptação'
+        print(f"Arquivo: {file_path} (Tipo: {file_type}, variante: {variante})\n")
+    for backend in cracker_worker.VERIFICADORES.values():
+        estado = 'disponível' if backend.disponivel() else 'indisponível'
+        linha = f"{backend.nome:<10} {estado:<13}"
+        if metadados:
+            if backend in compativeis:
+                marca = '*' if backend is compativeis[0] else ' '
+                linha += f" {marca} prioridade {backend.prioridade}"
+            else:
+                linha += f"   {'incompatível':>12}"
+        aviso = " [pode dar falsos positivos]" if backend.falsos_positivos else ""
+        print(f"{linha}  {backend.descricao}{aviso}")
+    if metadados:
+        print("\n* escolhido por omissão (sem falsos positivos e com maior prioridade)" if compativeis else "\n[ERRO] Nenhum verificador disponível para este arquivo.")
+
 # Função para formatar e exibir a tabela de resultados
 def formatar_tabela(dados):
     """Formata e exibe os dados em uma tabela no terminal."""
@@ -600,13 +1843,13 @@ def formatar_tabela(dados):
 # -----------------------------------------------------------------------------
 def main() -> None:
     parser = argparse.ArgumentParser(
-        description="Simulador de teste de força de senha para ficheiros .zip e .rar.",
+        description="Simulador de teste de força de senha para ficheiros .zip, .rar e .7z.",
         formatter_class=argparse.RawTextHelpFormatter
     )
 
     # Grupo para iniciar um novo ataque
     new_attack_group = parser.add_argument_group('Novo Ataque', 'Argumentos para iniciar uma nova busca')
-    new_attack_group.add_argument("arquivo", nargs='?', help="O caminho para o ficheiro .zip ou .rar.")
+    new_attack_group.add_argument("arquivo", nargs='?', help="O caminho para o ficheiro .zip, .rar ou .7z.")
     new_attack_group.add_argument("-min", "--min_len", type=int, default=1, help="Comprimento mínimo da senha.")
     new_attack_group.add_argument("-max", "--max_len", type=int, default=8, help="Comprimento máximo da senha.")
     new_attack_group.add_argument("-d", "--digitos", action="store_true", help="Incluir dígitos (0-9).")
@@ -618,29 +1861,74 @@ def main() -> None:
 
     # Argumentos gerais
     new_attack_group.add_argument("-m", "--multithread", action="store_true", help="Ativar modo paralelo com múltiplos processos.")
-    new_attack_group.add_argument("--workers", type=int, default=os.cpu_count(), help=f"Número de processos a serem utilizados (padrão: {os.cpu_count()}).")
+    new_attack_group.add_argument("--workers", type=int, default=max(2, cracker_worker.cpus_efetivos()), help=f"Número de processos a serem utilizados com '-m' (padrão: {max(2, cracker_worker.cpus_efetivos())}, os CPUs permitidos pela afinidade e pela quota do cgroup, no mínimo 2).")
     ## NOVO: Argumento para definir o laço inicial.
     new_attack_group.add_argument("--step", type=int, default=0, help="Número do laço (iteração) para iniciar o teste. Aplica-se ao primeiro comprimento do intervalo.")
 
+    # Grupo para o ataque de texto claro conhecido (apenas ZipCrypto)
+    kp_group = parser.add_argument_group('Texto Claro Conhecido', 'Recupera as chaves ZipCrypto a partir de bytes conhecidos de uma entrada (Biham–Kocher)')
+    kp_group.add_argument("--known-plaintext", metavar="FICHEIRO", help="Ficheiro com pelo menos 12 bytes conhecidos dos dados (comprimidos) da entrada.")
+    kp_group.add_argument("--kp-offset", type=int, default=0, help="Posição do texto claro nos dados da entrada (padrão: 0).")
+    kp_group.add_argument("--kp-entry", help="Nome da entrada a que o texto claro pertence (padrão: primeira entrada ZipCrypto).")
+    kp_group.add_argument("--kp-output", help="Diretório para as entradas decifradas (padrão: <arquivo>_decifrado).")
+    kp_group.add_argument("--kp-invert", action="store_true", help="Após recuperar as chaves, procura a senha com o charset e comprimentos indicados.")
+
+    # Grupo para o plano de ataque
+    plan_group = parser.add_argument_group('Plano de Ataque', 'Fases ordenadas (wordlist, regras, híbridos, máscaras, força bruta) com orçamentos de tempo/keyspace')
+    plan_group.add_argument("--plan", metavar="FICHEIRO", help="Plano em JSON com as fases a executar por ordem (ver 'carregar_plano'). O charset e os comprimentos indicados servem de padrão para as fases de força bruta.")
+    plan_group.add_argument("--hybrid", nargs=2, metavar=("WORDLIST", "MASCARA"), help="Modo híbrido: cada palavra da lista com a máscara anexada (ex.: '?d?d?s'). Executado como um plano de uma fase.")
+    plan_group.add_argument("--hybrid-prepend", action="store_true", help="No modo híbrido, coloca a máscara antes da palavra.")
+
     # Grupo para continuar um ataque
     continue_group = parser.add_argument_group('Continuar Ataque', 'Argumentos para continuar uma busca existente')
     continue_group.add_argument("--continue", dest='continue_file', nargs='?', const=True, help="Continue a última sessão para o ARQUIVO especificado.")
+    continue_group.add_argument("--on-existing", choices=['ask', 'continue', 'overwrite', 'abort'], default='ask', help="O que fazer num novo ataque se já houver uma sessão 'running' para o arquivo (padrão: ask, pergunta no terminal).")
 
     # Argumentos comuns
     parser.add_argument("--session-file", default="cracker_sessions.json", help="Ficheiro para guardar as sessões.")
+    parser.add_argument("--coverage-file", default="cracker_coverage.json", help="Registo das regiões já testadas por arquivo (pelo conteúdo, não pelo caminho).")
+    parser.add_argument("--no-coverage", action="store_true", help="Não consulta nem atualiza o registo de cobertura.")
+    parser.add_argument("--no-metadata-cache", action="store_true", help="Não usa a cache de metadados '<arquivo>.cracker-meta.json' (relê sempre o arquivo).")
     parser.add_argument("--benchmark", action="store_true", help="Testa o desempenho desse processo, no modo sequencial e multi thread, arquivo .zip.")
     parser.add_argument("--benchmark-rar", action="store_true", help="Testa o desempenho desse processo, no modo sequencial e multi thread, arquivo .rar.")
-    parser.add_argument("--test-method", choices=['lib', 'subprocess'], default='lib', help="Método para testar arquivos entre lib (pode ter falso positivos com .rar) e subprocess (geralmente mais lento) (padrão: lib).")
+    parser.add_argument("--benchmark-repeat", type=int, default=1, help="Número de medições de cada configuração do benchmark (padrão: 1; use 3 ou mais para o 'compare' poder testar a significância).")
+    parser.add_argument("--history-file", default=os.path.join('benchmark_results', 'historico.jsonl'), help="Histórico de benchmarks (ver 'python cracker_benchmarks.py --help').")
+    parser.add_argument("--no-history", action="store_true", help="Não guarda os resultados do benchmark no histórico.")
+    parser.add_argument("--start-method", choices=['fork', 'forkserver', 'spawn'], help="Método de arranque dos processos do pool (padrão: o da plataforma).")
+    parser.add_argument("--engine", choices=['auto', 'processos', 'threads'], default='auto', help="Motor do modo paralelo; 'auto' usa threads para AES-zip, RAR5 e 7z, cuja derivação de chave corre sem o GIL (padrão: auto).")
+    parser.add_argument("--affinity", choices=list(cracker_worker.MODOS_AFINIDADE), default='none', help="Fixa os workers aos CPUs (Linux): 'cores' um worker por núcleo físico, 'threads' por CPU lógico (SMT), 'none' deixa o escalonador decidir (padrão: none). Respeita a quota de CPU do cgroup.")
+    parser.add_argument("--verifier", choices=list(cracker_worker.VERIFICADORES), help="Impõe o verificador de senhas; por omissão é escolhido o mais rápido sem falsos positivos para o arquivo (ver --list-verifiers).")
+    parser.add_argument("--list-verifiers", action="store_true", help="Lista os verificadores registados (e, com um arquivo, os compatíveis e a sua prioridade) e termina.")
+
+    # Grupo para exportar métricas do ataque em curso
+    metrics_group = parser.add_argument_group('Métricas', 'Exportação de métricas para dashboards e alertas')
+    metrics_group.add_argument("--metrics-file", help="Ficheiro JSON onde as métricas são escritas periodicamente.")
+    metrics_group.add_argument("--metrics-port", type=int, help="Porta local do endpoint HTTP com métricas no formato Prometheus (/metrics).")
+    metrics_group.add_argument("--metrics-interval", type=float, default=5.0, help="Intervalo em segundos entre atualizações do ficheiro de métricas (padrão: 5).")
 
     args = parser.parse_args()
     session_manager = SessionManager(args.session_file)
     session_data = None
     target_file = args.arquivo or (args.continue_file if isinstance(args.continue_file, str) else None)
 
-    if args.test_method == 'subprocess':
-        global RAR_METHOD_TEST, ZIP_METHOD_TEST
-        RAR_METHOD_TEST = 'subprocess'
-        ZIP_METHOD_TEST = 'subprocess'
+    cracker_worker.VERIFICADOR_FORCADO = args.verifier
+
+    if args.no_metadata_cache:
+        cracker_worker.USAR_CACHE_METADADOS = False
+
+    global POOL_START_METHOD, MOTOR_PARALELO, AFINIDADE
+    if args.start_method:
+        POOL_START_METHOD = args.start_method
+    MOTOR_PARALELO = args.engine
+    AFINIDADE = args.affinity
+
+    if args.list_verifiers:
+        tipo = tipo_do_arquivo(target_file or '')
+        if target_file and (not tipo or not os.path.exists(target_file)):
+            print(f"[ERRO] O ficheiro '{target_file}' não foi encontrado ou não é .zip, .rar ou .7z.")
+            return
+        listar_verificadores(target_file, tipo)
+        return
 
     # For test execution only
     if args.benchmark or args.benchmark_rar:
@@ -652,7 +1940,8 @@ def main() -> None:
         print("[ERRO] Valores inválidos para comprimento mínimo/máximo.")
         return
 
-    if args.workers < 2:
+    # O número de processos só conta no modo paralelo: uma execução sequencial não o valida
+    if args.multithread and args.workers < 2:
         print("[ERRO] O número de processos deve ser pelo menos 2.")
         return
 
@@ -682,7 +1971,7 @@ def main() -> None:
             return
 
         if session_data['status'] == 'found':
-            print(f"[INFO] A senha para este arquivo já foi encontrada: {session_data['found_password']}")
+            print(f"[INFO] A senha para este arquivo já foi encontrada: {exibir_senha(session_data['found_password'] or '') or ' '.join(session_data.get('found_keys') or [])}")
             return
 
         if session_data['status'] == 'no_password_needed':
@@ -691,16 +1980,8 @@ def main() -> None:
 
         print("Sessão encontrada. Retomando com os parâmetros guardados...")
 
-        # Recria o charset a partir dos argumentos guardados
-        s_args = session_data['charset_args']
-        char_set = set()
-        if s_args.get('alphanum'): char_set.update(list(string.ascii_letters + string.digits))
-        if s_args.get('digits'): char_set.update(list(string.digits))
-        if s_args.get('lowercase'): char_set.update(list(string.ascii_lowercase))
-        if s_args.get('uppercase'): char_set.update(list(string.ascii_uppercase))
-        if s_args.get('letters'): char_set.update(list(string.ascii_letters))
-        if s_args.get('symbols'): char_set.update(list(string.punctuation))
-        session_data['charset'] = "".join(sorted(list(char_set)))
+        # Usa o charset guardado (o padrão não fica nos argumentos)
+        session_data['charset'] = charset_da_sessao(session_data)
 
     else: # Novo ataque
         if not target_file:
@@ -711,7 +1992,7 @@ def main() -> None:
         if existing_session:
 
             if existing_session['status'] == 'found':
-                print(f"[INFO] A senha para este arquivo já foi encontrada: {existing_session['found_password']}")
+                print(f"[INFO] A senha para este arquivo já foi encontrada: {exibir_senha(existing_session['found_password'] or '') or ' '.join(existing_session.get('found_keys') or [])}")
                 return
 
             if existing_session['status'] == 'no_password_needed':
@@ -719,7 +2000,10 @@ def main() -> None:
                 return
 
             if existing_session['status'] == 'running':
-                choice = input(f"Sessão 'running' encontrada para este arquivo (última atualização: {existing_session['last_update']}).\nDeseja [c]ontinuar, [s]obrescrever ou [a]bortar? ").lower()
+                # '--on-existing' evita a pergunta em execuções não interativas (scripts, pipelines)
+                choice = {'continue': 'c', 'overwrite': 's', 'abort': 'a'}.get(args.on_existing)
+                if choice is None:
+                    choice = input(f"Sessão 'running' encontrada para este arquivo (última atualização: {existing_session['last_update']}).\nDeseja [c]ontinuar, [s]obrescrever ou [a]bortar? ").lower()
                 if choice == 'c':
                     # Reutiliza a lógica de continuar
                     session_data = existing_session
@@ -733,71 +2017,93 @@ def main() -> None:
         if not session_data: # Se não escolheu 'c' ou não havia sessão
             print("Iniciando nova sessão...")
             # Define o tipo de ficheiro
-            file_type = None
-            if target_file.lower().endswith('.zip'):
-                file_type = 'zip'
-            elif target_file.lower().endswith('.rar'):
-                file_type = 'rar'
-            else:
-                print(f"[ERRO] Formato de ficheiro não suportado: '{file_path}'. Use .zip ou .rar.")
+            file_type = tipo_do_arquivo(target_file)
+            if not file_type:
+                print(f"[ERRO] Formato de ficheiro não suportado: '{target_file}'. Use .zip, .rar ou .7z.")
                 return
 
             if not os.path.exists(target_file):
                 print(f"[ERRO] O ficheiro '{target_file}' não foi encontrado.")
                 return
 
+            if args.known_plaintext and file_type != 'zip':
+                print("[ERRO] O ataque de texto claro conhecido só se aplica a arquivos .zip (ZipCrypto).")
+                return
+
+            plano = None
+            if args.plan or args.hybrid:
+                if args.known_plaintext or (args.plan and args.hybrid):
+                    print("[ERRO] '--plan', '--hybrid' e '--known-plaintext' não podem ser usados em conjunto.")
+                    return
+                try:
+                    if args.plan:
+                        plano = carregar_plano(args.plan)
+                    else:
+                        fase = {'type': 'hybrid', 'wordlist': args.hybrid[0], 'mask': args.hybrid[1], 'position': 'prepend' if args.hybrid_prepend else 'append'}
+                        plano = validar_plano({'phases': [fase]}, os.getcwd())
+                except (OSError, ValueError) as e:
+                    print(f"[ERRO] Plano de ataque inválido: {e}")
+                    return
+
             # Constrói o charset a partir dos argumentos
-            char_set = set()
-            if args.alphanum: char_set.update(list(string.ascii_letters + string.digits))
-            if args.digitos: char_set.update(list(string.digits))
-            if args.lowercase: char_set.update(list(string.ascii_lowercase))
-            if args.uppercase: char_set.update(list(string.ascii_uppercase))
-            if args.letters: char_set.update(list(string.ascii_letters))
-            if args.simbolos: char_set.update(list(string.punctuation))
-            if not char_set: # Padrão
+            charset_args = {
+                "digits": args.digitos,
+                "letters": args.letters,
+                "lowercase": args.lowercase,
+                "uppercase": args.uppercase,
+                "symbols": args.simbolos,
+                "alphanum": args.alphanum
+            }
+            charset = construir_charset(charset_args)
+            if not charset: # Padrão
                 print("Nenhum conjunto de caracteres especificado. Usando alfanumérico + símbolos por padrão.")
-                char_set.update(list(string.ascii_letters + string.digits + string.punctuation))
-            charset = "".join(sorted(list(char_set)))
+                charset = "".join(sorted(string.ascii_letters + string.digits + string.punctuation))
+
+            known_plaintext = None
+            if args.known_plaintext:
+                known_plaintext = {
+                    "plaintext_file": os.path.abspath(args.known_plaintext),
+                    "offset": args.kp_offset,
+                    "entry": args.kp_entry,
+                    "output_dir": args.kp_output,
+                    "invert": args.kp_invert
+                }
 
             # Cria a nova estrutura de dados da sessão
-            session_data = {
-                "target_file": os.path.abspath(target_file),
-                "file_type": file_type,
-                "charset_args": {
-                    "digits": args.digitos,
-                    "letters": args.letters,
-                    "lowercase": args.lowercase,
-                    "uppercase": args.uppercase,
-                    "symbols": args.simbolos,
-                    "alphanum": args.alphanum
-                },
-                "charset": charset,
-                "min_len": args.min_len,
-                "max_len": args.max_len,
-                "current_len": args.min_len,
-                "last_step": args.step,
-                "status": "running",
-                "found_password": None,
-                "last_password": None,
-                "last_update": datetime.now().isoformat()
-            }
+            session_data = nova_sessao(target_file, file_type, charset_args, charset, args.min_len, args.max_len, args.step, plano, args.plan, known_plaintext)
             session_manager.update_session(target_file, session_data)
             print("Nova sessão criada.")
 
     # Execução
     print("-" * 50)
-    print(f"CPU Count: {multiprocessing.cpu_count()}")
+    print(f"CPU Count: {multiprocessing.cpu_count()} (utilizáveis: {cracker_worker.cpus_efetivos()})")
+    if args.multithread:
+        print(f"Afinidade: {cracker_worker.descrever_afinidade(args.workers, AFINIDADE)}")
     print(f"Alvo: {session_data['target_file']} (Tipo: {session_data['file_type']})")
     print(f"Charset: '{session_data['charset'][:40]}...' ({len(session_data['charset'])} caracteres)")
     print(f"Comprimento: de {session_data['min_len']} a {session_data['max_len']}")
+    try:
+        backend = cracker_worker.verificador_do_arquivo(session_data['target_file'], session_data['file_type'])
+    except (OSError, ValueError) as e:
+        print(f"[ERRO] {e}")
+        return
+    print(f"Verificador: {backend.nome} - {backend.descricao}")
+    if backend.falsos_positivos:
+        print(f"[INFO] O verificador '{backend.nome}' pode aceitar senhas erradas.")
     print("-" * 50)
 
-    if args.multithread:
-        # testar_senha_paralelo(file_path, file_type, args.min_len, args.max_len, charset, args.workers, args.step, chunksize)
-        testar_senha_paralelo(session_manager, session_data, args.workers, chunksize)
-    else:
-        # testar_senha_sequencial(file_path, file_type, args.min_len, args.max_len, charset, args.step)
-        testar_senha_sequencial(session_manager, session_data)
+    metrics = None
+    if args.metrics_file or args.metrics_port is not None:
+        metrics = MetricsExporter(args.metrics_file, args.metrics_port, args.metrics_interval)
+        metrics.iniciar(session_data)
+
+    cobertura = None if args.no_coverage else CoverageLedger(args.coverage_file)
+
+    try:
+        executar_sessao(session_manager, session_data, args.workers if args.multithread else None, chunksize, metrics, cobertura)
+    finally:
+        if metrics:
+            metrics.parar()
 
 if __name__ == "__main__":
     try:
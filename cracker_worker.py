@@ -0,0 +1,1982 @@
+# -*- coding: utf-8 -*-
+"""
+Caminho crítico dos workers: verificação de senhas, gerador de candidatas e estado
+partilhado do pool. Mantido num módulo mínimo para que cada worker (e cada novo pool
+em spawn/forkserver) arranque depressa; as bibliotecas opcionais (rarfile, py7zr,
+Cryptodome, subprocess) só são importadas quando o respetivo verificador é usado.
+"""
+
+import zipfile
+import time
+import os
+import struct
+import math
+import zlib
+import json
+import hashlib
+import hmac
+import threading
+import contextlib
+
+# -----------------------------------------------------------------------------
+# VERIFICAÇÃO DE SENHAS
+# -----------------------------------------------------------------------------
+# Estágios atingidos por uma senha candidata durante a verificação
+ESTAGIO_REJEITADA = 0   # Rejeitada logo no cabeçalho (check byte / senha errada)
+ESTAGIO_CABECALHO = 1   # Passou o cabeçalho, mas falhou nos dados (descompressão/CRC)
+ESTAGIO_FINAL = 2       # Passou todas as verificações (senha correta)
+
+# As candidatas são bytes e podem não ser UTF-8 válido (ex.: listas de palavras em latin-1):
+# o texto reportado usa 'surrogateescape' para que os bytes originais sejam recuperáveis
+def texto_da_senha(senha: bytes | bytearray) -> str:
+    """Converte uma candidata em texto sem perdas (bytes inválidos viram surrogates)."""
+    return bytes(senha).decode('utf-8', 'surrogateescape')
+
+def bytes_da_senha(texto: str) -> bytes:
+    """Inverso de 'texto_da_senha': recupera os bytes exatos da candidata."""
+    return texto.encode('utf-8', 'surrogateescape')
+
+def exibir_senha(texto: str) -> str:
+    """Forma imprimível da senha: se não for UTF-8 válido, mostra os bytes como \\xNN e em hexadecimal."""
+    bruto = bytes_da_senha(texto)
+    try:
+        return bruto.decode('utf-8')
+    except UnicodeDecodeError:
+        return f"{bruto.decode('utf-8', 'backslashreplace')} (hex: {bruto.hex()})"
+
+class PasswordNotNeeded(Exception):
+    """Exceção personalizada para indicar que o arquivo não precisa de senha."""
+    pass
+
+# Testar senha RAR usando subprocess para evitar problemas de concorrência
+def testar_senha_rar_subprocess(file_path: str, senha: str) -> bool:
+    """Usa o método 'subprocess' para testar arquivos RAR. Certifique-se de que o comando 'unrar' está instalado."""
+    import subprocess
+    command = ['unrar', 't', f'-p{senha}', '-y', file_path]
+    try:
+        # Caso seja a primeira execução, verifica se o arquivo precisa de senha
+        # Não funciona como esperado, cada nova chamada ao método o atribituo é resetado
+        if (not getattr(testar_senha_rar_subprocess, 'first_run_done', False)):
+            command =  ['unrar', 't', '-y', file_path]
+            resultado = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+            if resultado.returncode == 0:
+                raise PasswordNotNeeded
+            testar_senha_rar_subprocess.first_run_done = True
+        resultado = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return resultado.returncode == 0
+    except PasswordNotNeeded:
+        raise PasswordNotNeeded(f'[INFO] O arquivo {file_path} não precisa de senha.')
+    except Exception as e:
+        if not getattr(testar_senha_rar_subprocess, 'has_printed_error', False):
+            testar_senha_rar_subprocess.has_printed_error = True
+            print(f"\n[ERRO] Ocorreu um erro ao testar o arquivo {file_path}! ({type(e).__name__}:  {str(e)}).")
+            exit(1)
+        return False
+
+# Testar senha RAR usando a biblioteca rarfile
+def testar_senha_rar_rarfile(file_path: str, senha: str) -> bool:
+    import rarfile
+    try:
+        # print(f"Testando senha RAR com rarfile: {senha}")
+        with rarfile.RarFile(file_path, 'r') as rf:
+            needs_password = rf.needs_password()
+            if not needs_password:
+                raise PasswordNotNeeded
+            rf.setpassword(senha)
+            rf.testrar()
+        return True
+    except rarfile.NoCrypto:
+        return needs_password
+    except rarfile.RarWrongPassword:
+        # print(f"Senha incorreta: {senha}")
+        return False
+    except PasswordNotNeeded:
+        raise PasswordNotNeeded(f'[INFO] O arquivo {file_path} não precisa de senha.')
+    except Exception as e:
+        # if not getattr(testar_senha_rar_rarfile, 'has_printed_error', False):
+            # testar_senha_rar_rarfile.has_printed_error = True
+        print(f"\n[ERRO] Ocorreu um erro ao testar o arquivo {file_path}! ({type(e).__name__}:  {str(e)}).")
+        return False
+
+# Testar senha ZIP usando subprocess para evitar problemas de concorrência
+def testar_senha_zip_subprocess(file_path: str, senha: str) -> bool:
+    import subprocess
+    command = ['unzip', '-t', '-P', senha, file_path]
+    try:
+        resultado = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        return resultado.returncode == 0
+    except Exception as e:
+        if not getattr(testar_senha_zip_subprocess, 'has_printed_error', False):
+            testar_senha_zip_subprocess.has_printed_error = True
+            print(f"\n[ERRO] Ocorreu um erro ao testar o arquivo {file_path}! ({type(e).__name__}:  {str(e)}).")
+            exit(1)
+        return False
+
+# Testar senha ZIP usando a biblioteca zipfile
+def testar_senha_zip_zipfile(file_path: str, senha: str) -> bool:
+    try:
+        with zipfile.ZipFile(file_path, 'r') as zf:
+            zf.read(zf.infolist()[0].filename, pwd=senha.encode('utf-8'))
+            return True
+    except Exception:
+        return False
+
+# Verifica uma senha (bytes ou bytearray) num ZIP já aberto e indica o estágio atingido
+def verificar_zip_zipfile(archive: zipfile.ZipFile, info: zipfile.ZipInfo, senha: bytes | bytearray) -> int:
+    try:
+        # O zipfile só aceita 'bytes'; é a única cópia feita por candidata
+        archive.read(info.filename, pwd=bytes(senha))
+        return ESTAGIO_FINAL
+    except RuntimeError:
+        # O zipfile levanta RuntimeError('Bad password ...') quando o check byte não confere
+        return ESTAGIO_REJEITADA
+    except Exception:
+        # Passou o check byte, mas falhou na descompressão ou no CRC
+        return ESTAGIO_CABECALHO
+
+# -----------------------------------------------------------------------------
+# GERADOR DE CANDIDATAS EM BYTES (ODÓMETRO)
+# -----------------------------------------------------------------------------
+def codificar_charset(charset: str) -> bytes:
+    """Codifica o charset em UTF-8, exigindo um byte por caractere (largura fixa)."""
+    codificado = charset.encode('utf-8')
+    if len(codificado) != len(charset):
+        raise ValueError("O gerador de candidatas requer caracteres de um único byte no charset.")
+    return codificado
+
+def indice_para_digitos(indice: int, bases: list[int]) -> list[int]:
+    """Converte um índice do espaço de chaves nos dígitos do odómetro (mais significativo primeiro)."""
+    digitos = [0] * len(bases)
+    for pos in range(len(bases) - 1, -1, -1):
+        indice, digitos[pos] = divmod(indice, bases[pos])
+    return digitos
+
+def gerar_candidatas_bytes(alfabetos: list[bytes], inicio: int = 0, fim: int | None = None):
+    """
+    Gera as candidatas do intervalo [inicio, fim) na mesma ordem de itertools.product,
+    incrementando um odómetro sobre os alfabetos já codificados (um por posição).
+    É devolvida SEMPRE a mesma 'bytearray', alterada no lugar: quem precisar de guardar
+    uma candidata deve copiá-la (ex.: bytes(senha) ou senha.decode()).
+    """
+    bases = [len(a) for a in alfabetos]
+    total = math.prod(bases)
+    fim = total if fim is None else min(fim, total)
+    if inicio >= fim:
+        return
+
+    digitos = indice_para_digitos(inicio, bases)
+    senha = bytearray(a[d] for a, d in zip(alfabetos, digitos))
+    ultima = len(senha) - 1
+    alfabeto_ultima = alfabetos[ultima]
+    restantes = fim - inicio
+
+    while True:
+        # Percorre diretamente a última posição, a que muda a cada candidata
+        d = digitos[ultima]
+        n = min(bases[ultima] - d, restantes)
+        for c in alfabeto_ultima[d:d + n]:
+            senha[ultima] = c
+            yield senha
+        restantes -= n
+        if not restantes:
+            return
+
+        # "Vai um": propaga o transporte para as posições anteriores
+        digitos[ultima] = 0
+        pos = ultima - 1
+        while True:
+            digitos[pos] += 1
+            if digitos[pos] < bases[pos]:
+                senha[pos] = alfabetos[pos][digitos[pos]]
+                break
+            digitos[pos] = 0
+            senha[pos] = alfabetos[pos][0]
+            pos -= 1
+
+# -----------------------------------------------------------------------------
+# VERIFICADOR ZIPCRYPTO COM REAPROVEITAMENTO DE PREFIXOS
+# -----------------------------------------------------------------------------
+def _gerar_tabela_crc32() -> list[int]:
+    tabela = []
+    for i in range(256):
+        c = i
+        for _ in range(8):
+            c = (c >> 1) ^ 0xEDB88320 if c & 1 else c >> 1
+        tabela.append(c)
+    return tabela
+
+CRC32_TABELA = _gerar_tabela_crc32()
+ZIPCRYPTO_CHAVES_INICIAIS = (0x12345678, 0x23456789, 0x34567890)
+
+def zipcrypto_atualizar(chaves: tuple[int, int, int], c: int) -> tuple[int, int, int]:
+    """Atualiza as três chaves internas do ZipCrypto com um byte (de senha ou texto claro)."""
+    k0, k1, k2 = chaves
+    k0 = (k0 >> 8) ^ CRC32_TABELA[(k0 ^ c) & 0xff]
+    k1 = ((k1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+    k2 = (k2 >> 8) ^ CRC32_TABELA[(k2 ^ (k1 >> 24)) & 0xff]
+    return (k0, k1, k2)
+
+def ler_dados_entrada(file_path: str, info: zipfile.ZipInfo, tamanho: int | None = None) -> bytes:
+    """Lê os dados (cifrados/comprimidos) de uma entrada, logo a seguir ao seu cabeçalho local."""
+    with open(file_path, 'rb') as f:
+        f.seek(info.header_offset)
+        cabecalho_local = f.read(30)
+        tam_nome, tam_extra = struct.unpack('<HH', cabecalho_local[26:30])
+        f.seek(info.header_offset + 30 + tam_nome + tam_extra)
+        return f.read(info.compress_size if tamanho is None else tamanho)
+
+def zipcrypto_decifrar(chaves: tuple[int, int, int], dados: bytes) -> tuple[bytes, tuple[int, int, int]]:
+    """Decifra 'dados' a partir do estado 'chaves'. Retorna o texto claro e o estado final."""
+    crc = CRC32_TABELA
+    k0, k1, k2 = chaves
+    claro = bytearray(len(dados))
+    for i, c in enumerate(dados):
+        t = (k2 | 2) & 0xffff
+        p = c ^ (((t * (t ^ 1)) >> 8) & 0xff)
+        claro[i] = p
+        k0 = (k0 >> 8) ^ crc[(k0 ^ p) & 0xff]
+        k1 = ((k1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+        k2 = (k2 >> 8) ^ crc[(k2 ^ (k1 >> 24)) & 0xff]
+    return bytes(claro), (k0, k1, k2)
+
+class _DescompressorLZMAZip:
+    """
+    LZMA dentro de um ZIP (método 14): 2 bytes de versão, 2 bytes com o tamanho das
+    propriedades e as propriedades do LZMA1, seguidos do fluxo LZMA1 em bruto.
+    """
+    def __init__(self):
+        self._cabecalho = b''
+        self._lzma = None
+
+    def decompress(self, dados: bytes) -> bytes:
+        if self._lzma is None:
+            self._cabecalho += dados
+            if len(self._cabecalho) < 4:
+                return b''
+            tam_props = struct.unpack_from('<H', self._cabecalho, 2)[0]
+            if len(self._cabecalho) < 4 + tam_props:
+                return b''
+            props = self._cabecalho[4:4 + tam_props]
+            if len(props) < 5:
+                raise ValueError("Propriedades LZMA inválidas.")
+            import lzma
+            self._lzma = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[{
+                'id': lzma.FILTER_LZMA1, 'lc': props[0] % 9, 'lp': (props[0] // 9) % 5, 'pb': props[0] // 45,
+                'dict_size': struct.unpack_from('<I', props, 1)[0]}])
+            dados, self._cabecalho = self._cabecalho[4 + tam_props:], b''
+        return self._lzma.decompress(dados)
+
+# Métodos de compressão ZIP que a confirmação e a extração sabem descomprimir
+ZIP_METODOS_SUPORTADOS = {zipfile.ZIP_STORED: 'store', zipfile.ZIP_DEFLATED: 'deflate',
+                          zipfile.ZIP_BZIP2: 'bzip2', zipfile.ZIP_LZMA: 'lzma'}
+
+def descompressor_zip(metodo: int):
+    """
+    Descompressor incremental (com 'decompress') para o método de compressão de uma entrada
+    ZIP, ou None se não for comprimida. Levanta ValueError se o método não for suportado.
+    """
+    if metodo not in ZIP_METODOS_SUPORTADOS:
+        raise ValueError(f"Método de compressão ZIP não suportado: {metodo}.")
+    if metodo == zipfile.ZIP_DEFLATED:
+        return zlib.decompressobj(-15)
+    if metodo == zipfile.ZIP_BZIP2:
+        import bz2
+        return bz2.BZ2Decompressor()
+    if metodo == zipfile.ZIP_LZMA:
+        return _DescompressorLZMAZip()
+    return None
+
+# Tamanho dos blocos decifrados na confirmação: uma senha errada falha quase sempre no primeiro
+ZIP_BLOCO_CONFIRMACAO = 1 << 14
+
+class VerificadorZipCrypto:
+    """
+    Verifica senhas de uma entrada ZipCrypto percorrendo o espaço de chaves em profundidade.
+    O estado das chaves após cada prefixo fica em cache, pelo que cada candidata custa uma
+    única atualização de chaves mais a verificação do cabeçalho de encriptação (12 bytes).
+    As candidatas que passam o check byte (~1/256) são confirmadas decifrando a entrada.
+    Só precisa dos metadados da entrada (ver 'carregar_metadados'), não do diretório central.
+    """
+    def __init__(self, file_path: str, entrada: dict):
+        self.file_path = file_path
+        self.entrada = entrada
+        self.cabecalho = bytes.fromhex(entrada['cabecalho'])
+        self.check_byte = entrada['check_byte']
+        # Um método de compressão desconhecido é um erro já aqui: a confirmação falharia sempre
+        descompressor_zip(entrada['compress_type'])
+
+    @staticmethod
+    def suporta(info: zipfile.ZipInfo) -> bool:
+        """Indica se a entrada usa a encriptação tradicional (ZipCrypto)."""
+        encriptada = info.flag_bits & 0x01
+        forte = info.flag_bits & 0x40
+        return bool(encriptada) and not forte and info.compress_type != 99 # 99 = AES (WinZip)
+
+    def testar_intervalo(self, alfabetos: list[bytes], inicio: int, fim: int, sinal_parada=None) -> tuple[bytes | None, int, int, bytes | None]:
+        """
+        Testa as candidatas do intervalo [inicio, fim), na ordem do odómetro. Retorna a
+        senha encontrada (ou None), quantas foram testadas, quantas passaram o check byte
+        e a última testada.
+        """
+        bases = [len(a) for a in alfabetos]
+        fim = min(fim, math.prod(bases))
+        if inicio >= fim:
+            return (None, 0, 0, None)
+
+        crc = CRC32_TABELA
+        cabecalho = self.cabecalho[:11]
+        ultimo_byte = self.cabecalho[11]
+        check_byte = self.check_byte
+
+        ultima_pos = len(alfabetos) - 1
+        alfabeto_ultima = alfabetos[ultima_pos]
+        digitos = indice_para_digitos(inicio, bases)
+
+        # estados[d] = chaves após os primeiros 'd' caracteres da candidata
+        estados = [ZIPCRYPTO_CHAVES_INICIAIS] * (ultima_pos + 1)
+        for d in range(1, ultima_pos + 1):
+            estados[d] = zipcrypto_atualizar(estados[d - 1], alfabetos[d - 1][digitos[d - 1]])
+
+        testadas = 0
+        passaram = 0
+        restantes = fim - inicio
+
+        while True:
+            p0, p1, p2 = estados[ultima_pos]
+            d = digitos[ultima_pos]
+            n = min(bases[ultima_pos] - d, restantes)
+
+            for c in alfabeto_ultima[d:d + n]:
+                # Outro worker já encontrou a senha
+                if sinal_parada is not None and sinal_parada.value:
+                    return (None, testadas, passaram, self._candidata(alfabetos, bases, inicio + testadas - 1) if testadas else None)
+                testadas += 1
+
+                # Única atualização de chaves da candidata: o último caractere
+                k0 = (p0 >> 8) ^ crc[(p0 ^ c) & 0xff]
+                k1 = ((p1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+                k2 = (p2 >> 8) ^ crc[(p2 ^ (k1 >> 24)) & 0xff]
+
+                # Decifra os 11 primeiros bytes do cabeçalho de encriptação
+                for b in cabecalho:
+                    t = (k2 | 2) & 0xffff
+                    b ^= ((t * (t ^ 1)) >> 8) & 0xff
+                    k0 = (k0 >> 8) ^ crc[(k0 ^ b) & 0xff]
+                    k1 = ((k1 + (k0 & 0xff)) * 134775813 + 1) & 0xffffffff
+                    k2 = (k2 >> 8) ^ crc[(k2 ^ (k1 >> 24)) & 0xff]
+
+                t = (k2 | 2) & 0xffff
+                if ultimo_byte ^ (((t * (t ^ 1)) >> 8) & 0xff) != check_byte:
+                    continue
+
+                # Passou o check byte: confirma com a descompressão e o CRC
+                passaram += 1
+                senha = bytes(alfabetos[i][digitos[i]] for i in range(ultima_pos)) + bytes((c,))
+                if self.confirmar(senha):
+                    return (senha, testadas, passaram, senha)
+
+            restantes -= n
+            if not restantes:
+                break
+
+            # "Vai um" no odómetro
+            digitos[ultima_pos] = 0
+            pos = ultima_pos - 1
+            while True:
+                digitos[pos] += 1
+                if digitos[pos] < bases[pos]:
+                    break
+                digitos[pos] = 0
+                pos -= 1
+
+            # Recalcula apenas os estados dos prefixos que mudaram
+            for d in range(pos + 1, ultima_pos + 1):
+                estados[d] = zipcrypto_atualizar(estados[d - 1], alfabetos[d - 1][digitos[d - 1]])
+
+        return (None, testadas, passaram, self._candidata(alfabetos, bases, fim - 1))
+
+    def verificar(self, senha: bytes | bytearray) -> int:
+        """Verifica uma candidata isolada (listas de palavras), sem a cache de prefixos."""
+        chaves = ZIPCRYPTO_CHAVES_INICIAIS
+        for c in senha:
+            chaves = zipcrypto_atualizar(chaves, c)
+        claro, _ = zipcrypto_decifrar(chaves, self.cabecalho)
+        if claro[11] != self.check_byte:
+            return ESTAGIO_REJEITADA
+        return ESTAGIO_FINAL if self.confirmar(bytes(senha)) else ESTAGIO_CABECALHO
+
+    def confirmar(self, senha: bytes) -> bool:
+        """
+        Confirma uma candidata que passou o check byte: decifra, descomprime e calcula o CRC
+        bloco a bloco, abandonando ao primeiro erro de descompressão.
+        """
+        chaves = ZIPCRYPTO_CHAVES_INICIAIS
+        for c in senha:
+            chaves = zipcrypto_atualizar(chaves, c)
+
+        entrada = self.entrada
+        crc = 0
+        descompressor = descompressor_zip(entrada['compress_type'])
+        try:
+            with open(self.file_path, 'rb') as f:
+                f.seek(entrada['data_offset'])
+                restantes = entrada['compress_size']
+                ignorar = len(self.cabecalho)
+                while restantes > 0:
+                    bloco = f.read(min(restantes, ZIP_BLOCO_CONFIRMACAO))
+                    if not bloco:
+                        return False
+                    restantes -= len(bloco)
+                    claro, chaves = zipcrypto_decifrar(chaves, bloco)
+                    if ignorar:
+                        claro, ignorar = claro[ignorar:], 0
+                    if descompressor:
+                        claro = descompressor.decompress(claro)
+                    crc = zlib.crc32(claro, crc)
+                if hasattr(descompressor, 'flush'):
+                    crc = zlib.crc32(descompressor.flush(), crc)
+        except Exception:
+            # Dados inválidos para o método de compressão: senha errada
+            return False
+        return crc == entrada['crc']
+
+    @staticmethod
+    def _candidata(alfabetos: list[bytes], bases: list[int], indice: int) -> bytes:
+        return bytes(a[d] for a, d in zip(alfabetos, indice_para_digitos(indice, bases)))
+
+# -----------------------------------------------------------------------------
+# ATAQUE DE TEXTO CLARO CONHECIDO AO ZIPCRYPTO (BIHAM–KOCHER)
+# -----------------------------------------------------------------------------
+# Recupera as três chaves internas do ZipCrypto a partir de texto claro conhecido de uma
+# entrada, em tempo independente do comprimento da senha. Segue a variante do ataque
+# usada pelo bkcrack: redução das chaves Z com o keystream e exploração das listas Z/Y/X.
+KP_TAMANHO_MINIMO = 12  # Bytes contíguos de texto claro necessários
+KP_CONTIGUOS = 8        # Posições consecutivas usadas pelo ataque propriamente dito
+KP_CABECALHO = 12       # Tamanho do cabeçalho de encriptação de cada entrada
+
+ZIPCRYPTO_MULT = 0x08088405
+ZIPCRYPTO_MULTINV = 0xD94FA8CD # Inverso de MULT módulo 2^32
+
+_M32 = 0xffffffff
+_MASK_2_32 = 0xfffffffc
+_MASK_8_32 = 0xffffff00
+_MASK_10_32 = 0xfffffc00
+_MASK_24_32 = 0xff000000
+_MASK_26_32 = 0xfc000000
+# Diferença máxima entre A e B[x,32) sabendo que A = B + b, com b um byte
+_MAXDIFF_0_24 = 0x00ffffff + 0xff
+_MAXDIFF_0_26 = 0x03ffffff + 0xff
+
+_TABELAS_KP = None
+
+def _tabelas_kp() -> tuple:
+    """Constrói (uma única vez) as tabelas auxiliares do ataque."""
+    global _TABELAS_KP
+    if _TABELAS_KP is None:
+        # CRC32 inverso, indexado pelo byte mais significativo de cada entrada da tabela
+        crc_inv = [0] * 256
+        for b in range(256):
+            crc_inv[CRC32_TABELA[b] >> 24] = ((CRC32_TABELA[b] << 8) ^ b) & _M32
+
+        # Produtos por MULT^-1 e as "fibras" dos seus bytes mais significativos
+        multinv = [(ZIPCRYPTO_MULTINV * x) & _M32 for x in range(256)]
+        fibra2 = [[] for _ in range(256)]
+        fibra3 = [[] for _ in range(256)]
+        for x in range(256):
+            m = multinv[x] >> 24
+            fibra2[m].append(x)
+            fibra2[(m + 1) & 0xff].append(x)
+            fibra3[(m - 1) & 0xff].append(x)
+            fibra3[m].append(x)
+            fibra3[(m + 1) & 0xff].append(x)
+
+        # Para cada byte de keystream, os valores de Z[2,16) que o produzem, agrupados por Z[10,16)
+        keystream_inv = [[[] for _ in range(64)] for _ in range(256)]
+        for z in range(0, 1 << 16, 4):
+            k = (((z | 2) * (z | 3)) >> 8) & 0xff
+            keystream_inv[k][z >> 10].append(z)
+
+        _TABELAS_KP = (crc_inv, multinv, fibra2, fibra3, keystream_inv)
+    return _TABELAS_KP
+
+def zipcrypto_keystream(k2: int) -> int:
+    """Byte de keystream gerado pela chave 2."""
+    t = (k2 | 2) & 0xffff
+    return ((t * (t ^ 1)) >> 8) & 0xff
+
+def zipcrypto_recuar(chaves: tuple[int, int, int], c: int) -> tuple[int, int, int]:
+    """Operação inversa de zipcrypto_atualizar: desfaz a atualização com o byte 'c'."""
+    crc_inv = _tabelas_kp()[0]
+    k0, k1, k2 = chaves
+    k2 = ((k2 << 8) & _M32) ^ crc_inv[k2 >> 24] ^ (k1 >> 24)
+    k1 = (((k1 - 1) * ZIPCRYPTO_MULTINV) - (k0 & 0xff)) & _M32
+    k0 = ((k0 << 8) & _M32) ^ crc_inv[k0 >> 24] ^ c
+    return (k0, k1, k2)
+
+def zipcrypto_recuar_cifrado(chaves: tuple[int, int, int], c: int) -> tuple[int, int, int]:
+    """Recua um byte cifrado: o texto claro é obtido com o keystream do estado anterior."""
+    crc_inv = _tabelas_kp()[0]
+    k0, k1, k2 = chaves
+    k2 = ((k2 << 8) & _M32) ^ crc_inv[k2 >> 24] ^ (k1 >> 24)
+    k1 = (((k1 - 1) * ZIPCRYPTO_MULTINV) - (k0 & 0xff)) & _M32
+    k0 = ((k0 << 8) & _M32) ^ crc_inv[k0 >> 24] ^ c ^ zipcrypto_keystream(k2)
+    return (k0, k1, k2)
+
+def reduzir_chaves_z(keystream: bytes, progresso=None) -> tuple[int, list[int]]:
+    """
+    Gera os 2^22 candidatos de Z[2,32) para o último byte de keystream e reduz a lista
+    recuando byte a byte. Retorna o índice e a lista mais pequena encontrados.
+    """
+    crc_inv, _, _, _, keystream_inv = _tabelas_kp()
+    indice = len(keystream) - 1
+    filtro = keystream_inv[keystream[indice]]
+    zs = [(alto << 10) | baixo for alto in range(1 << 22) for baixo in filtro[alto & 0x3f]]
+    melhor_indice, melhor = indice, zs
+
+    for i in range(indice, KP_CONTIGUOS - 1, -1):
+        filtro = keystream_inv[keystream[i - 1]]
+        vistos = bytearray(1 << 22)
+        anteriores = []
+        for z in zs:
+            # Z{i-1}[10,32) obtém-se de Z{i}[2,32) pelo CRC32 inverso
+            zm1 = (((z << 8) & _M32) ^ crc_inv[z >> 24]) & _MASK_10_32
+            chave = zm1 >> 10
+            if not vistos[chave]:
+                vistos[chave] = 1
+                for baixo in filtro[chave & 0x3f]:
+                    anteriores.append(zm1 | baixo)
+        zs = anteriores
+
+        if len(zs) <= len(melhor):
+            melhor_indice, melhor = i - 1, zs
+        if progresso:
+            progresso(indice - i + 1, len(zs))
+
+    return melhor_indice, melhor
+
+class AtaqueTextoClaro:
+    """
+    Explora as listas Z/Y/X a partir de um candidato Z[2,32) na posição 'indice_z' e
+    devolve as chaves internas no início dos dados cifrados da entrada (antes do
+    cabeçalho de encriptação), ou seja, o estado derivado da senha.
+    """
+    def __init__(self, dados: dict, indice_z: int):
+        self.keystream = dados['keystream']
+        self.texto_claro = dados['texto_claro']
+        self.cifrado = dados['cifrado']
+        self.offset = dados['offset']
+        self.indice = indice_z + 1 - KP_CONTIGUOS
+        self.crc_inv, self.multinv, self.fibra2, self.fibra3, self.keystream_inv = _tabelas_kp()
+        self.zlist = [0] * KP_CONTIGUOS
+        self.ylist = [0] * KP_CONTIGUOS
+        self.solucoes = []
+
+    def executar(self, z7_2_32: int) -> list[tuple[int, int, int]]:
+        self.solucoes = []
+        self.zlist[7] = z7_2_32
+        self._explorar_z(7)
+        return self.solucoes
+
+    def _crc_inv(self, crc: int, b: int) -> int:
+        return ((crc << 8) & _M32) ^ self.crc_inv[crc >> 24] ^ b
+
+    def _explorar_z(self, i: int) -> None:
+        zlist, ylist = self.zlist, self.ylist
+        if i != 0:
+            # Z{i-1}[10,32) pelo CRC32 inverso e Z{i-1}[2,16) pelo byte de keystream
+            zim1_10_32 = self._crc_inv(zlist[i], 0) & _MASK_10_32
+            for zim1_2_16 in self.keystream_inv[self.keystream[self.indice + i - 1]][(zim1_10_32 >> 10) & 0x3f]:
+                zlist[i - 1] = zim1_10_32 | zim1_2_16
+                # Completa Z{i}[0,2) e deduz Y{i+1}[24,32)
+                zlist[i] &= _MASK_2_32
+                zlist[i] |= (self._crc_inv(zlist[i], 0) ^ zlist[i - 1]) >> 8
+                if i < 7:
+                    ylist[i + 1] = ((self._crc_inv(zlist[i + 1], 0) ^ zlist[i]) << 24) & _M32
+                self._explorar_z(i - 1)
+            return
+
+        self._explorar_y()
+
+    def _explorar_y(self) -> None:
+        """
+        Com a lista Z completa, percorre Y7[8,24) mantendo prod = (Y7[8,32) - 1) * MULT^-1
+        e explora as listas Y/X (posições 7 a 3). Os níveis estão desenrolados em ciclos
+        encaixados, com variáveis locais, por ser o caminho mais quente do ataque.
+        """
+        ylist, zlist = self.ylist, self.zlist
+        multinv, fibra2, fibra3, crc_inv = self.multinv, self.fibra2, self.fibra3, self.crc_inv
+        minv = ZIPCRYPTO_MULTINV
+        M, MAXDIFF = _M32, _MAXDIFF_0_24
+
+        texto_claro, indice = self.texto_claro, self.indice
+        p4, p5, p6 = texto_claro[indice + 4], texto_claro[indice + 5], texto_claro[indice + 6]
+        p3 = texto_claro[indice + 3]
+        crc = CRC32_TABELA
+        mask_8_32, MAXDIFF_26 = _MASK_8_32, _MAXDIFF_0_26
+
+        # Y1[26,32), usado para validar X3
+        z1 = zlist[1]
+        y1_26_32 = (((((z1 << 8) & M) ^ crc_inv[z1 >> 24]) ^ zlist[0]) << 24) & _MASK_26_32
+
+        # Bytes mais significativos de Y2..Y7, deduzidos da lista Z
+        y2_hi = ylist[2] & _MASK_24_32
+        y3_hi, y4_hi, y5_hi, y6_hi = (ylist[i] & _MASK_24_32 for i in range(3, 7))
+        msb3, msb4, msb5, msb6 = (ylist[i] >> 24 for i in range(3, 7))
+        y7_24_32 = ylist[7] & _MASK_24_32
+
+        prod = ((multinv[ylist[7] >> 24] << 24) - minv) & M
+        passo = (minv << 8) & M
+        for y7_8_24 in range(0, 1 << 24, 1 << 8):
+            for y7_0_8 in fibra3[(msb6 - (prod >> 24)) & 0xff]:
+                # Filtra Y7[0,8) com Y6[24,32); fy7 = (Y7 - 1) * MULT^-1
+                fy7 = (prod + multinv[y7_0_8]) & M
+                if ((fy7 - y6_hi) & M) > MAXDIFF:
+                    continue
+                y7 = y7_0_8 | y7_8_24 | y7_24_32
+
+                # Nível 7: X7[0,8) e Y6
+                ffy7 = ((fy7 - 1) * minv) & M
+                for x7 in fibra2[((ffy7 - y5_hi) & M) >> 24]:
+                    y6 = (fy7 - x7) & M
+                    if ((ffy7 - multinv[x7] - y5_hi) & M) > MAXDIFF or (y6 >> 24) != msb6:
+                        continue
+
+                    # Nível 6: X6[0,8) e Y5
+                    fy6 = ((y6 - 1) * minv) & M
+                    ffy6 = ((fy6 - 1) * minv) & M
+                    for x6 in fibra2[((ffy6 - y4_hi) & M) >> 24]:
+                        y5 = (fy6 - x6) & M
+                        if ((ffy6 - multinv[x6] - y4_hi) & M) > MAXDIFF or (y5 >> 24) != msb5:
+                            continue
+
+                        # Nível 5: X5[0,8) e Y4
+                        fy5 = ((y5 - 1) * minv) & M
+                        ffy5 = ((fy5 - 1) * minv) & M
+                        for x5 in fibra2[((ffy5 - y3_hi) & M) >> 24]:
+                            y4 = (fy5 - x5) & M
+                            if ((ffy5 - multinv[x5] - y3_hi) & M) > MAXDIFF or (y4 >> 24) != msb4:
+                                continue
+
+                            # Nível 4: X4[0,8) e Y3
+                            fy4 = ((y4 - 1) * minv) & M
+                            ffy4 = ((fy4 - 1) * minv) & M
+                            for x4 in fibra2[((ffy4 - y2_hi) & M) >> 24]:
+                                y3 = (fy4 - x4) & M
+                                if ((ffy4 - multinv[x4] - y2_hi) & M) > MAXDIFF or (y3 >> 24) != msb3:
+                                    continue
+
+                                # Calcula X7 completo a partir dos bytes menos significativos X4..X7[0,8)
+                                x = (((x4 >> 8) ^ crc[(x4 ^ p4) & 0xff]) & mask_8_32) | x5
+                                x = (((x >> 8) ^ crc[(x ^ p5) & 0xff]) & mask_8_32) | x6
+                                x7_completo = (((x >> 8) ^ crc[(x ^ p6) & 0xff]) & mask_8_32) | x7
+
+                                # Recua até X3 e verifica que é compatível com Y1[26,32)
+                                x = ((x7_completo << 8) & M) ^ crc_inv[x7_completo >> 24] ^ p6
+                                x = ((x << 8) & M) ^ crc_inv[x >> 24] ^ p5
+                                x = ((x << 8) & M) ^ crc_inv[x >> 24] ^ p4
+                                x3 = ((x << 8) & M) ^ crc_inv[x >> 24] ^ p3
+                                if ((((y3 - 1) * minv - (x3 & 0xff) - 1) * minv - y1_26_32) & M) > MAXDIFF_26:
+                                    continue
+
+                                ylist[3], ylist[4], ylist[5], ylist[6], ylist[7] = y3, y4, y5, y6, y7
+                                self._testar_chaves(x3, x7_completo)
+            prod = (prod + passo) & M
+
+    def _testar_chaves(self, x3: int, x7: int) -> None:
+        """Valida as listas candidatas decifrando o resto do texto claro conhecido."""
+        ylist, zlist = self.ylist, self.zlist
+        texto_claro, cifrado, offset, indice = self.texto_claro, self.cifrado, self.offset, self.indice
+
+        # Decifra o resto do texto claro conhecido para a frente...
+        chaves = zipcrypto_atualizar((x7, ylist[7], zlist[7]), texto_claro[indice + 7])
+        for j in range(indice + 8, len(texto_claro)):
+            if cifrado[offset + j] ^ zipcrypto_keystream(chaves[2]) != texto_claro[j]:
+                return
+            chaves = zipcrypto_atualizar(chaves, texto_claro[j])
+
+        # ... e para trás
+        chaves = (x3, ylist[3], zlist[3])
+        for j in range(indice + 2, -1, -1):
+            chaves = zipcrypto_recuar_cifrado(chaves, cifrado[offset + j])
+            if cifrado[offset + j] ^ zipcrypto_keystream(chaves[2]) != texto_claro[j]:
+                return
+
+        # Chaves encontradas: recua até ao início dos dados cifrados da entrada
+        for j in range(offset - 1, -1, -1):
+            chaves = zipcrypto_recuar_cifrado(chaves, cifrado[j])
+        self.solucoes.append(chaves)
+
+# -----------------------------------------------------------------------------
+# VERIFICADORES COM DERIVAÇÃO DE CHAVE (AES-ZIP, RAR5, 7Z)
+# -----------------------------------------------------------------------------
+# O custo destes formatos está quase todo na derivação da chave (PBKDF2 / SHA-256 iterado),
+# que o hashlib executa sem o GIL: podem correr em threads de um só processo, partilhando
+# o estado do arquivo, em vez de pagarem a serialização e o arranque de um pool de processos.
+AES_ITERACOES = 1000
+AES_TAMANHOS_CHAVE = {1: 16, 2: 24, 3: 32}
+AES_TAMANHO_MAC = 10
+
+class VerificadorAESZip:
+    """
+    WinZip AES (AE-1/AE-2): PBKDF2-HMAC-SHA1 com 1000 iterações produz a chave AES, a chave
+    do HMAC e um verificador de 2 bytes. As candidatas que passam o verificador (1 em 65536)
+    são confirmadas pelo HMAC-SHA1 dos dados cifrados, guardado no fim da entrada.
+    """
+    def __init__(self, file_path: str, entrada: dict):
+        aes = entrada['aes']
+        self.file_path = file_path
+        self.tam_chave = AES_TAMANHOS_CHAVE[aes['forca']]
+        self.salt = bytes.fromhex(aes['salt'])
+        self.verificador = bytes.fromhex(aes['verificador'])
+        self.inicio_dados = entrada['data_offset'] + len(self.salt) + 2
+        self.tam_dados = entrada['compress_size'] - len(self.salt) - 2 - AES_TAMANHO_MAC
+
+    @staticmethod
+    def suporta(entrada: dict | None) -> bool:
+        return bool(entrada) and entrada['encriptacao'] == 'aes' and entrada.get('aes', {}).get('forca') in AES_TAMANHOS_CHAVE
+
+    def verificar(self, senha: bytes | bytearray) -> int:
+        chave = hashlib.pbkdf2_hmac('sha1', senha, self.salt, AES_ITERACOES, 2 * self.tam_chave + 2)
+        if chave[-2:] != self.verificador:
+            return ESTAGIO_REJEITADA
+        return ESTAGIO_FINAL if self.confirmar(chave[self.tam_chave:2 * self.tam_chave]) else ESTAGIO_CABECALHO
+
+    def confirmar(self, chave_mac: bytes) -> bool:
+        """Compara o HMAC-SHA1 (truncado a 10 bytes) dos dados cifrados com o guardado na entrada."""
+        mac = hmac.new(chave_mac, digestmod='sha1')
+        with open(self.file_path, 'rb') as f:
+            f.seek(self.inicio_dados)
+            restante = self.tam_dados
+            while restante > 0:
+                bloco = f.read(min(restante, 4 * ZIP_BLOCO_CONFIRMACAO))
+                if not bloco:
+                    return False
+                mac.update(bloco)
+                restante -= len(bloco)
+            return hmac.compare_digest(mac.digest()[:AES_TAMANHO_MAC], f.read(AES_TAMANHO_MAC))
+
+class VerificadorRAR5:
+    """
+    RAR5: PBKDF2-HMAC-SHA256 com 2^contagem + 32 iterações, dobrado por XOR em 8 bytes e
+    comparado com o valor de verificação do cabeçalho (64 bits: sem falsos positivos práticos).
+    """
+    def __init__(self, kdf: dict):
+        self.salt = bytes.fromhex(kdf['salt'])
+        self.iteracoes = (1 << kdf['contagem']) + 32
+        self.check = bytes.fromhex(kdf['check'])[:8]
+
+    @staticmethod
+    def suporta(kdf: dict | None) -> bool:
+        # O valor de verificação é opcional e traz 4 bytes de checksum próprio
+        if not kdf or not kdf.get('check'):
+            return False
+        check = bytes.fromhex(kdf['check'])
+        return len(check) == 12 and hashlib.sha256(check[:8]).digest()[:4] == check[8:]
+
+    def verificar(self, senha: bytes | bytearray) -> int:
+        derivada = hashlib.pbkdf2_hmac('sha256', senha, self.salt, self.iteracoes)
+        dobrada = bytearray(8)
+        for i, b in enumerate(derivada):
+            dobrada[i % 8] ^= b
+        return ESTAGIO_FINAL if dobrada == self.check else ESTAGIO_REJEITADA
+
+def chave_7z(senha: bytes, salt: bytes, ciclos: int) -> bytes:
+    """
+    Chave 7zAES: SHA-256 de 2^ciclos repetições de salt + senha (UTF-16LE) + contador de 8 bytes.
+    As repetições são juntadas 256 de cada vez (o byte baixo do contador é o único que varia),
+    pelo que cada 'update' recebe alguns KiB e corre sem o GIL.
+    """
+    if ciclos == 0x3f:
+        return (salt + senha + bytes(32))[:32]
+    bloco = salt + senha
+    rondas = 1 << ciclos
+    h = hashlib.sha256()
+    if rondas < 256:
+        h.update(b''.join(bloco + i.to_bytes(8, 'little') for i in range(rondas)))
+        return h.digest()
+    prefixos = [bloco + bytes([i]) for i in range(256)]
+    for alto in range(rondas >> 8):
+        sufixo = alto.to_bytes(7, 'little')
+        h.update(sufixo.join(prefixos) + sufixo)
+    return h.digest()
+
+# Coders do 7z que o módulo lzma sabe descodificar em formato "raw" (além do LZMA/LZMA2)
+SEVENZIP_BCJ = {'03030103': 'FILTER_X86', '03030205': 'FILTER_POWERPC', '03030401': 'FILTER_IA64',
+                '03030501': 'FILTER_ARM', '03030701': 'FILTER_ARMTHUMB', '03030805': 'FILTER_SPARC'}
+
+def _descompressor_7z(cadeia: list[dict]):
+    """
+    Função de descompressão incremental para os coders de uma pasta 7z (por ordem de
+    descodificação). Levanta ValueError se algum coder não for suportado.
+    """
+    ids = [c['id'] for c in cadeia if c['id'] != '00'] # '00' é o coder "Copy"
+    if not ids:
+        return bytes
+    if ids == ['040108']:
+        return zlib.decompressobj(-15).decompress
+    if ids == ['040202']:
+        import bz2
+        return bz2.BZ2Decompressor().decompress
+
+    import lzma
+    filtros = []
+    # O lzma recebe os filtros pela ordem de compressão (LZMA/LZMA2 em último)
+    for coder in reversed(cadeia):
+        props = bytes.fromhex(coder['props'])
+        if coder['id'] == '00':
+            continue
+        elif coder['id'] == '030101':
+            filtros.append({'id': lzma.FILTER_LZMA1, 'lc': props[0] % 9, 'lp': (props[0] // 9) % 5, 'pb': props[0] // 45,
+                            'dict_size': struct.unpack_from('<I', props, 1)[0]})
+        elif coder['id'] == '21':
+            filtros.append({'id': lzma.FILTER_LZMA2, 'dict_size': min((2 | (props[0] & 1)) << (props[0] // 2 + 11), 1 << 30)})
+        elif coder['id'] == '03':
+            filtros.append({'id': lzma.FILTER_DELTA, 'dist': props[0] + 1})
+        elif coder['id'] in SEVENZIP_BCJ:
+            filtros.append({'id': getattr(lzma, SEVENZIP_BCJ[coder['id']])})
+        else:
+            raise ValueError(f"Coder 7z não suportado: {coder['id']}")
+    return lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=filtros).decompress
+
+class Verificador7z:
+    """
+    7zAES: deriva a chave (ver 'chave_7z') e decifra o primeiro bloco da pasta alvo, cujo primeiro
+    byte filtra a maioria das senhas (um fluxo LZMA começa sempre por 0; um LZMA2 por 0x01 ou
+    >= 0xE0). As restantes são confirmadas decifrando e descomprimindo a pasta e comparando o CRC.
+    """
+    def __init__(self, file_path: str, entrada: dict):
+        from Cryptodome.Cipher import AES
+        self._aes = AES
+        self.file_path = file_path
+        self.entrada = entrada
+        self.ciclos = entrada['aes']['ciclos']
+        self.salt = bytes.fromhex(entrada['aes']['salt'])
+        self.iv = bytes.fromhex(entrada['aes']['iv']).ljust(16, b'\0')
+        # Coders aplicados depois da decifração
+        self.cadeia = entrada['cadeia'][1:]
+        _descompressor_7z(self.cadeia)
+        with open(file_path, 'rb') as f:
+            f.seek(entrada['data_offset'])
+            self.primeiro_bloco = f.read(16)
+
+    @staticmethod
+    def suporta(entrada: dict | None) -> bool:
+        if not entrada or not entrada.get('aes') or entrada['compress_size'] % 16:
+            return False
+        try:
+            import Cryptodome.Cipher.AES
+            _descompressor_7z(entrada['cadeia'][1:])
+            return True
+        except (ImportError, ValueError):
+            return False
+
+    def _plausivel(self, primeiro: int) -> bool:
+        coder = self.cadeia[0]['id'] if self.cadeia else '00'
+        if coder == '00' and self.entrada['cabecalho']:
+            return primeiro == 0x01 # kHeader
+        if coder == '030101':
+            return primeiro == 0
+        if coder == '21':
+            return primeiro == 0x01 or primeiro >= 0xe0
+        return True
+
+    def verificar(self, senha: bytes | bytearray) -> int:
+        try:
+            texto = senha.decode('utf-8')
+        except UnicodeDecodeError:
+            return ESTAGIO_REJEITADA # O 7-Zip só aceita senhas Unicode (guardadas em UTF-16)
+        chave = chave_7z(texto.encode('utf-16-le'), self.salt, self.ciclos)
+        claro = self._aes.new(chave, self._aes.MODE_CBC, self.iv).decrypt(self.primeiro_bloco)
+        if not self._plausivel(claro[0]):
+            return ESTAGIO_REJEITADA
+        return ESTAGIO_FINAL if self.confirmar(chave) else ESTAGIO_CABECALHO
+
+    def confirmar(self, chave: bytes) -> bool:
+        """Decifra e descomprime a pasta alvo em blocos; compara o tamanho e o CRC (se conhecido)."""
+        entrada = self.entrada
+        cifra = self._aes.new(chave, self._aes.MODE_CBC, self.iv)
+        descomprimir = _descompressor_7z(self.cadeia)
+        por_decifrar = entrada['compress_size']
+        por_descomprimir = entrada['cadeia'][0]['tamanho']
+        por_produzir = entrada['file_size']
+        crc = 0
+        # Cabeçalho sem CRC (ex.: criado pelo py7zr): é guardado para a validação estrutural
+        cabecalho = bytearray() if entrada['cabecalho'] and entrada['crc'] is None else None
+        try:
+            with open(self.file_path, 'rb') as f:
+                f.seek(entrada['data_offset'])
+                while por_decifrar > 0 and por_produzir > 0:
+                    bloco = f.read(min(por_decifrar, 4 * ZIP_BLOCO_CONFIRMACAO))
+                    if not bloco:
+                        return False
+                    por_decifrar -= len(bloco)
+                    claro = cifra.decrypt(bloco)[:por_descomprimir]
+                    por_descomprimir -= len(claro)
+                    saida = descomprimir(claro)[:por_produzir]
+                    por_produzir -= len(saida)
+                    crc = zlib.crc32(saida, crc)
+                    if cabecalho is not None:
+                        cabecalho += saida
+        except Exception:
+            # Dados inválidos para o descompressor: senha errada
+            return False
+        if por_produzir or (entrada['crc'] is not None and crc != entrada['crc']):
+            return False
+        return cabecalho is None or _validar_cabecalho_7z(bytes(cabecalho), entrada['data_offset'])
+
+def testar_senha_7z(file_path: str, senha: str) -> bool:
+    """Alternativa com a biblioteca py7zr, para pastas que o Verificador7z não suporta."""
+    import py7zr
+    try:
+        with py7zr.SevenZipFile(file_path, 'r', password=senha) as sz:
+            if not sz.needs_password():
+                raise PasswordNotNeeded
+            # testzip() devolve o nome da primeira entrada com CRC errado (ou None)
+            return sz.testzip() is None
+    except PasswordNotNeeded:
+        raise PasswordNotNeeded(f'[INFO] O arquivo {file_path} não precisa de senha.')
+    except Exception:
+        return False
+
+def testar_senha_7z_subprocess(file_path: str, senha: str) -> bool:
+    """Usa o executável '7z t'; código 0 significa senha aceite."""
+    import subprocess
+    resultado = subprocess.run(['7z', 't', f'-p{senha}', '-y', file_path], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+    return resultado.returncode == 0
+
+# -----------------------------------------------------------------------------
+# REGISTO DE VERIFICADORES
+# -----------------------------------------------------------------------------
+# Cada backend declara os formatos e variantes que sabe verificar, se está disponível neste
+# sistema, a sua prioridade e se pode aceitar senhas erradas. Por omissão é escolhido o
+# backend correto com maior prioridade para o arquivo; VERIFICADOR_FORCADO (linha de
+# comandos) impõe outro a todo o processo e 'impor_verificador' só à thread atual.
+VERIFICADOR_FORCADO = None
+
+# Verificador imposto por thread: cada pool (e cada chamada da API) traz o seu, sem
+# alterar o global do processo
+_LOCAL = threading.local()
+
+def verificador_imposto() -> str | None:
+    """Verificador imposto à thread atual ou, na falta dele, ao processo."""
+    return getattr(_LOCAL, 'verificador', None) or VERIFICADOR_FORCADO
+
+@contextlib.contextmanager
+def impor_verificador(nome: str | None):
+    """Impõe o verificador 'nome' à thread atual durante o bloco (None mantém o padrão)."""
+    anterior = getattr(_LOCAL, 'verificador', None)
+    _LOCAL.verificador = nome or anterior
+    try:
+        yield
+    finally:
+        _LOCAL.verificador = anterior
+
+class VerificadorFuncao:
+    """Adapta uma função testar_senha_*(file_path, senha) à interface dos verificadores."""
+    def __init__(self, funcao, file_path: str):
+        self.funcao = funcao
+        self.file_path = file_path
+
+    def verificar(self, senha: bytes | bytearray) -> int:
+        return ESTAGIO_FINAL if self.funcao(self.file_path, texto_da_senha(senha)) else ESTAGIO_REJEITADA
+
+class VerificadorZipFile:
+    """Biblioteca zipfile sobre um handle aberto uma única vez (por processo)."""
+    def __init__(self, file_path: str, entrada: dict | None):
+        self.archive = zipfile.ZipFile(file_path, 'r')
+        self.info = self.archive.getinfo(entrada['nome']) if entrada else self.archive.infolist()[0]
+
+    def verificar(self, senha: bytes | bytearray) -> int:
+        return verificar_zip_zipfile(self.archive, self.info, senha)
+
+class Backend:
+    """
+    Entrada do registo. 'formatos' mapeia o tipo de arquivo nas variantes suportadas (None:
+    todas); 'prioridade' ordena os backends compatíveis com o mesmo arquivo (o menor é o
+    escolhido); 'suporta' é uma verificação adicional sobre os metadados.
+    """
+    def __init__(self, nome: str, formatos: dict, criar, prioridade: int, disponivel=None, suporta=None, falsos_positivos: bool = False, liberta_gil: bool = False, descricao: str = ''):
+        self.nome = nome
+        self.formatos = formatos
+        self.criar = criar
+        self.prioridade = prioridade
+        self._disponivel = disponivel
+        self._suporta = suporta
+        self.falsos_positivos = falsos_positivos
+        self.liberta_gil = liberta_gil
+        self.descricao = descricao
+
+    def disponivel(self) -> bool:
+        return self._disponivel is None or self._disponivel()
+
+    def suporta(self, file_type: str, metadados: dict) -> bool:
+        if file_type not in self.formatos:
+            return False
+        variantes = self.formatos[file_type]
+        if variantes is not None and variante_arquivo(file_type, metadados) not in variantes:
+            return False
+        return self._suporta is None or self._suporta(metadados)
+
+VERIFICADORES = {}
+
+def registar_verificador(backend: Backend) -> Backend:
+    VERIFICADORES[backend.nome] = backend
+    return backend
+
+def variante_arquivo(file_type: str, metadados: dict) -> str | None:
+    """Variante do arquivo: encriptação da entrada alvo (zip), versão e cabeçalhos cifrados (rar, 7z)."""
+    if file_type == 'zip':
+        return metadados['entrada']['encriptacao'] if metadados.get('entrada') else None
+    if file_type == 'rar':
+        return 'rar4' if metadados.get('versao_rar') == 4 else ('rar5-hp' if metadados.get('cabecalhos_cifrados') else 'rar5')
+    if file_type == '7z':
+        return '7z-hp' if metadados.get('cabecalhos_cifrados') else '7z'
+    return None
+
+def _comando(nome: str):
+    import shutil
+    return lambda: shutil.which(nome) is not None
+
+def _modulo(nome: str):
+    def disponivel() -> bool:
+        import importlib.util
+        return importlib.util.find_spec(nome) is not None
+    return disponivel
+
+def _rarfile_disponivel() -> bool:
+    """A rarfile delega a decifração num programa externo: só serve se houver um que aceite senhas."""
+    try:
+        import rarfile
+    except ImportError:
+        return False
+    try:
+        # bsdtar é aceite pela rarfile, mas não suporta senhas
+        return rarfile.tool_setup().setup['password'] is not None
+    except rarfile.RarCannotExec:
+        return False
+
+# Prioridade: a ordem fixa entre os backends do mesmo formato (1 é o preferido), não um tempo
+# medido. Formatos e variantes diferentes nunca competem entre si. Primeiro o verificador nativo,
+# depois os restantes pela ordem em que costumam ser mais rápidos: a py7zr reabre o arquivo a
+# cada candidata e fica atrás do comando '7z'; a rarfile vem antes do 'unrar', mas como pode
+# dar falsos positivos só é escolhida na falta dele.
+registar_verificador(Backend(
+    'zipcrypto', {'zip': {'zipcrypto'}}, lambda fp, meta: VerificadorZipCrypto(fp, meta['entrada']), 1,
+    descricao="ZipCrypto nativo (chaves dos prefixos em cache, confirmação por CRC)"))
+registar_verificador(Backend(
+    'aes-zip', {'zip': {'aes'}}, lambda fp, meta: VerificadorAESZip(fp, meta['entrada']), 1,
+    suporta=lambda meta: VerificadorAESZip.suporta(meta['entrada']), liberta_gil=True,
+    descricao="WinZip AES nativo (PBKDF2-SHA1, confirmação por HMAC)"))
+registar_verificador(Backend(
+    'zipfile', {'zip': {None, 'zipcrypto', 'outra'}}, lambda fp, meta: VerificadorZipFile(fp, meta['entrada']), 2,
+    descricao="Biblioteca zipfile do Python"))
+registar_verificador(Backend(
+    'unzip', {'zip': {None, 'zipcrypto', 'outra'}}, lambda fp, meta: VerificadorFuncao(testar_senha_zip_subprocess, fp), 3,
+    disponivel=_comando('unzip'), descricao="Comando 'unzip -t'"))
+registar_verificador(Backend(
+    'rar5', {'rar': {'rar5', 'rar5-hp'}}, lambda fp, meta: VerificadorRAR5(meta['kdf']), 1,
+    suporta=lambda meta: VerificadorRAR5.suporta(meta.get('kdf')), liberta_gil=True,
+    descricao="RAR5 nativo (PBKDF2-SHA256 e valor de verificação de 64 bits)"))
+registar_verificador(Backend(
+    'unrar', {'rar': None}, lambda fp, meta: VerificadorFuncao(testar_senha_rar_subprocess, fp), 3,
+    disponivel=_comando('unrar'), descricao="Comando 'unrar t'"))
+registar_verificador(Backend(
+    'rarfile', {'rar': None}, lambda fp, meta: VerificadorFuncao(testar_senha_rar_rarfile, fp), 2,
+    disponivel=_rarfile_disponivel, falsos_positivos=True,
+    descricao="Biblioteca rarfile"))
+registar_verificador(Backend(
+    '7z-nativo', {'7z': None}, lambda fp, meta: Verificador7z(fp, meta['entrada']), 1,
+    suporta=lambda meta: Verificador7z.suporta(meta['entrada']), liberta_gil=True,
+    descricao="7zAES nativo (filtro do primeiro byte, confirmação por CRC)"))
+registar_verificador(Backend(
+    '7z', {'7z': None}, lambda fp, meta: VerificadorFuncao(testar_senha_7z_subprocess, fp), 2,
+    disponivel=_comando('7z'), descricao="Comando '7z t'"))
+registar_verificador(Backend(
+    'py7zr', {'7z': None}, lambda fp, meta: VerificadorFuncao(testar_senha_7z, fp), 3,
+    disponivel=_modulo('py7zr'), descricao="Biblioteca py7zr"))
+
+def verificadores_compativeis(file_type: str, metadados: dict) -> list[Backend]:
+    """Backends disponíveis que suportam o arquivo, do preferido para o menos preferido."""
+    compativeis = [b for b in VERIFICADORES.values() if b.suporta(file_type, metadados) and b.disponivel()]
+    return sorted(compativeis, key=lambda b: (b.falsos_positivos, b.prioridade))
+
+def escolher_verificador(file_type: str, metadados: dict, forcado: str | None = None) -> Backend:
+    """
+    O backend correto (sem falsos positivos) com maior prioridade para o arquivo, ou o 'forcado'.
+    Levanta ValueError se nenhum servir.
+    """
+    if forcado:
+        backend = VERIFICADORES.get(forcado)
+        if backend is None:
+            raise ValueError(f"Verificador desconhecido: '{forcado}'. Disponíveis: {', '.join(VERIFICADORES)}.")
+        if not backend.suporta(file_type, metadados):
+            raise ValueError(f"O verificador '{forcado}' não suporta este arquivo ({file_type}, {variante_arquivo(file_type, metadados) or 'sem encriptação'}).")
+        if not backend.disponivel():
+            raise ValueError(f"O verificador '{forcado}' não está disponível neste sistema.")
+        return backend
+    compativeis = verificadores_compativeis(file_type, metadados)
+    if not compativeis:
+        raise ValueError(f"Nenhum verificador disponível para este arquivo ({file_type}, {variante_arquivo(file_type, metadados) or 'sem encriptação'}).")
+    return compativeis[0]
+
+# -----------------------------------------------------------------------------
+# METADADOS DE VERIFICAÇÃO (CACHE AO LADO DO ARQUIVO)
+# -----------------------------------------------------------------------------
+# Tudo o que os verificadores precisam (entrada alvo, offsets, cabeçalhos de encriptação,
+# salts e valores de verificação) é extraído uma vez e guardado em '<arquivo>.cracker-meta.json'.
+# A cache é validada pelo tamanho, mtime e hash do início e do fim do ficheiro (onde está
+# o diretório central do ZIP), pelo que execuções repetidas não voltam a ler o diretório central.
+METADADOS_VERSAO = 1
+METADADOS_SUFIXO = '.cracker-meta.json'
+ASSINATURA_BYTES = 1 << 16
+
+# Bytes da entrada alvo usados na impressão digital do conteúdo (o cabeçalho de encriptação
+# é aleatório, pelo que o início dos dados cifrados identifica o conteúdo de forma inequívoca)
+IMPRESSAO_BYTES = 1 << 20
+
+# Pode ser desativada pela linha de comandos ('--no-metadata-cache')
+USAR_CACHE_METADADOS = True
+
+RAR4_ASSINATURA = b'Rar!\x1a\x07\x00'
+RAR5_ASSINATURA = b'Rar!\x1a\x07\x01\x00'
+
+def assinatura_ficheiro(file_path: str) -> dict:
+    """Tamanho, mtime e hash do início e do fim do ficheiro."""
+    st = os.stat(file_path)
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        h.update(f.read(ASSINATURA_BYTES))
+        if st.st_size > ASSINATURA_BYTES:
+            f.seek(max(ASSINATURA_BYTES, st.st_size - ASSINATURA_BYTES))
+            h.update(f.read())
+    return {'tamanho': st.st_size, 'mtime_ns': st.st_mtime_ns, 'hash': h.hexdigest()}
+
+def _offset_dados(f, header_offset: int) -> int:
+    """Posição dos dados de uma entrada ZIP, logo a seguir ao seu cabeçalho local."""
+    f.seek(header_offset)
+    tam_nome, tam_extra = struct.unpack('<HH', f.read(30)[26:30])
+    return header_offset + 30 + tam_nome + tam_extra
+
+def extrair_metadados_zip(file_path: str) -> dict:
+    """
+    Lê o diretório central e escolhe a entrada alvo: a cifrada mais pequena com conteúdo
+    (a confirmação final é a mais barata; ficheiros vazios dariam falsos positivos).
+    """
+    with zipfile.ZipFile(file_path, 'r') as zf:
+        infos = [i for i in zf.infolist() if not i.is_dir()]
+
+    cifradas = [i for i in infos if i.flag_bits & 0x01]
+    candidatas = [i for i in cifradas if i.file_size > 0] or cifradas or infos
+    meta = {'total_entradas': len(infos), 'entrada': None}
+    if not candidatas:
+        return meta
+    info = min(candidatas, key=lambda i: i.compress_size) if cifradas else candidatas[0]
+
+    with open(file_path, 'rb') as f:
+        data_offset = _offset_dados(f, info.header_offset)
+        f.seek(data_offset)
+        inicio_dados = f.read(min(info.compress_size, IMPRESSAO_BYTES))
+
+    entrada = {
+        'nome': info.filename,
+        'header_offset': info.header_offset,
+        'data_offset': data_offset,
+        'compress_size': info.compress_size,
+        'file_size': info.file_size,
+        'compress_type': info.compress_type,
+        'flag_bits': info.flag_bits,
+        'crc': info.CRC,
+        'encriptacao': None
+    }
+    if VerificadorZipCrypto.suporta(info):
+        entrada['encriptacao'] = 'zipcrypto'
+        entrada['cabecalho'] = inicio_dados[:12].hex()
+        # Mesmo critério do zipfile: com data descriptor (bit 3) o check byte vem da hora
+        entrada['check_byte'] = ((info._raw_time >> 8) if info.flag_bits & 0x08 else (info.CRC >> 24)) & 0xff
+    elif info.compress_type == 99:
+        # WinZip AES: campo extra 0x9901 com a força (1-3) e o método de compressão real;
+        # os dados começam pelo salt (8/12/16 bytes) e pelo verificador de 2 bytes
+        entrada['encriptacao'] = 'aes'
+        extra, pos = info.extra, 0
+        while pos + 4 <= len(extra):
+            tipo, tamanho = struct.unpack_from('<HH', extra, pos)
+            if tipo == 0x9901:
+                forca = extra[pos + 8]
+                tam_salt = 4 + 4 * forca
+                entrada['aes'] = {
+                    'forca': forca,
+                    'metodo': struct.unpack_from('<H', extra, pos + 9)[0],
+                    'salt': inicio_dados[:tam_salt].hex(),
+                    'verificador': inicio_dados[tam_salt:tam_salt + 2].hex()
+                }
+            pos += 4 + tamanho
+    elif info.flag_bits & 0x01:
+        entrada['encriptacao'] = 'outra'
+
+    meta['entrada'] = entrada
+    h = hashlib.sha256(b'zip')
+    h.update(f"{info.filename}|{info.CRC}|{info.compress_size}|{info.file_size}".encode())
+    h.update(inicio_dados)
+    meta['impressao'] = h.hexdigest()
+    return meta
+
+def _ler_vint(dados: bytes, pos: int) -> tuple[int, int]:
+    """Lê um inteiro de tamanho variável do RAR5 (7 bits por byte)."""
+    valor = deslocamento = 0
+    while True:
+        b = dados[pos]
+        pos += 1
+        valor |= (b & 0x7f) << deslocamento
+        deslocamento += 7
+        if not b & 0x80:
+            return valor, pos
+
+def _ler_encriptacao_rar5(dados: bytes, pos: int, com_iv: bool) -> dict:
+    """Lê um registo de encriptação RAR5 (do cabeçalho do arquivo ou de uma entrada)."""
+    _algoritmo, pos = _ler_vint(dados, pos)
+    flags, pos = _ler_vint(dados, pos)
+    kdf = {'contagem': dados[pos], 'salt': dados[pos + 1:pos + 17].hex(), 'iv': None, 'check': None}
+    pos += 17
+    if com_iv:
+        kdf['iv'] = dados[pos:pos + 16].hex()
+        pos += 16
+    if flags & 0x01:
+        # 8 bytes de verificação da senha + 4 bytes de checksum
+        kdf['check'] = dados[pos:pos + 12].hex()
+    return kdf
+
+def extrair_metadados_rar(file_path: str) -> dict:
+    """
+    Percorre os cabeçalhos RAR5 até ao cabeçalho de encriptação do arquivo (cabeçalhos
+    cifrados, '-hp') ou à primeira entrada cifrada. No RAR 1.5-4.x só a versão é registada.
+    """
+    meta = {'versao_rar': None, 'cabecalhos_cifrados': False, 'kdf': None, 'entrada': None}
+    with open(file_path, 'rb') as f:
+        assinatura = f.read(len(RAR5_ASSINATURA))
+        h = hashlib.sha256(b'rar')
+        h.update(str(os.path.getsize(file_path)).encode())
+        h.update(assinatura + f.read(IMPRESSAO_BYTES - len(assinatura)))
+        meta['impressao'] = h.hexdigest()
+
+        if assinatura.startswith(RAR4_ASSINATURA):
+            meta['versao_rar'] = 4
+            return meta
+        if assinatura != RAR5_ASSINATURA:
+            raise ValueError(f"'{file_path}' não é um arquivo RAR reconhecido.")
+        meta['versao_rar'] = 5
+
+        posicao = len(RAR5_ASSINATURA)
+        while True:
+            f.seek(posicao)
+            prefixo = f.read(7) # CRC32 + tamanho do cabeçalho (vint até 3 bytes)
+            if len(prefixo) < 5:
+                break
+            tamanho, pos = _ler_vint(prefixo, 4)
+            cabecalho = f.read(tamanho - (len(prefixo) - pos)) if tamanho > len(prefixo) - pos else b''
+            cabecalho = (prefixo[pos:] + cabecalho)[:tamanho]
+            fim_cabecalho = posicao + pos + tamanho
+
+            tipo, p = _ler_vint(cabecalho, 0)
+            flags, p = _ler_vint(cabecalho, p)
+            tam_extra = tam_dados = 0
+            if flags & 0x01:
+                tam_extra, p = _ler_vint(cabecalho, p)
+            if flags & 0x02:
+                tam_dados, p = _ler_vint(cabecalho, p)
+
+            if tipo == 4:
+                # Cabeçalho de encriptação: todos os cabeçalhos seguintes estão cifrados
+                meta['cabecalhos_cifrados'] = True
+                meta['kdf'] = _ler_encriptacao_rar5(cabecalho, p, com_iv=False)
+                break
+
+            if tipo == 2:
+                flags_entrada, p = _ler_vint(cabecalho, p)
+                tam_original, p = _ler_vint(cabecalho, p)
+                _atributos, p = _ler_vint(cabecalho, p)
+                if flags_entrada & 0x02:
+                    p += 4 # mtime
+                crc = None
+                if flags_entrada & 0x04:
+                    crc = struct.unpack_from('<I', cabecalho, p)[0]
+                    p += 4
+                compressao, p = _ler_vint(cabecalho, p)
+                _so, p = _ler_vint(cabecalho, p)
+                tam_nome, p = _ler_vint(cabecalho, p)
+                nome = cabecalho[p:p + tam_nome].decode('utf-8', 'replace')
+
+                # Registos da área extra, no fim do cabeçalho
+                x = tamanho - tam_extra
+                while x < tamanho and not flags_entrada & 0x01:
+                    tam_registo, x_tipo = _ler_vint(cabecalho, x)
+                    tipo_registo, x_dados = _ler_vint(cabecalho, x_tipo)
+                    if tipo_registo == 0x01:
+                        meta['kdf'] = _ler_encriptacao_rar5(cabecalho, x_dados, com_iv=True)
+                        meta['entrada'] = {
+                            'nome': nome,
+                            'data_offset': fim_cabecalho,
+                            'compress_size': tam_dados,
+                            'file_size': tam_original,
+                            'crc': crc,
+                            'compressao': compressao
+                        }
+                        break
+                    x = x_tipo + tam_registo
+                if meta['entrada']:
+                    break
+
+            if tipo == 5:
+                break
+            posicao = fim_cabecalho + tam_dados
+    return meta
+
+SEVENZIP_ASSINATURA = b"7z\xbc\xaf'\x1c"
+ID_7ZAES = '06f10701'
+
+def _ler_numero_7z(dados: bytes, pos: int) -> tuple[int, int]:
+    """Lê um número do 7z: os bits a 1 no topo do primeiro byte indicam quantos bytes se seguem."""
+    primeiro = dados[pos]
+    pos += 1
+    mascara = 0x80
+    valor = 0
+    for i in range(8):
+        if not primeiro & mascara:
+            return valor | ((primeiro & (mascara - 1)) << (8 * i)), pos
+        valor |= dados[pos] << (8 * i)
+        pos += 1
+        mascara >>= 1
+    return valor, pos
+
+def _ler_digests_7z(dados: bytes, pos: int, n: int) -> tuple[list[int | None], int]:
+    """Lê uma lista de CRCs, com o vetor de bits dos que estão definidos."""
+    todos = dados[pos]
+    pos += 1
+    if todos:
+        definidos = [True] * n
+    else:
+        definidos = [bool(dados[pos + i // 8] & (0x80 >> (i % 8))) for i in range(n)]
+        pos += (n + 7) // 8
+    crcs = []
+    for definido in definidos:
+        crcs.append(struct.unpack_from('<I', dados, pos)[0] if definido else None)
+        pos += 4 if definido else 0
+    return crcs, pos
+
+def _ler_pasta_7z(dados: bytes, pos: int) -> tuple[dict, int]:
+    """Lê uma pasta (folder): os coders, as ligações entre eles e os fluxos empacotados."""
+    n_coders, pos = _ler_numero_7z(dados, pos)
+    coders = []
+    for _ in range(n_coders):
+        flag = dados[pos]
+        tam_id = flag & 0x0f
+        coder = {'id': dados[pos + 1:pos + 1 + tam_id].hex(), 'props': '', 'entradas': 1, 'saidas': 1}
+        pos += 1 + tam_id
+        if flag & 0x10:
+            coder['entradas'], pos = _ler_numero_7z(dados, pos)
+            coder['saidas'], pos = _ler_numero_7z(dados, pos)
+        if flag & 0x20:
+            tamanho, pos = _ler_numero_7z(dados, pos)
+            coder['props'] = dados[pos:pos + tamanho].hex()
+            pos += tamanho
+        coders.append(coder)
+
+    total_entradas = sum(c['entradas'] for c in coders)
+    ligacoes = []
+    for _ in range(sum(c['saidas'] for c in coders) - 1):
+        entrada, pos = _ler_numero_7z(dados, pos)
+        saida, pos = _ler_numero_7z(dados, pos)
+        ligacoes.append((entrada, saida))
+    if total_entradas - len(ligacoes) == 1:
+        ligadas = {e for e, _ in ligacoes}
+        empacotados = [i for i in range(total_entradas) if i not in ligadas]
+    else:
+        empacotados = []
+        for _ in range(total_entradas - len(ligacoes)):
+            indice, pos = _ler_numero_7z(dados, pos)
+            empacotados.append(indice)
+    return {'coders': coders, 'ligacoes': ligacoes, 'empacotados': empacotados, 'tamanhos': [], 'crc': None, 'substreams': 1}, pos
+
+def _ler_streams_7z(dados: bytes, pos: int) -> tuple[dict, int]:
+    """Lê um StreamsInfo (PackInfo, UnPackInfo e SubStreamsInfo) até ao kEnd."""
+    streams = {'pack_pos': 0, 'pack_sizes': [], 'pastas': []}
+    while True:
+        tipo = dados[pos]
+        pos += 1
+        if tipo == 0x00:
+            return streams, pos
+
+        if tipo == 0x06: # PackInfo
+            streams['pack_pos'], pos = _ler_numero_7z(dados, pos)
+            n, pos = _ler_numero_7z(dados, pos)
+            while dados[pos] != 0x00:
+                pos += 1
+                if dados[pos - 1] == 0x09:
+                    for _ in range(n):
+                        tamanho, pos = _ler_numero_7z(dados, pos)
+                        streams['pack_sizes'].append(tamanho)
+                else:
+                    _, pos = _ler_digests_7z(dados, pos, n)
+            pos += 1
+
+        elif tipo == 0x07: # UnPackInfo
+            n, pos = _ler_numero_7z(dados, pos + 1) # salta o kFolder
+            if dados[pos]:
+                raise ValueError("Pastas 7z externas não são suportadas.")
+            pos += 1
+            for _ in range(n):
+                pasta, pos = _ler_pasta_7z(dados, pos)
+                streams['pastas'].append(pasta)
+            pos += 1 # kCodersUnPackSize
+            for pasta in streams['pastas']:
+                for _ in range(sum(c['saidas'] for c in pasta['coders'])):
+                    tamanho, pos = _ler_numero_7z(dados, pos)
+                    pasta['tamanhos'].append(tamanho)
+            while dados[pos] != 0x00:
+                crcs, pos = _ler_digests_7z(dados, pos + 1, n)
+                for pasta, crc in zip(streams['pastas'], crcs):
+                    pasta['crc'] = crc
+            pos += 1
+
+        elif tipo == 0x08: # SubStreamsInfo: só interessa o CRC das pastas com um único ficheiro
+            pastas = streams['pastas']
+            if dados[pos] == 0x0d:
+                pos += 1
+                for pasta in pastas:
+                    pasta['substreams'], pos = _ler_numero_7z(dados, pos)
+            if dados[pos] == 0x09:
+                pos += 1
+                for pasta in pastas:
+                    for _ in range(max(pasta['substreams'] - 1, 0)):
+                        _, pos = _ler_numero_7z(dados, pos)
+            if dados[pos] == 0x0a:
+                sem_crc = [p for p in pastas if not (p['substreams'] == 1 and p['crc'] is not None)]
+                crcs, pos = _ler_digests_7z(dados, pos + 1, sum(p['substreams'] for p in sem_crc))
+                i = 0
+                for pasta in sem_crc:
+                    if pasta['substreams'] == 1:
+                        pasta['crc'] = crcs[i]
+                    i += pasta['substreams']
+            if dados[pos] != 0x00:
+                raise ValueError("SubStreamsInfo 7z inesperado.")
+            pos += 1
+
+        else:
+            raise ValueError(f"Propriedade 7z inesperada: {tipo:#x}")
+
+def _cadeia_pasta_7z(pasta: dict) -> list[dict] | None:
+    """
+    Coders de uma pasta por ordem de descodificação, a partir do fluxo empacotado, com o tamanho
+    da saída de cada um. Só cadeias lineares (um fluxo de entrada e de saída por coder).
+    """
+    coders = pasta['coders']
+    if len(pasta['empacotados']) != 1 or any(c['entradas'] != 1 or c['saidas'] != 1 for c in coders):
+        return None
+    # Com um fluxo por coder, o índice do fluxo de entrada/saída é o próprio índice do coder
+    cadeia = []
+    atual = pasta['empacotados'][0]
+    while atual is not None and len(cadeia) < len(coders):
+        cadeia.append({'id': coders[atual]['id'], 'props': coders[atual]['props'], 'tamanho': pasta['tamanhos'][atual]})
+        atual = next((e for e, s in pasta['ligacoes'] if s == atual), None)
+    return cadeia
+
+def _ler_cabecalho_7z(cabecalho: bytes) -> tuple[dict | None, int]:
+    """Lê um kHeader até ao MainStreamsInfo (inclusive). Retorna os streams (ou None) e a posição."""
+    if not cabecalho or cabecalho[0] != 0x01:
+        return None, 0
+    pos = 1
+    if cabecalho[pos] == 0x02: # ArchiveProperties
+        pos += 1
+        while cabecalho[pos] != 0x00:
+            tamanho, pos = _ler_numero_7z(cabecalho, pos + 1)
+            pos += tamanho
+        pos += 1
+    if cabecalho[pos] == 0x03: # AdditionalStreamsInfo
+        _, pos = _ler_streams_7z(cabecalho, pos + 1)
+    if cabecalho[pos] != 0x04: # Sem MainStreamsInfo: arquivo vazio
+        return None, pos
+    return _ler_streams_7z(cabecalho, pos + 1)
+
+def _validar_cabecalho_7z(cabecalho: bytes, inicio_cabecalho: int) -> bool:
+    """
+    Confirma um cabeçalho decifrado sem CRC: tem de ser analisável até ao kEnd final e os
+    fluxos empacotados que descreve têm de acabar onde começa o próprio cabeçalho cifrado.
+    """
+    try:
+        streams, pos = _ler_cabecalho_7z(cabecalho)
+        if cabecalho[0] != 0x01:
+            return False
+        if streams and 32 + streams['pack_pos'] + sum(streams['pack_sizes']) != inicio_cabecalho:
+            return False
+        if cabecalho[pos] == 0x05: # FilesInfo: número de ficheiros e propriedades (tipo, tamanho)
+            _, pos = _ler_numero_7z(cabecalho, pos + 1)
+            while cabecalho[pos] != 0x00:
+                _, pos = _ler_numero_7z(cabecalho, pos)
+                tamanho, pos = _ler_numero_7z(cabecalho, pos)
+                pos += tamanho
+            pos += 1
+        return pos == len(cabecalho) - 1 and cabecalho[pos] == 0x00
+    except (IndexError, ValueError, struct.error):
+        return False
+
+def _entrada_7z(pasta: dict, cadeia: list[dict], data_offset: int, compress_size: int, cabecalho: bool = False) -> dict:
+    """Entrada alvo de um 7z: a pasta cifrada (do cabeçalho ou de ficheiros), com os parâmetros do 7zAES."""
+    props = bytes.fromhex(cadeia[0]['props'])
+    salt = iv = b''
+    if props[0] & 0xc0:
+        tam_salt = ((props[0] >> 7) & 1) + (props[1] >> 4)
+        tam_iv = ((props[0] >> 6) & 1) + (props[1] & 0x0f)
+        salt = props[2:2 + tam_salt]
+        iv = props[2 + tam_salt:2 + tam_salt + tam_iv]
+    return {
+        'cabecalho': cabecalho,
+        'data_offset': data_offset,
+        'compress_size': compress_size,
+        'file_size': cadeia[-1]['tamanho'],
+        'crc': pasta['crc'] if pasta['substreams'] == 1 else None,
+        'cadeia': cadeia,
+        'aes': {'ciclos': props[0] & 0x3f, 'salt': salt.hex(), 'iv': iv.hex()}
+    }
+
+def extrair_metadados_7z(file_path: str) -> dict:
+    """
+    Lê o cabeçalho 7z (descomprimindo-o se for um kEncodedHeader sem senha) e escolhe a pasta
+    alvo: a do próprio cabeçalho quando este está cifrado ('-mhe'), senão a primeira pasta cifrada.
+    """
+    meta = {'cabecalhos_cifrados': False, 'entrada': None}
+    with open(file_path, 'rb') as f:
+        inicio = f.read(32)
+        if not inicio.startswith(SEVENZIP_ASSINATURA):
+            raise ValueError(f"'{file_path}' não é um arquivo 7z reconhecido.")
+        h = hashlib.sha256(b'7z')
+        h.update(str(os.path.getsize(file_path)).encode())
+        h.update(inicio + f.read(IMPRESSAO_BYTES - len(inicio)))
+        meta['impressao'] = h.hexdigest()
+
+        offset, tamanho = struct.unpack_from('<QQ', inicio, 12)
+        f.seek(32 + offset)
+        cabecalho = f.read(tamanho)
+
+        # Cabeçalho codificado: comprimido (e talvez cifrado) numa pasta própria
+        while cabecalho and cabecalho[0] == 0x17:
+            streams, _ = _ler_streams_7z(cabecalho, 1)
+            pasta = streams['pastas'][0]
+            cadeia = _cadeia_pasta_7z(pasta)
+            if cadeia is None:
+                raise ValueError("Cabeçalho 7z com coders não suportados.")
+            data_offset = 32 + streams['pack_pos']
+            if cadeia[0]['id'] == ID_7ZAES:
+                meta['cabecalhos_cifrados'] = True
+                meta['entrada'] = _entrada_7z(pasta, cadeia, data_offset, streams['pack_sizes'][0], cabecalho=True)
+                return meta
+            f.seek(data_offset)
+            cabecalho = _descompressor_7z(cadeia)(f.read(streams['pack_sizes'][0]))[:cadeia[-1]['tamanho']]
+
+    streams, _ = _ler_cabecalho_7z(cabecalho)
+    if not streams:
+        return meta
+    data_offset = 32 + streams['pack_pos']
+    indice = 0
+    for pasta in streams['pastas']:
+        cadeia = _cadeia_pasta_7z(pasta)
+        n = len(pasta['empacotados'])
+        if cadeia and cadeia[0]['id'] == ID_7ZAES:
+            meta['entrada'] = _entrada_7z(pasta, cadeia, data_offset, streams['pack_sizes'][indice])
+            break
+        data_offset += sum(streams['pack_sizes'][indice:indice + n])
+        indice += n
+    return meta
+
+def carregar_metadados(file_path: str, file_type: str, usar_cache: bool | None = None) -> dict:
+    """
+    Obtém os metadados de verificação do arquivo: da cache ao lado do arquivo se a
+    assinatura ainda corresponder, senão extraídos de novo (e a cache regravada).
+    """
+    usar_cache = USAR_CACHE_METADADOS if usar_cache is None else usar_cache
+    caminho_cache = file_path + METADADOS_SUFIXO
+    assinatura = assinatura_ficheiro(file_path)
+
+    if usar_cache:
+        try:
+            with open(caminho_cache, 'r') as f:
+                meta = json.load(f)
+            if meta.get('versao') == METADADOS_VERSAO and meta.get('file_type') == file_type and meta.get('assinatura') == assinatura:
+                return meta
+        except (OSError, ValueError):
+            pass
+
+    extrair = {'zip': extrair_metadados_zip, 'rar': extrair_metadados_rar, '7z': extrair_metadados_7z}[file_type]
+    meta = extrair(file_path)
+    meta.update({'versao': METADADOS_VERSAO, 'file_type': file_type, 'assinatura': assinatura})
+
+    if usar_cache:
+        try:
+            temp = caminho_cache + '.tmp'
+            with open(temp, 'w') as f:
+                json.dump(meta, f, indent=4)
+            os.replace(temp, caminho_cache) # Operação atómica
+        except OSError:
+            pass # Diretório só de leitura: funciona sem cache
+    return meta
+
+# -----------------------------------------------------------------------------
+# AFINIDADE DE CPU E TOPOLOGIA (LINUX)
+# -----------------------------------------------------------------------------
+# Cada worker pode ser fixado a um CPU com 'os.sched_setaffinity'. Os CPUs lógicos são
+# agrupados por núcleo físico a partir de /sys (irmãos SMT partilham o mesmo núcleo) e o
+# número de CPUs utilizáveis respeita a afinidade do processo e a quota de CPU do cgroup.
+# Modos: 'none' (o escalonador decide), 'cores' (um CPU por núcleo físico) e 'threads'
+# (todos os CPUs lógicos, primeiro um por núcleo e só depois os irmãos SMT).
+MODOS_AFINIDADE = ('none', 'cores', 'threads')
+
+_SYS_CPU = '/sys/devices/system/cpu'
+_SYS_CGROUP = '/sys/fs/cgroup'
+
+def _ler_sys(caminho: str) -> str | None:
+    try:
+        with open(caminho) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def cpus_disponiveis() -> list[int]:
+    """CPUs lógicos em que este processo pode correr (afinidade herdada, cpuset)."""
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:
+        return list(range(os.cpu_count() or 1))
+
+def topologia_cpus(cpus: list[int] | None = None) -> list[list[int]]:
+    """
+    Agrupa os CPUs lógicos por núcleo físico (pacote, core_id), pela ordem do primeiro CPU
+    de cada núcleo. Sem /sys (ou fora do Linux) cada CPU conta como um núcleo.
+    """
+    nucleos = {}
+    for cpu in cpus if cpus is not None else cpus_disponiveis():
+        pacote = _ler_sys(f'{_SYS_CPU}/cpu{cpu}/topology/physical_package_id')
+        nucleo = _ler_sys(f'{_SYS_CPU}/cpu{cpu}/topology/core_id')
+        chave = (pacote, nucleo) if nucleo is not None else ('cpu', cpu)
+        nucleos.setdefault(chave, []).append(cpu)
+    return list(nucleos.values())
+
+def _quota_cgroup_v2(caminho: str) -> float | None:
+    # cpu.max: "<quota> <período>" ou "max <período>"
+    valor = _ler_sys(os.path.join(caminho, 'cpu.max'))
+    if not valor:
+        return None
+    quota, _, periodo = valor.partition(' ')
+    return None if quota == 'max' else int(quota) / int(periodo or 100000)
+
+def _quota_cgroup_v1(caminho: str) -> float | None:
+    quota = _ler_sys(os.path.join(caminho, 'cpu.cfs_quota_us'))
+    periodo = _ler_sys(os.path.join(caminho, 'cpu.cfs_period_us'))
+    if not quota or not periodo or int(quota) <= 0:
+        return None
+    return int(quota) / int(periodo)
+
+def quota_cgroup() -> float | None:
+    """
+    Quota de CPU do cgroup do processo em CPUs (ex.: 1.5), ou None sem limite. Percorre o
+    cgroup e os seus ascendentes e fica com a quota mais restritiva (cgroup v2 e v1).
+    """
+    try:
+        with open('/proc/self/cgroup') as f:
+            linhas = [l.rstrip('\n').split(':', 2) for l in f if l.count(':') >= 2]
+    except OSError:
+        return None
+
+    for _, controladores, caminho in linhas:
+        if controladores == '':
+            raiz, ler = _SYS_CGROUP, _quota_cgroup_v2
+        elif 'cpu' in controladores.split(','):
+            raiz = next((os.path.join(_SYS_CGROUP, n) for n in (controladores, 'cpu', 'cpu,cpuacct') if os.path.isdir(os.path.join(_SYS_CGROUP, n))), None)
+            ler = _quota_cgroup_v1
+            if raiz is None:
+                continue
+        else:
+            continue
+
+        quotas = []
+        atual = os.path.join(raiz, caminho.lstrip('/'))
+        while True:
+            quota = ler(atual)
+            if quota is not None:
+                quotas.append(quota)
+            if os.path.normpath(atual) == os.path.normpath(raiz):
+                break
+            atual = os.path.dirname(atual)
+        if quotas:
+            return min(quotas)
+    return None
+
+def cpus_efetivos() -> int:
+    """Número de workers que a máquina suporta de facto: CPUs permitidos limitados pela quota do cgroup."""
+    cpus = len(cpus_disponiveis())
+    quota = quota_cgroup()
+    if quota is not None:
+        cpus = min(cpus, max(1, math.ceil(quota)))
+    return cpus
+
+def planear_afinidade(num_workers: int, modo: str = 'none') -> list[int] | None:
+    """
+    CPUs (um por worker, por ordem de arranque) para o modo indicado, ou None sem afinidade.
+    A lista é limitada pela quota do cgroup; com mais workers do que CPUs volta ao início.
+    """
+    if modo == 'none' or not hasattr(os, 'sched_setaffinity'):
+        return None
+    nucleos = topologia_cpus()
+    if modo == 'cores':
+        cpus = [nucleo[0] for nucleo in nucleos]
+    else:
+        # Um irmão SMT de cada núcleo de cada vez: os primeiros workers ficam em núcleos distintos
+        cpus = [nucleo[i] for i in range(max(map(len, nucleos))) for nucleo in nucleos if i < len(nucleo)]
+    quota = quota_cgroup()
+    if quota is not None:
+        cpus = cpus[:max(1, math.ceil(quota))]
+    return [cpus[i % len(cpus)] for i in range(num_workers)]
+
+def descrever_afinidade(num_workers: int, modo: str = 'none') -> str:
+    """Resumo da colocação dos workers, para os cabeçalhos e o histórico de benchmarks."""
+    nucleos = topologia_cpus()
+    cpus = sum(map(len, nucleos))
+    quota = quota_cgroup()
+    texto = f"{modo}: {num_workers} worker(s), {cpus} CPU(s) em {len(nucleos)} núcleo(s) físico(s)"
+    if quota is not None:
+        texto += f", quota cgroup {quota:g} CPU(s)"
+    plano = planear_afinidade(num_workers, modo)
+    if plano:
+        texto += f", CPUs {','.join(map(str, sorted(set(plano))))}"
+        if len(set(plano)) < num_workers:
+            texto += f" (~{num_workers / len(set(plano)):.1f} workers/CPU)"
+    return texto
+
+def fixar_cpu(afinidade) -> int | None:
+    """
+    Fixa o worker atual (processo ou thread) ao próximo CPU do plano. 'afinidade' é
+    (plano, contador partilhado); o contador atribui a cada worker a sua posição no plano.
+    """
+    plano, contador = afinidade
+    with contador.get_lock():
+        posicao = contador.value
+        contador.value += 1
+    cpu = plano[posicao % len(plano)]
+    try:
+        os.sched_setaffinity(0, {cpu})
+    except OSError:
+        return None
+    return cpu
+
+# -----------------------------------------------------------------------------
+# ESTADO DOS WORKERS
+# -----------------------------------------------------------------------------
+# Estado "quente" de cada processo (workers e processo principal), mantido entre comprimentos,
+# configurações e sessões. Guarda, por arquivo alvo e verificador imposto, o handle já
+# aberto e o verificador.
+_ESTADO_ARQUIVOS = {}
+
+# Arquivos mantidos em cache por processo: um pool quente que atravessa muitos trabalhos
+# (ver 'cracker_api') descarta o estado dos menos recentes em vez de acumular handles
+MAX_ESTADOS_ARQUIVOS = 32
+
+# Sinal de paragem partilhado entre o processo principal e os workers do pool, guardado em
+# '_LOCAL' pelo inicializador: nas threads do pool cada thread tem o do seu pool (vários pools
+# de threads coexistem no mesmo processo). É lido entre cada candidata, pelo que os workers
+# param no máximo uma verificação após a descoberta.
+def _sinal_parada():
+    """Sinal de paragem do pool da thread atual (None fora de um worker)."""
+    return getattr(_LOCAL, 'sinal_parada', None)
+
+def _obter_estado(file_path: str, file_type: str, metadados: dict | None = None) -> dict:
+    """
+    Obtém (ou cria uma única vez por processo) o estado de verificação do arquivo alvo.
+    Os workers recebem os metadados já carregados pelo processo principal; no modo de
+    threads o mesmo estado é partilhado por todas as threads. Um ficheiro substituído no
+    mesmo caminho (outro tamanho ou mtime) invalida o estado, mesmo num pool já quente.
+    """
+    imposto = verificador_imposto()
+    info = os.stat(file_path)
+    carimbo = (info.st_size, info.st_mtime_ns)
+    estado = _ESTADO_ARQUIVOS.get((file_path, imposto))
+    if estado is not None and estado['carimbo'] != carimbo:
+        del _ESTADO_ARQUIVOS[(file_path, imposto)]
+        estado = metadados = None
+    if estado is None:
+        metadados = metadados or carregar_metadados(file_path, file_type)
+        backend = escolher_verificador(file_type, metadados, imposto)
+        # Cada processo cria o seu próprio verificador (e handle), por segurança entre processos
+        verificador = backend.criar(file_path, metadados)
+        estado = {
+            'carimbo': carimbo,
+            'file_type': file_type,
+            'metadados': metadados,
+            'backend': backend,
+            'verificador': verificador,
+            # ZipCrypto: tem um caminho próprio para intervalos do odómetro
+            'zipcrypto': verificador if isinstance(verificador, VerificadorZipCrypto) else None
+        }
+        while len(_ESTADO_ARQUIVOS) >= MAX_ESTADOS_ARQUIVOS:
+            _ESTADO_ARQUIVOS.pop(next(iter(_ESTADO_ARQUIVOS)))
+        _ESTADO_ARQUIVOS[(file_path, imposto)] = estado
+    return estado
+
+def descartar_estado(file_path: str) -> None:
+    """Esquece o estado do arquivo neste processo (ex.: o ficheiro foi substituído no mesmo caminho)."""
+    for chave in [c for c in _ESTADO_ARQUIVOS if c[0] == file_path]:
+        del _ESTADO_ARQUIVOS[chave]
+
+def verificador_do_arquivo(file_path: str, file_type: str) -> Backend:
+    """Backend escolhido (ou imposto) para o arquivo alvo."""
+    return _obter_estado(file_path, file_type)['backend']
+
+def liberta_gil(file_path: str, file_type: str) -> bool:
+    """Indica se o arquivo é verificado por derivação de chave, cujo custo corre sem o GIL."""
+    return verificador_do_arquivo(file_path, file_type).liberta_gil
+
+def inicializar_worker(file_path: str | None = None, file_type: str | None = None, sinal_parada=None, verificador: str | None = None, metadados: dict | None = None, afinidade=None) -> None:
+    """
+    Inicializador do pool: recebe o sinal de paragem e o verificador imposto pelo processo
+    principal (em spawn/forkserver os globais não são herdados; nas threads do pool fica
+    local a cada thread), fixa o worker ao seu CPU (se houver plano de afinidade) e
+    pré-aquece o estado do arquivo alvo.
+    """
+    _LOCAL.sinal_parada = sinal_parada
+    if afinidade:
+        fixar_cpu(afinidade)
+    _LOCAL.verificador = verificador
+    if file_path:
+        try:
+            _obter_estado(file_path, file_type, metadados)
+        except Exception:
+            pass # O erro será reportado na primeira tarefa
+
+def testar_intervalo(file_path: str, file_type: str, alfabetos: list[bytes], inicio: int, fim: int, sinal_parada=None) -> tuple[str | None, int, int, str | None]:
+    """
+    Testa as senhas do intervalo de índices [inicio, fim) da máscara 'alfabetos' (um alfabeto
+    por posição). Retorna a senha encontrada (ou None), quantas foram realmente testadas,
+    quantas passaram o cabeçalho e a última senha testada. Usado tanto pelos workers como
+    pelo modo sequencial.
+    """
+    estado = _obter_estado(file_path, file_type)
+
+    # ZipCrypto: enumeração em profundidade com as chaves dos prefixos em cache
+    if estado['zipcrypto']:
+        encontrada, testadas, passaram, ultima = estado['zipcrypto'].testar_intervalo(alfabetos, inicio, fim, sinal_parada)
+        return (texto_da_senha(encontrada) if encontrada else None, testadas, passaram, texto_da_senha(ultima) if ultima else None)
+
+    return testar_candidatas(file_path, file_type, gerar_candidatas_bytes(alfabetos, inicio, fim), sinal_parada)
+
+def testar_candidatas(file_path: str, file_type: str, candidatas, sinal_parada=None) -> tuple[str | None, int, int, str | None]:
+    """
+    Testa uma sequência de candidatas (bytes) por ordem, com o mesmo retorno de 'testar_intervalo'.
+    Usado para os intervalos sem verificador especializado e para as listas de palavras.
+    """
+    verificar = _obter_estado(file_path, file_type)['verificador'].verificar
+    testadas = 0
+    passaram = 0
+    senha = None
+    for senha in candidatas:
+        # Outro worker já encontrou a senha: abandona o resto do lote
+        if sinal_parada is not None and sinal_parada.value:
+            break
+
+        estagio = verificar(senha)
+        testadas += 1
+        if estagio >= ESTAGIO_CABECALHO:
+            passaram += 1
+
+        if estagio == ESTAGIO_FINAL:
+            encontrada = texto_da_senha(senha)
+            return (encontrada, testadas, passaram, encontrada)
+
+    return (None, testadas, passaram, texto_da_senha(senha) if testadas else None)
+
+def _resultado_lote(resultado: tuple[str | None, int, int, str | None], segmento: int, inicio: int) -> tuple[str | None, int, int, float | None, int, str | None, int, int]:
+    """
+    Resultado comum dos workers a partir do de 'testar_intervalo' (ou equivalente): numa
+    descoberta ativa o sinal de paragem e regista o instante; junta o identificador do worker.
+    """
+    encontrada, testadas, passaram, ultima = resultado
+    # No modo de threads todos os workers partilham o PID: identifica-os pela thread
+    ident = os.getpid() if threading.current_thread() is threading.main_thread() else threading.get_native_id()
+
+    if encontrada:
+        # Avisa imediatamente todos os outros workers
+        sinal_parada = _sinal_parada()
+        if sinal_parada is not None:
+            sinal_parada.value = 1
+        return (encontrada, testadas, passaram, time.time(), ident, ultima, segmento, inicio)
+
+    return (None, testadas, passaram, None, ident, ultima, segmento, inicio)
+
+# O worker recebe um LOTE (intervalo de índices) e verifica o sinal de paragem entre cada candidata.
+def worker(task_args) -> tuple[str | None, int, int, float | None, int, str | None, int, int]:
+    # time.sleep(0.01)
+    """
+    Worker que testa as senhas de um intervalo de índices. Retorna a senha encontrada
+    (ou None), quantas foram realmente testadas, quantas passaram o cabeçalho,
+    o instante da descoberta, o PID do processo (ou o id da thread), a última senha
+    testada e, para o registo de cobertura, o segmento e o índice inicial do lote.
+    """
+    file_path, file_type, alfabetos, inicio, fim, segmento = task_args
+    return _resultado_lote(testar_intervalo(file_path, file_type, alfabetos, inicio, fim, _sinal_parada()), segmento, inicio)
+
+def worker_candidatas(task_args) -> tuple[str | None, int, int, float | None, int, str | None, int, int]:
+    """
+    Igual ao 'worker', mas o lote é uma lista explícita de candidatas (palavras, regras) em vez
+    de um intervalo do odómetro. Tarefa: (file_path, file_type, candidatas, inicio, segmento).
+    """
+    file_path, file_type, candidatas, inicio, segmento = task_args
+    return _resultado_lote(testar_candidatas(file_path, file_type, candidatas, _sinal_parada()), segmento, inicio)
+
+def testar_hibrido(file_path: str, file_type: str, palavras: list[bytes], primeira: int, alfabetos: list[bytes], anexar: bool, inicio: int, fim: int, sinal_parada=None) -> tuple[str | None, int, int, str | None]:
+    """
+    Testa o intervalo [inicio, fim) do espaço palavra × máscara: o índice i é a palavra
+    i // M (M = tamanho da máscara) com o índice i % M da máscara, anexada ou prefixada.
+    'palavras' são as palavras do intervalo, a começar na de índice 'primeira'. Cada palavra
+    entra no odómetro como alfabetos de um só caractere, pelo que o índice na máscara é o mesmo
+    e o ZipCrypto mantém a cache de chaves dos prefixos.
+    """
+    tamanho_mascara = math.prod(len(a) for a in alfabetos)
+    testadas = 0
+    passaram = 0
+    ultima = None
+    i = inicio
+    while i < fim:
+        p, m = divmod(i, tamanho_mascara)
+        n = min(fim - i, tamanho_mascara - m)
+        literal = [bytes([c]) for c in palavras[p - primeira]]
+        mascara = literal + alfabetos if anexar else alfabetos + literal
+        encontrada, t, c, u = testar_intervalo(file_path, file_type, mascara, m, m + n, sinal_parada)
+        testadas += t
+        passaram += c
+        ultima = u if u is not None else ultima
+        if encontrada or t < n:
+            return (encontrada, testadas, passaram, ultima)
+        i += n
+    return (None, testadas, passaram, ultima)
+
+def worker_hibrido(task_args) -> tuple[str | None, int, int, float | None, int, str | None, int, int]:
+    """
+    Igual ao 'worker', para o espaço palavra × máscara (ver 'testar_hibrido').
+    Tarefa: (file_path, file_type, palavras, primeira, alfabetos, anexar, inicio, fim, segmento).
+    """
+    file_path, file_type, palavras, primeira, alfabetos, anexar, inicio, fim, segmento = task_args
+    return _resultado_lote(testar_hibrido(file_path, file_type, palavras, primeira, alfabetos, anexar, inicio, fim, _sinal_parada()), segmento, inicio)
+
+def worker_texto_claro(task_args) -> tuple[tuple[int, int, int] | None, int, int, int]:
+    """
+    Worker do ataque de texto claro: testa um lote de candidatos Z. Retorna as chaves
+    encontradas (ou None), quantos candidatos foram testados, o PID do processo e o
+    índice do primeiro candidato do lote.
+    """
+    dados, indice_z, zs, inicio = task_args
+    sinal_parada = _sinal_parada()
+    ataque = AtaqueTextoClaro(dados, indice_z)
+    for n, z in enumerate(zs):
+        if sinal_parada is not None and sinal_parada.value:
+            return (None, n, os.getpid(), inicio)
+        solucoes = ataque.executar(z)
+        if solucoes:
+            if sinal_parada is not None:
+                sinal_parada.value = 1
+            return (solucoes[0], n + 1, os.getpid(), inicio)
+    return (None, len(zs), os.getpid(), inicio)
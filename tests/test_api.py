@@ -0,0 +1,101 @@
+import cracker_fixtures
+import cracker_simulator
+import cracker_worker
+from cracker_api import Cracker
+
+
+def test_opcoes_do_cracker_nao_alteram_os_globais(tmp_path):
+    caminho = str(tmp_path / 'alvo.zip')
+    cracker_fixtures.criar_zip_zipcrypto(caminho, 'cab', tamanho=64)
+
+    with Cracker(workers=2, session_file=str(tmp_path / 'sessoes.json'), coverage_file=None,
+                 engine='threads', verifier='zipfile') as cracker:
+        resultado = cracker.atacar(caminho, charset='abc', max_len=3)
+    assert resultado['status'] == 'found'
+    assert resultado['password'] == 'cab'
+
+    assert cracker_worker.VERIFICADOR_FORCADO is None
+    assert cracker_simulator.MOTOR_PARALELO == 'auto'
+    assert cracker_simulator.AFINIDADE == 'none'
+
+
+def test_verificador_imposto_por_thread(tmp_path):
+    caminho = str(tmp_path / 'alvo.zip')
+    cracker_fixtures.criar_zip_zipcrypto(caminho, 'cab', tamanho=64)
+    try:
+        with cracker_worker.impor_verificador('zipfile'):
+            assert cracker_worker.verificador_do_arquivo(caminho, 'zip').nome == 'zipfile'
+        assert cracker_worker.verificador_do_arquivo(caminho, 'zip').nome == 'zipcrypto'
+    finally:
+        cracker_worker.descartar_estado(caminho)
+
+
+def test_arquivo_substituido_mantem_os_pools(tmp_path):
+    import os
+    caminho = str(tmp_path / 'alvo.zip')
+    sessoes = tmp_path / 'sessoes.json'
+    cracker_fixtures.criar_zip_zipcrypto(caminho, 'ab', tamanho=64)
+
+    with Cracker(workers=2, session_file=str(sessoes), coverage_file=None, engine='threads') as cracker:
+        assert cracker.atacar(caminho, charset='ab', max_len=2)['password'] == 'ab'
+        pools = dict(cracker._pools)
+
+        # Mesmo caminho e tamanho, outra senha: só o mtime muda
+        cracker_fixtures.criar_zip_zipcrypto(caminho, 'ba', tamanho=64)
+        os.utime(caminho, ns=(0, os.stat(caminho).st_mtime_ns + 1))
+        sessoes.unlink()
+        assert cracker.atacar(caminho, charset='ab', max_len=2)['password'] == 'ba'
+        assert cracker._pools == pools
+
+
+def test_retomar_sessao_da_linha_de_comandos_com_charset_padrao(tmp_path):
+    """Uma sessão 'running' criada sem opções de charset retoma com o charset guardado."""
+    caminho = str(tmp_path / 'alvo.zip')
+    sessoes = str(tmp_path / 'sessoes.json')
+    cracker_fixtures.criar_zip_zipcrypto(caminho, 'b', tamanho=64)
+    args = {'digits': False, 'letters': False, 'lowercase': False, 'uppercase': False, 'symbols': False, 'alphanum': False}
+    sessao = cracker_simulator.nova_sessao(caminho, 'zip', args, 'ab', 1, 1)
+    cracker_simulator.SessionManager(sessoes).update_session(sessao['target_file'], sessao)
+
+    with Cracker(workers=2, session_file=sessoes, coverage_file=None) as cracker:
+        resultado = cracker.atacar(caminho, parallel=False)
+    assert resultado['status'] == 'found'
+    assert resultado['password'] == 'b'
+
+
+def test_pools_de_threads_de_instancias_diferentes_tem_sinais_proprios(tmp_path):
+    """Um segundo Cracker com threads não pode herdar (nem disparar) o sinal de paragem do primeiro."""
+    arquivos = {}
+    for nome, senha in (('a', 'ab'), ('b', 'ba'), ('c', 'bb')):
+        arquivos[nome] = str(tmp_path / f'{nome}.zip')
+        cracker_fixtures.criar_zip_zipcrypto(arquivos[nome], senha, tamanho=64)
+
+    opcoes = {'workers': 2, 'coverage_file': None, 'engine': 'threads'}
+    with Cracker(session_file=str(tmp_path / 's1.json'), **opcoes) as c1, \
+         Cracker(session_file=str(tmp_path / 's2.json'), **opcoes) as c2:
+        assert c1.atacar(arquivos['a'], charset='ab', max_len=2)['password'] == 'ab'
+        assert c2.atacar(arquivos['b'], charset='ab', max_len=2)['password'] == 'ba'
+        resultado = c1.atacar(arquivos['c'], charset='ab', max_len=2)
+    assert resultado['status'] == 'found'
+    assert resultado['password'] == 'bb'
+
+
+def test_saida_do_trabalho_nao_substitui_os_streams_do_processo(monkeypatch, tmp_path):
+    """Em silêncio, a saída vai para o log do resultado sem redirecionar sys.stdout das outras threads."""
+    import sys
+    import cracker_api
+    caminho = str(tmp_path / 'alvo.zip')
+    cracker_fixtures.criar_zip_zipcrypto(caminho, 'ab', tamanho=64)
+    streams = []
+    original = cracker_api.executar_sessao
+
+    def executar_sessao(*args, **kwargs):
+        streams.append((sys.stdout, sys.stderr))
+        return original(*args, **kwargs)
+    monkeypatch.setattr(cracker_api, 'executar_sessao', executar_sessao)
+
+    antes = (sys.stdout, sys.stderr)
+    with Cracker(workers=2, session_file=str(tmp_path / 's.json'), coverage_file=None, engine='threads') as cracker:
+        resultado = cracker.atacar(caminho, charset='ab', max_len=2)
+    assert streams == [antes]
+    assert any('[SUCESSO]' in linha for linha in resultado['log'])
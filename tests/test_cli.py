@@ -0,0 +1,41 @@
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import cracker_simulator
+import cracker_worker
+
+pytestmark = pytest.mark.skipif(shutil.which('zip') is None, reason="requer o comando 'zip'")
+
+
+def _main(monkeypatch, tmp_path, *argumentos):
+    caminho = str(tmp_path / 'alvo.zip')
+    documento = tmp_path / 'documento.txt'
+    if not documento.exists():
+        documento.write_bytes(bytes(ord('a') + i % 26 for i in range(64)))
+        subprocess.run(['zip', '-q', '-0', '-P', '42', '-j', caminho, str(documento)], check=True)
+    monkeypatch.setattr(sys, 'argv', ['cracker_simulator.py', caminho, '-d', '-min', '2', '-max', '2',
+                                      '--session-file', str(tmp_path / 'sessoes.json'), '--no-coverage', *argumentos])
+    try:
+        cracker_simulator.main()
+    finally:
+        cracker_worker._ESTADO_ARQUIVOS.pop(caminho, None)
+
+
+def test_execucao_sequencial_com_um_unico_cpu(monkeypatch, tmp_path, capsys):
+    # Quota ou afinidade de 1 CPU: o padrão de '--workers' não impede a execução sequencial
+    monkeypatch.setattr(cracker_worker, 'cpus_efetivos', lambda: 1)
+    _main(monkeypatch, tmp_path)
+    saida = capsys.readouterr().out
+    assert "[ERRO]" not in saida
+    assert "[SUCESSO]" in saida and "42" in saida
+
+
+def test_workers_validados_so_no_modo_paralelo(monkeypatch, tmp_path, capsys):
+    _main(monkeypatch, tmp_path, '--workers', '1')
+    assert "[ERRO]" not in capsys.readouterr().out
+
+    _main(monkeypatch, tmp_path, '-m', '--workers', '1')
+    assert "[ERRO] O número de processos deve ser pelo menos 2." in capsys.readouterr().out
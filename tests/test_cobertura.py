@@ -0,0 +1,72 @@
+import shutil
+import subprocess
+
+import pytest
+
+import cracker_simulator
+from cracker_simulator import CoverageLedger, ProgressTracker, planear_segmentos, impressao_digital
+
+pytestmark = pytest.mark.skipif(shutil.which('zip') is None, reason="requer o comando 'zip'")
+
+
+def _criar_zip(tmp_path) -> str:
+    caminho = str(tmp_path / 'alvo.zip')
+    documento = tmp_path / 'documento.txt'
+    documento.write_bytes(b'Conteudo de teste para o registo de cobertura. ' * 4)
+    subprocess.run(['zip', '-q', '-P', 'cc', '-j', caminho, str(documento)], check=True)
+    return caminho
+
+
+def _ledger_com_charset_menor(tmp_path, caminho):
+    """Registo em que todas as senhas de 2 caracteres de 'ab' já foram testadas."""
+    impressao = impressao_digital(caminho, 'zip')
+    ledger = CoverageLedger(str(tmp_path / 'cobertura.json'))
+    ledger.registar(impressao, [b'ab', b'ab'], 0, 4)
+    ledger.salvar(caminho)
+    return ledger, impressao
+
+
+def test_caixas_do_registo_ficam_na_sessao_e_retomam_sem_o_registo(tmp_path):
+    caminho = _criar_zip(tmp_path)
+    ledger, impressao = _ledger_com_charset_menor(tmp_path, caminho)
+    alfabetos = [b'abc', b'abc']
+    sessao = {}
+
+    segmentos = planear_segmentos(ledger, impressao, alfabetos, ProgressTracker(), sessao)
+    assert sum(b - a for _, a, b, _ in segmentos) == 9 - 4
+    assert all(m != alfabetos for m, _, _, _ in segmentos)
+    assert len(sessao['coverage_boxes']) == len(segmentos)
+
+    # Progresso nas duas primeiras senhas das caixas, guardado só na sessão
+    primeira, inicio, _, deslocamento = segmentos[0]
+    progresso = ProgressTracker()
+    progresso.registar(inicio + deslocamento, inicio + deslocamento + 1)
+    progresso.guardar(sessao)
+
+    retomados = planear_segmentos(None, None, alfabetos, ProgressTracker.da_sessao(sessao), sessao)
+    assert sum(b - a for _, a, b, _ in retomados) == 9 - 4 - 1
+    assert (primeira, inicio) not in [(m, a) for m, a, _, _ in retomados]
+
+
+def test_progresso_na_mascara_original_nao_e_reinterpretado_nas_caixas(tmp_path):
+    caminho = _criar_zip(tmp_path)
+    ledger, impressao = _ledger_com_charset_menor(tmp_path, caminho)
+    sessao = {}
+    segmentos = planear_segmentos(ledger, impressao, [b'abc', b'abc'], ProgressTracker(3), sessao)
+    assert segmentos == [([b'abc', b'abc'], 3, 9, 0)]
+    assert sessao.get('coverage_boxes') is None
+
+
+def test_ataque_com_caixas_do_registo(tmp_path):
+    caminho = _criar_zip(tmp_path)
+    ledger, _ = _ledger_com_charset_menor(tmp_path, caminho)
+    for paralelo in (False, True):
+        sessao = {'target_file': caminho, 'file_type': 'zip', 'charset': 'abc',
+                  'min_len': 2, 'max_len': 2, 'current_len': 2, 'last_step': 0}
+        if paralelo:
+            with cracker_simulator.criar_pool(2, threads=True) as pool:
+                cracker_simulator.testar_senha_paralelo(None, sessao, 2, 1, testing=True, pool=pool, cobertura=ledger)
+        else:
+            cracker_simulator.testar_senha_sequencial(None, sessao, testing=True, cobertura=ledger)
+        assert sessao['found_password'] == 'cc'
+        assert sessao['coverage_boxes']
@@ -0,0 +1,96 @@
+import shutil
+import subprocess
+import zipfile
+
+import pytest
+
+import cracker_fixtures
+import cracker_worker
+from cracker_simulator import decifrar_arquivo_com_chaves
+from cracker_worker import ZIPCRYPTO_CHAVES_INICIAIS, ZIP_METODOS_SUPORTADOS, VerificadorZipCrypto, carregar_metadados, zipcrypto_atualizar
+
+SENHA = 'ab'
+
+DADOS = b'Este e um teste de conteudo para a descompressao das entradas. ' * 32
+
+
+def _trocar_metodo(caminho: str, metodo: int) -> None:
+    """Troca o método de compressão nos cabeçalhos local e central da única entrada."""
+    with open(caminho, 'r+b') as f:
+        dados = bytearray(f.read())
+        local = dados.find(b'PK\x03\x04')
+        central = dados.find(b'PK\x01\x02')
+        dados[local + 8:local + 10] = metodo.to_bytes(2, 'little')
+        dados[central + 10:central + 12] = metodo.to_bytes(2, 'little')
+        f.seek(0)
+        f.write(dados)
+
+
+@pytest.mark.parametrize('metodo', [zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED, zipfile.ZIP_BZIP2, zipfile.ZIP_LZMA])
+def test_extrai_cada_metodo(tmp_path, metodo):
+    # As entradas sem encriptação passam pela mesma descompressão que as decifradas
+    caminho = str(tmp_path / 'alvo.zip')
+    with zipfile.ZipFile(caminho, 'w', compression=metodo) as zf:
+        zf.writestr('documento_000.txt', DADOS)
+
+    destino = tmp_path / 'extraidos'
+    assert decifrar_arquivo_com_chaves(caminho, ZIPCRYPTO_CHAVES_INICIAIS, str(destino)) == ['documento_000.txt']
+    assert (destino / 'documento_000.txt').read_bytes() == DADOS
+
+
+def test_metodo_nao_suportado_e_um_erro(tmp_path, capsys):
+    caminho = str(tmp_path / 'alvo.zip')
+    with zipfile.ZipFile(caminho, 'w') as zf:
+        zf.writestr('documento_000.txt', DADOS)
+    _trocar_metodo(caminho, 93) # Zstandard
+
+    assert decifrar_arquivo_com_chaves(caminho, ZIPCRYPTO_CHAVES_INICIAIS, str(tmp_path / 'extraidos')) == []
+    saida = capsys.readouterr().out
+    assert "[ERRO]" in saida and '93' in saida
+
+
+def _criar_zip_zipcrypto(tmp_path, metodo: str) -> str:
+    caminho = str(tmp_path / f'{metodo}.zip')
+    documento = tmp_path / 'documento_000.txt'
+    documento.write_bytes(DADOS)
+    subprocess.run(['zip', '-q', '-P', SENHA, '-Z', metodo, '-j', caminho, str(documento)], check=True)
+    return caminho
+
+
+@pytest.mark.skipif(shutil.which('zip') is None, reason="requer o comando 'zip'")
+@pytest.mark.parametrize('metodo', ['store', 'deflate', 'bzip2'])
+def test_zipcrypto_confirma_cada_metodo(tmp_path, metodo):
+    caminho = _criar_zip_zipcrypto(tmp_path, metodo)
+    entrada = carregar_metadados(caminho, 'zip', usar_cache=False)['entrada']
+    if ZIP_METODOS_SUPORTADOS[entrada['compress_type']] != metodo:
+        pytest.skip(f"o comando 'zip' não suporta {metodo}")
+    encontrada, _, _, _ = VerificadorZipCrypto(caminho, entrada).testar_intervalo([b'xa', b'yb'], 0, 4)
+    assert encontrada == SENHA.encode()
+
+
+@pytest.mark.skipif(shutil.which('zip') is None, reason="requer o comando 'zip'")
+def test_verificador_rejeita_metodo_nao_suportado(tmp_path):
+    caminho = _criar_zip_zipcrypto(tmp_path, 'store')
+    _trocar_metodo(caminho, 93) # Zstandard
+    entrada = carregar_metadados(caminho, 'zip', usar_cache=False)['entrada']
+    with pytest.raises(ValueError, match='93'):
+        VerificadorZipCrypto(caminho, entrada)
+
+
+@pytest.mark.parametrize('metodo', ['store', 'deflate', 'bzip2', 'lzma'])
+def test_zipcrypto_confirma_e_extrai_cada_metodo(tmp_path, metodo):
+    # O gerador de arquivos cobre também o LZMA, que o comando 'zip' não produz
+    caminho = str(tmp_path / f'{metodo}.zip')
+    cracker_fixtures.criar_zip_zipcrypto(caminho, SENHA, tamanho=2048, metodo=metodo)
+    try:
+        encontrada, testadas, _, _ = cracker_worker.testar_candidatas(caminho, 'zip', [b'xy', b'ab'])
+        assert (encontrada, testadas) == (SENHA, 2)
+    finally:
+        cracker_worker._ESTADO_ARQUIVOS.pop(caminho, None)
+
+    chaves = ZIPCRYPTO_CHAVES_INICIAIS
+    for c in SENHA.encode():
+        chaves = zipcrypto_atualizar(chaves, c)
+    destino = tmp_path / 'extraidos'
+    assert decifrar_arquivo_com_chaves(caminho, chaves, str(destino)) == ['documento_000.txt']
+    assert (destino / 'documento_000.txt').stat().st_size == 2048
@@ -0,0 +1,156 @@
+import json
+import os
+import random
+import shutil
+import subprocess
+import zipfile
+import zlib
+
+import pytest
+
+import cracker_fixtures
+import cracker_worker
+from cracker_worker import ESTAGIO_FINAL, ESTAGIO_REJEITADA, extrair_metadados_zip, extrair_metadados_rar, extrair_metadados_7z, carregar_metadados
+
+SENHA = 'ab'
+TAMANHO = 100
+
+
+def _criar_zip(tmp_path, caminho: str, tamanhos: list[int]) -> None:
+    """ZIP ZipCrypto (sem compressão) com um documento de cada tamanho."""
+    if shutil.which('zip') is None:
+        pytest.skip("requer o comando 'zip'")
+    for n, tamanho in enumerate(tamanhos):
+        documento = tmp_path / f'documento_{n:03}.txt'
+        documento.write_bytes(bytes(ord('a') + i % 26 for i in range(tamanho)))
+        subprocess.run(['zip', '-q', '-0', '-P', SENHA, '-j', caminho, str(documento)], check=True)
+
+
+def test_zip_escolhe_a_entrada_cifrada_mais_pequena(tmp_path):
+    caminho = str(tmp_path / 'alvo.zip')
+    _criar_zip(tmp_path, caminho, [256, 64, 128])
+
+    meta = extrair_metadados_zip(caminho)
+    entrada = meta['entrada']
+    assert meta['total_entradas'] == 3
+    assert (entrada['nome'], entrada['file_size'], entrada['encriptacao']) == ('documento_001.txt', 64, 'zipcrypto')
+    with zipfile.ZipFile(caminho) as zf:
+        info = zf.getinfo('documento_001.txt')
+    assert entrada['crc'] == info.CRC
+    # O cabeçalho de encriptação está logo no início dos dados da entrada
+    with open(caminho, 'rb') as f:
+        f.seek(entrada['data_offset'])
+        assert f.read(12).hex() == entrada['cabecalho']
+
+
+def _esperado_rar5(contagem):
+    """Salt, IV da entrada e valor de verificação que a fixture gera com a semente padrão."""
+    rng = random.Random(cracker_fixtures.SEMENTE_PADRAO)
+    salt = rng.randbytes(16)
+    (_, dados), = cracker_fixtures.gerar_entradas(rng, 1, TAMANHO, 'texto')
+    iv = rng.randbytes(16)
+    _, check = cracker_fixtures._chaves_rar5(SENHA.encode(), salt, contagem)
+    return salt, iv, check, dados
+
+
+def test_rar5_com_cabecalhos_cifrados(tmp_path):
+    caminho = str(tmp_path / 'alvo.rar')
+    cracker_fixtures.criar_rar5(caminho, SENHA, tamanho=TAMANHO, cabecalho_cifrado=True, contagem=4)
+    salt, _, check, _ = _esperado_rar5(4)
+
+    meta = extrair_metadados_rar(caminho)
+    assert meta['versao_rar'] == 5 and meta['cabecalhos_cifrados']
+    assert meta['kdf'] == {'contagem': 4, 'salt': salt.hex(), 'iv': None, 'check': check.hex()}
+    assert meta['entrada'] is None
+
+
+def test_rar5_com_cabecalhos_simples(tmp_path):
+    caminho = str(tmp_path / 'alvo.rar')
+    cracker_fixtures.criar_rar5(caminho, SENHA, tamanho=TAMANHO, cabecalho_cifrado=False, contagem=4)
+    salt, iv, check, dados = _esperado_rar5(4)
+
+    meta = extrair_metadados_rar(caminho)
+    assert meta['versao_rar'] == 5 and not meta['cabecalhos_cifrados']
+    assert meta['kdf'] == {'contagem': 4, 'salt': salt.hex(), 'iv': iv.hex(), 'check': check.hex()}
+    entrada = meta['entrada']
+    assert (entrada['nome'], entrada['file_size'], entrada['crc'], entrada['compressao']) == ('documento_000.txt', TAMANHO, zlib.crc32(dados), 0)
+    # Os dados cifrados (AES-CBC, múltiplo de 16) terminam onde começa o cabeçalho final
+    assert entrada['compress_size'] == 112
+    with open(caminho, 'rb') as f:
+        f.seek(entrada['data_offset'] + entrada['compress_size'])
+        final = f.read()
+    assert final and len(final) < 16
+
+    assert cracker_worker.VerificadorRAR5(meta['kdf']).verificar(SENHA.encode()) == ESTAGIO_FINAL
+    assert cracker_worker.VerificadorRAR5(meta['kdf']).verificar(b'ba') == ESTAGIO_REJEITADA
+
+
+@pytest.mark.parametrize('cabecalho_cifrado', [True, False])
+def test_7z(tmp_path, cabecalho_cifrado):
+    caminho = str(tmp_path / 'alvo.7z')
+    cracker_fixtures.criar_7z(caminho, SENHA, tamanho=TAMANHO, metodo='store', cabecalho_cifrado=cabecalho_cifrado)
+
+    meta = extrair_metadados_7z(caminho)
+    entrada = meta['entrada']
+    assert meta['cabecalhos_cifrados'] == cabecalho_cifrado == entrada['cabecalho']
+    assert entrada['cadeia'][0]['id'] == cracker_worker.ID_7ZAES
+    # O py7zr usa 2^19 ciclos de SHA-256, sem salt e com um IV de 16 bytes (guardados nas propriedades do coder)
+    props = bytes.fromhex(entrada['cadeia'][0]['props'])
+    assert entrada['aes'] == {'ciclos': 19, 'salt': '', 'iv': props[2:].hex()}
+    assert len(props[2:]) == 16
+    assert entrada['compress_size'] % 16 == 0
+    if not cabecalho_cifrado:
+        (_, dados), = cracker_fixtures.gerar_entradas(random.Random(cracker_fixtures.SEMENTE_PADRAO), 1, TAMANHO, 'texto')
+        assert (entrada['file_size'], entrada['crc']) == (TAMANHO, zlib.crc32(dados))
+        assert [c['id'] for c in entrada['cadeia']] == [cracker_worker.ID_7ZAES, '00']
+
+    verificador = cracker_worker.Verificador7z(caminho, entrada)
+    assert verificador.verificar(SENHA.encode()) == ESTAGIO_FINAL
+
+
+def _marcar_cache(caminho):
+    """Acrescenta uma marca à cache ao lado do arquivo: só sobrevive se a cache for reutilizada."""
+    caminho_cache = caminho + cracker_worker.METADADOS_SUFIXO
+    with open(caminho_cache) as f:
+        meta = json.load(f)
+    meta['marca'] = True
+    with open(caminho_cache, 'w') as f:
+        json.dump(meta, f)
+
+
+def test_cache_reutilizada_enquanto_o_arquivo_nao_muda(tmp_path):
+    caminho = str(tmp_path / 'alvo.zip')
+    _criar_zip(tmp_path, caminho, [64])
+    carregar_metadados(caminho, 'zip', usar_cache=True)
+    _marcar_cache(caminho)
+    assert carregar_metadados(caminho, 'zip', usar_cache=True).get('marca')
+
+
+def test_cache_invalidada_pela_mudanca_de_mtime(tmp_path):
+    caminho = str(tmp_path / 'alvo.zip')
+    _criar_zip(tmp_path, caminho, [64])
+    carregar_metadados(caminho, 'zip', usar_cache=True)
+    _marcar_cache(caminho)
+
+    # Mesmo conteúdo e tamanho, outro mtime
+    st = os.stat(caminho)
+    os.utime(caminho, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    meta = carregar_metadados(caminho, 'zip', usar_cache=True)
+    assert 'marca' not in meta
+    assert meta['assinatura']['mtime_ns'] == st.st_mtime_ns + 10 ** 9
+
+
+def test_cache_invalidada_pela_mudanca_de_tamanho(tmp_path):
+    caminho = str(tmp_path / 'alvo.zip')
+    _criar_zip(tmp_path, caminho, [64])
+    carregar_metadados(caminho, 'zip', usar_cache=True)
+    _marcar_cache(caminho)
+
+    # Outro arquivo no mesmo caminho, com o mtime do anterior
+    st = os.stat(caminho)
+    os.remove(caminho)
+    _criar_zip(tmp_path, caminho, [128])
+    os.utime(caminho, ns=(st.st_atime_ns, st.st_mtime_ns))
+    meta = carregar_metadados(caminho, 'zip', usar_cache=True)
+    assert 'marca' not in meta
+    assert meta['entrada']['file_size'] == 128
@@ -0,0 +1,26 @@
+import threading
+
+import cracker_simulator
+
+
+def test_processo_principal_para_a_distribuicao_ao_receber_a_senha(monkeypatch, tmp_path):
+    """Mesmo que o worker não ative o sinal de paragem, o processo principal deixa de distribuir lotes."""
+    chamadas = []
+    lock = threading.Lock()
+
+    def worker_sem_sinal(tarefa):
+        file_path, file_type, mascara, inicio, fim, segmento = tarefa
+        with lock:
+            chamadas.append(inicio)
+            primeira = len(chamadas) == 1
+        return ('ab' if primeira else None, fim - inicio, 0, 0.0, 0, None, segmento, inicio)
+
+    monkeypatch.setattr(cracker_simulator, 'worker', worker_sem_sinal)
+    sessao = {'target_file': str(tmp_path / 'alvo.zip'), 'file_type': 'zip', 'charset': 'abcdefghij',
+              'current_len': 5, 'max_len': 5, 'last_step': 0}
+    with cracker_simulator.criar_pool(2, threads=True) as pool:
+        cracker_simulator.testar_senha_paralelo(None, sessao, 2, 1, testing=True, pool=pool)
+
+    assert sessao['found_password'] == 'ab'
+    # 10^5 lotes de uma senha: só uma fração chega a ser distribuída
+    assert len(chamadas) < 10 ** 5 // 2
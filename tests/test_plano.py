@@ -0,0 +1,183 @@
+import json
+import re
+import shutil
+import string
+import subprocess
+import threading
+
+import pytest
+
+import cracker_simulator
+import cracker_worker
+from cracker_simulator import (
+    CLASSES_MASCARA, ProgressTracker, FonteMascara, FonteLista, FonteHibrida,
+    expandir_mascara, expandir_charset, compilar_regra, aplicar_regra,
+    carregar_plano, executar_plano,
+)
+
+SENHA = '42'
+
+
+@pytest.fixture
+def alvo(tmp_path):
+    if shutil.which('zip') is None:
+        pytest.skip("requer o comando 'zip'")
+    caminho = str(tmp_path / 'alvo.zip')
+    documento = tmp_path / 'documento.txt'
+    documento.write_bytes(bytes(ord('a') + i % 26 for i in range(64)))
+    subprocess.run(['zip', '-q', '-0', '-P', SENHA, '-j', caminho, str(documento)], check=True)
+    yield caminho
+    cracker_worker._ESTADO_ARQUIVOS.pop(caminho, None)
+
+
+def _sessao(caminho, fases, **extra):
+    session_data = {'target_file': caminho, 'file_type': 'zip', 'charset': string.digits,
+                    'min_len': 1, 'max_len': 2, 'current_len': 1, 'last_step': 0,
+                    'plan': {'phases': fases}}
+    session_data.update(extra)
+    return session_data
+
+
+def _tentativas(saida):
+    return int(re.search(r'Total de tentativas: (\d+)', saida).group(1))
+
+
+def test_expandir_mascara():
+    assert expandir_mascara('?l?d') == [string.ascii_lowercase.encode(), string.digits.encode()]
+    assert expandir_mascara('a??b?H') == [b'a', b'?', b'b', CLASSES_MASCARA['H'].encode()]
+    assert expandir_charset('?d?h') == '0123456789abcdef'
+    assert expandir_charset('cba') == 'abc'
+    with pytest.raises(ValueError, match='\\?x'):
+        expandir_mascara('?d?x')
+
+
+def test_regras_aplicadas():
+    casos = {
+        ':': b'senha',
+        'c $1 $!': b'Senha1!',
+        'u r': b'AHNES',
+        '^x ]': b'xsenh',
+        'd \'3': b'sen',
+        'T0 T4': b'SenhA',
+        'sa@ se3': b's3nh@',
+        'D1 {': b'nhas',
+    }
+    for regra, esperada in casos.items():
+        assert aplicar_regra(b'senha', compilar_regra(regra)) == esperada, regra
+    with pytest.raises(ValueError, match='desconhecida'):
+        compilar_regra('c X')
+    with pytest.raises(ValueError, match='em falta'):
+        compilar_regra('c $')
+
+
+def test_fontes_percorrem_o_espaco_pela_ordem_esperada():
+    assert FonteMascara(expandir_mascara('?d?l')).tamanho == 10 * 26
+
+    # Regra a regra: todas as palavras com ':' antes de qualquer palavra com 'u'
+    lista = FonteLista([b'ab', b'cd'], [':', 'u'])
+    assert lista.tamanho == 4
+    assert lista.candidatas(0, 4) == [b'ab', b'cd', b'AB', b'CD']
+    assert lista.candidatas(1, 3) == [b'cd', b'AB']
+
+    # O lote só leva as palavras que lhe correspondem
+    hibrida = FonteHibrida([b'ab', b'cd', b'ef'], expandir_mascara('?d'))
+    assert hibrida.tamanho == 30
+    tarefa = hibrida.tarefa('alvo.zip', 'zip', 15, 25, 0)
+    assert tarefa[2:4] == ([b'cd', b'ef'], 1)
+
+
+@pytest.mark.parametrize('fases, erro', [
+    ([], 'não tem fases'),
+    ([{'type': 'dictionary'}], 'tipo desconhecido'),
+    ([{'type': 'wordlist', 'wordlist': 'nao_existe.txt'}], 'não encontrada'),
+    ([{'type': 'rules', 'wordlist': 'palavras.txt'}], "precisa de 'rules'"),
+    ([{'type': 'rules', 'wordlist': 'palavras.txt', 'rules': ['c X']}], 'desconhecida'),
+    ([{'type': 'mask'}], "precisa de 'mask'"),
+    ([{'type': 'mask', 'mask': '?d?q'}], 'desconhecida'),
+    ([{'type': 'hybrid', 'wordlist': 'palavras.txt', 'mask': '?d', 'position': 'middle'}], 'posição desconhecida'),
+])
+def test_carregar_plano_rejeita_planos_invalidos(tmp_path, fases, erro):
+    (tmp_path / 'palavras.txt').write_text('senha\n')
+    (tmp_path / 'plano.json').write_text(json.dumps({'phases': fases}))
+    with pytest.raises(ValueError, match=erro):
+        carregar_plano(str(tmp_path / 'plano.json'))
+
+
+def test_carregar_plano_resolve_caminhos_e_regras(tmp_path):
+    (tmp_path / 'palavras.txt').write_text('senha\n')
+    (tmp_path / 'regras.rule').write_text('# comentário\n:\nc $1\n')
+    (tmp_path / 'plano.json').write_text(json.dumps({'phases': [
+        {'type': 'rules', 'wordlist': 'palavras.txt', 'rules_file': 'regras.rule'},
+        {'type': 'hybrid', 'wordlist': 'palavras.txt', 'mask': '?d'}
+    ]}))
+    fases = carregar_plano(str(tmp_path / 'plano.json'))['phases']
+    assert fases[0]['wordlist'] == str(tmp_path / 'palavras.txt')
+    assert fases[0]['rules'] == [':', 'c $1']
+    assert fases[1]['position'] == 'append'
+
+
+@pytest.mark.parametrize('posicao, palavras', [('append', '3\n4\n'), ('prepend', '1\n2\n')])
+def test_fase_hibrida_encontra_a_senha(alvo, tmp_path, capsys, posicao, palavras):
+    (tmp_path / 'palavras.txt').write_text(palavras)
+    fases = [{'type': 'hybrid', 'wordlist': str(tmp_path / 'palavras.txt'), 'mask': '?d', 'position': posicao}]
+    session_data = _sessao(alvo, fases)
+    resultado = executar_plano(None, session_data, testing=True)
+    assert resultado['founded'] and session_data['found_password'] == SENHA
+    # Todas as candidatas da primeira palavra e as da segunda até à senha
+    assert _tentativas(capsys.readouterr().out) == 10 + (3 if posicao == 'append' else 5)
+
+
+def test_orcamento_de_candidatas_encerra_a_fase(alvo, capsys):
+    # A senha está na fase 1, mas depois das 30 candidatas permitidas
+    fases = [{'type': 'mask', 'mask': '?d?d', 'keyspace_budget': 30},
+             {'type': 'bruteforce', 'charset': '?d', 'min_len': 2, 'max_len': 2}]
+    session_data = _sessao(alvo, fases)
+    resultado = executar_plano(None, session_data, testing=True)
+    assert resultado['founded'] and session_data['found_password'] == SENHA
+    assert session_data['plan_phase'] == 1
+    assert _tentativas(capsys.readouterr().out) == 30 + 43
+
+
+def test_orcamento_de_tempo_encerra_a_fase(alvo, capsys):
+    fases = [{'type': 'mask', 'mask': '?l?l?l', 'time_budget': 1e-9},
+             {'type': 'mask', 'mask': '?d?d'}]
+    session_data = _sessao(alvo, fases)
+    resultado = executar_plano(None, session_data, testing=True)
+    saida = capsys.readouterr().out
+    assert "Orçamento de tempo da fase 1 esgotado" in saida
+    assert resultado['founded'] and session_data['plan_phase'] == 1
+    assert _tentativas(saida) < 26 ** 3 + 43
+
+
+def test_retoma_a_meio_de_uma_fase(alvo, capsys):
+    # Fase 1 já concluída; na fase 2 as 20 primeiras candidatas e [30, 35) já foram testadas
+    fases = [{'type': 'mask', 'mask': '?l'}, {'type': 'mask', 'mask': '?d?d'}]
+    session_data = _sessao(alvo, fases, plan_phase=1)
+    ProgressTracker(20, [[30, 35]]).guardar(session_data)
+    resultado = executar_plano(None, session_data, testing=True)
+    saida = capsys.readouterr().out
+    assert resultado['founded'] and session_data['found_password'] == SENHA
+    assert session_data['plan_phase'] == 1
+    assert _tentativas(saida) == 43 - 20 - 5
+    assert "(concluída)" in saida
+
+
+def test_plano_paralelo_para_a_distribuicao_ao_receber_a_senha(monkeypatch, alvo):
+    chamadas = []
+    lock = threading.Lock()
+
+    def worker_sem_sinal(tarefa):
+        file_path, file_type, alfabetos, inicio, fim, segmento = tarefa
+        with lock:
+            chamadas.append(inicio)
+            primeira = len(chamadas) == 1
+        return (SENHA if primeira else None, fim - inicio, 0, 0.0, 0, None, segmento, inicio)
+
+    monkeypatch.setattr(cracker_simulator, 'worker', worker_sem_sinal)
+    monkeypatch.setattr(cracker_simulator, 'MOTOR_PARALELO', 'threads')
+    session_data = _sessao(alvo, [{'type': 'mask', 'mask': '?d?d?d?d?d'}])
+    resultado = executar_plano(None, session_data, 2, 1, testing=True)
+
+    assert resultado['founded'] and session_data['found_password'] == SENHA
+    # 10^5 lotes de uma senha: só uma fração chega a ser distribuída
+    assert len(chamadas) < 10 ** 5 // 2
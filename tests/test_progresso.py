@@ -0,0 +1,65 @@
+import cracker_simulator
+from cracker_simulator import ProgressTracker, _subtrair_intervalos, _unir_intervalos
+
+
+def test_unir_intervalos_junta_sobrepostos_e_contiguos():
+    assert _unir_intervalos([[5, 8], [0, 2], [2, 4], [7, 10]]) == [[0, 4], [5, 10]]
+
+
+def test_subtrair_intervalos():
+    assert _subtrair_intervalos([[0, 10]], [[2, 4], [6, 7]]) == [[0, 2], [4, 6], [7, 10]]
+    assert _subtrair_intervalos([[0, 10]], [[0, 10]]) == []
+    assert _subtrair_intervalos([[0, 5], [8, 12]], [[3, 9]]) == [[0, 3], [9, 12]]
+
+
+def test_progress_tracker_lotes_fora_de_ordem():
+    progresso = ProgressTracker()
+    progresso.registar(4, 6)
+    progresso.registar(8, 10)
+    assert progresso.marca == 0
+    assert progresso.pendentes(0, 12) == [[0, 4], [6, 8], [10, 12]]
+
+    progresso.registar(0, 4)
+    assert progresso.marca == 6
+    assert progresso.concluidos == [[8, 10]]
+    assert progresso.testadas() == 8
+    assert progresso.pendentes(0, 12) == [[6, 8], [10, 12]]
+
+
+def test_progress_tracker_sessao_ida_e_volta():
+    sessao = {}
+    ProgressTracker(5, [[7, 9]]).guardar(sessao)
+    assert sessao == {'last_step': 5, 'done_ranges': [[7, 9]]}
+    progresso = ProgressTracker.da_sessao(sessao)
+    assert progresso.pendentes(0, 10) == [[5, 7], [9, 10]]
+
+
+def test_texto_claro_retoma_sessao_com_a_mesma_reducao(monkeypatch, tmp_path):
+    """Retomar com 'kp_index'/'kp_candidates' iguais aos da redução usa o progresso guardado."""
+    texto = tmp_path / 'claro.bin'
+    texto.write_bytes(b'x' * 12)
+    testados = []
+
+    class AtaqueFalso:
+        def __init__(self, dados, indice_z):
+            pass
+
+        def executar(self, z):
+            testados.append(z)
+            return [(1, 2, 3)] if z == 3 else []
+
+    monkeypatch.setattr(cracker_simulator, 'preparar_texto_claro', lambda *a: {'entrada': 'e', 'keystream': b'\0' * 12})
+    monkeypatch.setattr(cracker_simulator, 'reduzir_chaves_z', lambda keystream, progresso: (7, [1, 2, 3]))
+    monkeypatch.setattr(cracker_simulator, 'AtaqueTextoClaro', AtaqueFalso)
+    monkeypatch.setattr(cracker_simulator, 'decifrar_arquivo_com_chaves', lambda *a: [])
+
+    sessao = {
+        'target_file': str(tmp_path / 'alvo.zip'), 'charset': '0', 'min_len': 1, 'max_len': 1,
+        'known_plaintext': {'plaintext_file': str(texto), 'offset': 0, 'entry': None, 'output_dir': str(tmp_path), 'invert': False},
+        'kp_index': 7, 'kp_candidates': 3, 'last_step': 1, 'done_ranges': []
+    }
+    resultado = cracker_simulator.atacar_texto_claro(None, sessao, testing=True)
+
+    assert testados == [2, 3]
+    assert resultado['founded']
+    assert sessao['found_keys'] == ['00000001', '00000002', '00000003']
@@ -0,0 +1,59 @@
+import shutil
+import subprocess
+
+import pytest
+
+import cracker_worker
+from cracker_worker import ESTAGIO_REJEITADA, texto_da_senha, bytes_da_senha, exibir_senha
+
+
+def test_texto_da_senha_sem_perdas():
+    for senha in (b'senha', 'café'.encode('utf-8'), b'caf\xe9', b'\xff\xfe'):
+        assert bytes_da_senha(texto_da_senha(senha)) == senha
+    assert exibir_senha(texto_da_senha('café'.encode('utf-8'))) == 'café'
+    assert exibir_senha(texto_da_senha(b'caf\xe9')) == 'caf\\xe9 (hex: 636166e9)'
+
+
+def test_7z_rejeita_candidata_que_nao_e_utf8(tmp_path):
+    py7zr = pytest.importorskip('py7zr')
+    caminho = str(tmp_path / 'alvo.7z')
+    documento = tmp_path / 'documento.txt'
+    documento.write_bytes(b'Conteudo de teste. ' * 8)
+    with py7zr.SevenZipFile(caminho, 'w', password='ab') as arquivo:
+        arquivo.write(str(documento), 'documento.txt')
+    try:
+        estado = cracker_worker._obter_estado(caminho, '7z')
+        assert estado['verificador'].verificar(b'caf\xe9') == ESTAGIO_REJEITADA
+        encontrada, _, _, _ = cracker_worker.testar_intervalo(caminho, '7z', [b'\xe9a', b'b'], 0, 2)
+        assert encontrada == 'ab'
+    finally:
+        cracker_worker._ESTADO_ARQUIVOS.pop(caminho, None)
+
+
+@pytest.mark.skipif(shutil.which('zip') is None, reason="requer o comando 'zip'")
+def test_senha_nao_utf8_reportada_sem_perdas(tmp_path):
+    caminho = str(tmp_path / 'alvo.zip')
+    documento = tmp_path / 'documento.txt'
+    documento.write_bytes(b'Conteudo de teste. ' * 8)
+    subprocess.run([b'zip', b'-q', b'-P', b'caf\xe9', b'-j', caminho.encode(), str(documento).encode()], check=True)
+    try:
+        encontrada, _, _, _ = cracker_worker.testar_intervalo(caminho, 'zip', [b'c', b'a', b'f', b'e\xe9'], 0, 2)
+        assert bytes_da_senha(encontrada) == b'caf\xe9'
+    finally:
+        cracker_worker._ESTADO_ARQUIVOS.pop(caminho, None)
+
+
+def test_rarfile_indisponivel_sem_programa_com_senhas(monkeypatch):
+    import rarfile
+    backend = cracker_worker.VERIFICADORES['rarfile']
+
+    def sem_programa():
+        raise rarfile.RarCannotExec("Cannot find working tool")
+    monkeypatch.setattr(rarfile, 'tool_setup', sem_programa)
+    assert not backend.disponivel()
+
+    monkeypatch.setattr(rarfile, 'tool_setup', lambda: rarfile.ToolSetup(rarfile.BSDTAR_CONFIG))
+    assert not backend.disponivel()
+
+    monkeypatch.setattr(rarfile, 'tool_setup', lambda: rarfile.ToolSetup(rarfile.UNRAR_CONFIG))
+    assert backend.disponivel()
@@ -0,0 +1,63 @@
+import shutil
+import subprocess
+import zipfile
+
+import pytest
+
+from cracker_simulator import preparar_texto_claro, inverter_chaves
+from cracker_worker import AtaqueTextoClaro, ZIPCRYPTO_CHAVES_INICIAIS, zipcrypto_atualizar, zipcrypto_keystream
+
+SENHA = 'cab'
+
+
+@pytest.mark.skipif(shutil.which('zip') is None, reason="requer o comando 'zip'")
+def test_executar_com_z_verdadeiro_recupera_as_chaves(tmp_path):
+    """Com o Z correto, a exploração Z/Y/X encontra as chaves e a inversão devolve a senha."""
+    caminho = str(tmp_path / 'alvo.zip')
+    documento = tmp_path / 'documento.txt'
+    documento.write_bytes(b'Este e um teste de conteudo para o ataque de texto claro conhecido.')
+    subprocess.run(['zip', '-q', '-0', '-P', SENHA, '-j', caminho, str(documento)], check=True)
+    with zipfile.ZipFile(caminho) as zf:
+        info = zf.infolist()[0]
+        texto_claro = zf.read(info, pwd=SENHA.encode())[:16]
+    dados = preparar_texto_claro(caminho, texto_claro)
+
+    chaves_senha = _chaves_da_senha(SENHA)
+
+    assert chaves_senha in _executar_com_z_verdadeiro(dados, chaves_senha)
+    assert inverter_chaves(chaves_senha, 'abc', 1, 4) == SENHA
+
+
+def test_executar_nao_perde_o_segundo_candidato_de_uma_fibra():
+    """
+    Cabeçalho de encriptação em que o X verdadeiro de um nível é o segundo da sua fibra,
+    depois de um primeiro candidato que chega aos níveis interiores.
+    """
+    chaves_senha = _chaves_da_senha(SENHA)
+    claro = bytes.fromhex('6281e5b8145e54c22a973523') + b'Este e um teste '
+    cifrado = bytearray()
+    chaves = chaves_senha
+    for p in claro:
+        cifrado.append(p ^ zipcrypto_keystream(chaves[2]))
+        chaves = zipcrypto_atualizar(chaves, p)
+    texto_claro = claro[12:]
+    dados = {'entrada': 'documento.txt', 'cifrado': bytes(cifrado), 'texto_claro': texto_claro, 'offset': 12,
+             'keystream': bytes(c ^ p for c, p in zip(cifrado[12:], texto_claro))}
+
+    assert chaves_senha in _executar_com_z_verdadeiro(dados, chaves_senha)
+
+
+def _chaves_da_senha(senha: str) -> tuple[int, int, int]:
+    chaves = ZIPCRYPTO_CHAVES_INICIAIS
+    for c in senha.encode():
+        chaves = zipcrypto_atualizar(chaves, c)
+    return chaves
+
+
+def _executar_com_z_verdadeiro(dados: dict, chaves_senha: tuple[int, int, int]) -> list:
+    """Corre a exploração a partir do Z verdadeiro na posição 'indice_z' do keystream."""
+    indice_z = len(dados['keystream']) - 4
+    chaves = chaves_senha
+    for c in dados['cifrado'][:dados['offset'] + indice_z]:
+        chaves = zipcrypto_atualizar(chaves, c ^ zipcrypto_keystream(chaves[2]))
+    return AtaqueTextoClaro(dados, indice_z).executar(chaves[2] & 0xfffffffc)
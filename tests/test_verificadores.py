@@ -0,0 +1,112 @@
+import hashlib
+import importlib.util
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import cracker_worker
+from cracker_worker import carregar_metadados, escolher_verificador
+
+
+def _criar_zip(caminho, documento):
+    if shutil.which('zip') is None:
+        pytest.skip("requer o comando 'zip'")
+    subprocess.run(['zip', '-q', '-P', 'ab', '-j', caminho, documento], check=True)
+
+
+def _criar_7z(caminho, documento, cabecalho_cifrado):
+    py7zr = pytest.importorskip('py7zr')
+    with py7zr.SevenZipFile(caminho, 'w', password='ab', header_encryption=cabecalho_cifrado) as arquivo:
+        arquivo.write(documento, 'documento.txt')
+
+
+def _metadados_rar5(cabecalho_cifrado):
+    """Metadados de um RAR5 (sem ferramenta para o criar): KDF com valor de verificação válido."""
+    check = bytes(range(8))
+    kdf = {'contagem': 4, 'salt': bytes(16).hex(), 'iv': None, 'check': (check + hashlib.sha256(check).digest()[:4]).hex()}
+    return {'versao_rar': 5, 'cabecalhos_cifrados': cabecalho_cifrado, 'kdf': kdf, 'entrada': None}
+
+
+def _metadados(tmp_path, fixture):
+    documento = tmp_path / 'documento.txt'
+    documento.write_bytes(b'Conteudo de teste. ' * 4)
+    if fixture == 'zipcrypto':
+        caminho = str(tmp_path / 'alvo.zip')
+        _criar_zip(caminho, str(documento))
+        return 'zip', carregar_metadados(caminho, 'zip', usar_cache=False)
+    if fixture == 'aes-zip':
+        entrada = {'nome': 'documento.txt', 'encriptacao': 'aes', 'aes': {'forca': 3, 'salt': bytes(16).hex(), 'verificador': '0000'}}
+        return 'zip', {'entrada': entrada}
+    if fixture in ('rar5', 'rar5-hp'):
+        return 'rar', _metadados_rar5(fixture == 'rar5-hp')
+    caminho = str(tmp_path / 'alvo.7z')
+    _criar_7z(caminho, str(documento), fixture == '7z-hp')
+    return '7z', carregar_metadados(caminho, '7z', usar_cache=False)
+
+
+def _sem(monkeypatch, comandos=(), modulos=()):
+    """Simula um sistema sem os comandos e as bibliotecas opcionais indicados."""
+    which, find_spec = shutil.which, importlib.util.find_spec
+    monkeypatch.setattr(shutil, 'which', lambda nome, *a, **k: None if nome in comandos else which(nome, *a, **k))
+    monkeypatch.setattr(importlib.util, 'find_spec', lambda nome, *a, **k: None if nome in modulos else find_spec(nome, *a, **k))
+    for modulo in modulos:
+        monkeypatch.setitem(sys.modules, modulo, None)
+
+
+@pytest.mark.parametrize('fixture, esperado', [
+    ('zipcrypto', 'zipcrypto'),
+    ('aes-zip', 'aes-zip'),
+    ('rar5', 'rar5'),
+    ('rar5-hp', 'rar5'),
+    ('7z', '7z-nativo'),
+    ('7z-hp', '7z-nativo'),
+])
+def test_escolha_automatica(tmp_path, fixture, esperado):
+    tipo, metadados = _metadados(tmp_path, fixture)
+    assert escolher_verificador(tipo, metadados).nome == esperado
+
+
+@pytest.mark.parametrize('fixture, ordem', [
+    ('zipcrypto', ['zipcrypto', 'zipfile', 'unzip']),
+    ('rar5', ['rar5', 'unrar', 'rarfile']),
+    ('7z', ['7z-nativo', '7z', 'py7zr']),
+])
+def test_ordem_com_todas_as_dependencias(monkeypatch, tmp_path, fixture, ordem):
+    tipo, metadados = _metadados(tmp_path, fixture)
+    monkeypatch.setattr(shutil, 'which', lambda nome, *a, **k: f'/usr/bin/{nome}')
+    monkeypatch.setattr(cracker_worker.VERIFICADORES['rarfile'], '_disponivel', lambda: True)
+    assert [b.nome for b in cracker_worker.verificadores_compativeis(tipo, metadados)] == ordem
+
+
+def test_7z_sem_pycryptodomex_usa_o_py7zr_ou_o_comando(monkeypatch, tmp_path):
+    tipo, metadados = _metadados(tmp_path, '7z')
+    _sem(monkeypatch, comandos=('7z',), modulos=('Cryptodome', 'Cryptodome.Cipher', 'Cryptodome.Cipher.AES'))
+    assert escolher_verificador(tipo, metadados).nome == 'py7zr'
+
+    monkeypatch.setattr(shutil, 'which', lambda nome, *a, **k: '/usr/bin/7z' if nome == '7z' else None)
+    assert escolher_verificador(tipo, metadados).nome == '7z'
+
+
+def test_7z_sem_nenhuma_dependencia_e_um_erro(monkeypatch, tmp_path):
+    tipo, metadados = _metadados(tmp_path, '7z')
+    _sem(monkeypatch, comandos=('7z',), modulos=('py7zr', 'Cryptodome', 'Cryptodome.Cipher', 'Cryptodome.Cipher.AES'))
+    with pytest.raises(ValueError, match='Nenhum verificador'):
+        escolher_verificador(tipo, metadados)
+
+
+def test_rar_sem_valor_de_verificacao(monkeypatch, tmp_path):
+    # Sem o valor de verificação o nativo não serve: o comando 'unrar' e, sem ele, a rarfile
+    tipo, metadados = _metadados(tmp_path, 'rar5')
+    metadados['kdf']['check'] = None
+    monkeypatch.setattr(shutil, 'which', lambda nome, *a, **k: '/usr/bin/unrar' if nome == 'unrar' else None)
+    monkeypatch.setattr(cracker_worker.VERIFICADORES['rarfile'], '_disponivel', lambda: True)
+    assert escolher_verificador(tipo, metadados).nome == 'unrar'
+
+    _sem(monkeypatch, comandos=('unrar',))
+    assert escolher_verificador(tipo, metadados).nome == 'rarfile'
+
+    monkeypatch.setattr(cracker_worker.VERIFICADORES['rarfile'], '_disponivel', lambda: False)
+    with pytest.raises(ValueError, match='Nenhum verificador'):
+        escolher_verificador(tipo, metadados)
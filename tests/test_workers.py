@@ -0,0 +1,43 @@
+import multiprocessing
+import shutil
+import subprocess
+
+import pytest
+
+import cracker_worker
+
+
+@pytest.fixture
+def alvo(tmp_path):
+    if shutil.which('zip') is None:
+        pytest.skip("requer o comando 'zip'")
+    caminho = str(tmp_path / 'alvo.zip')
+    documento = tmp_path / 'documento.txt'
+    documento.write_bytes(bytes(ord('a') + i % 26 for i in range(64)))
+    subprocess.run(['zip', '-q', '-0', '-P', 'ab1', '-j', caminho, str(documento)], check=True)
+    sinal = multiprocessing.RawValue('b', 0)
+    cracker_worker.inicializar_worker(caminho, 'zip', sinal)
+    yield caminho, sinal
+    cracker_worker.inicializar_worker()
+    cracker_worker._ESTADO_ARQUIVOS.pop(caminho, None)
+
+
+@pytest.mark.parametrize('tarefa', [
+    lambda c: (cracker_worker.worker, (c, 'zip', [b'ab', b'ab', b'01'], 0, 8, 3)),
+    lambda c: (cracker_worker.worker_candidatas, (c, 'zip', [b'aa1', b'ab0', b'ab1', b'ba1'], 0, 3)),
+    lambda c: (cracker_worker.worker_hibrido, (c, 'zip', [b'aa', b'ab'], 0, [b'01'], True, 0, 4, 3)),
+])
+def test_workers_sinalizam_a_descoberta(alvo, tarefa):
+    caminho, sinal = alvo
+    funcao, args = tarefa(caminho)
+    encontrada, testadas, _, instante, _, ultima, segmento, inicio = funcao(args)
+    assert (encontrada, ultima, segmento, inicio) == ('ab1', 'ab1', 3, 0)
+    assert testadas >= 1 and instante is not None
+    assert sinal.value == 1
+
+
+def test_worker_sem_descoberta(alvo):
+    caminho, sinal = alvo
+    encontrada, testadas, _, instante, _, ultima, _, _ = cracker_worker.worker_candidatas((caminho, 'zip', [b'x', b'y'], 5, 0))
+    assert (encontrada, testadas, instante, ultima) == (None, 2, None, 'y')
+    assert sinal.value == 0